@@ -0,0 +1,109 @@
+"""Benchmark de ponta a ponta sobre os datasets sintéticos.
+
+Mede tempo e pico de memória de cada etapa (leitura, auditoria, cálculo, PDF e
+Excel) para vários tamanhos de empresa e grava o resultado em JSON:
+
+    python -m benchmarks.benchmark --tamanhos 100 1000 10000 50000 --saida bench.json
+
+Os datasets ficam em --dados e são reaproveitados entre execuções. O pico de
+memória vem do tracemalloc (apenas o processo principal) e deixa o Python mais
+lento; use --sem-memoria para medir só o tempo. O pico de RSS do processo
+(max_rss_mb) vem do módulo resource; no Windows, sem ele, a execução registra em
+pico_mb o maior pico do tracemalloc entre as etapas."""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import pandas as pd
+
+from benchmarks.dataset_sintetico import gerar_dataset
+from esocial.motor import (
+    Diagnostico, auditar, calcular_todos_funcionarios, classificar_rubricas, gerar_excel, gerar_zip_pdfs,
+    processar_arquivos, rubricas_unicas,
+)
+
+def _medir(etapas, nome, funcao, *args, **kwargs):
+    if tracemalloc.is_tracing(): tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    resultado = funcao(*args, **kwargs)
+    etapas[nome] = {'segundos': round(time.perf_counter() - inicio, 4)}
+    if tracemalloc.is_tracing():
+        etapas[nome]['pico_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 2)
+    return resultado
+
+def _dataset(diretorio, funcionarios, meses, rubricas_por_holerite, taxa_pagamento_faltante):
+    destino = os.path.join(diretorio, f'f{funcionarios}_m{meses}_r{rubricas_por_holerite}_p{taxa_pagamento_faltante}')
+    zips = sorted(glob.glob(os.path.join(destino, '*.zip')))
+    if not zips:
+        zips = gerar_dataset(destino, funcionarios, meses, rubricas_por_holerite, taxa_pagamento_faltante)
+    return zips
+
+def executar_tamanho(zips, ano, workers, saida_tmp):
+    etapas = {}
+    diagnostico = Diagnostico()
+    df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, s1010 = _medir(
+        etapas, 'leitura', processar_arquivos, zips, workers=workers, diagnostico=diagnostico)
+    _medir(etapas, 'auditoria', auditar, df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, ano)
+    rubricas = classificar_rubricas(rubricas_unicas(df_1200), s1010, ano)
+    dados = _medir(etapas, 'calculo', calcular_todos_funcionarios,
+                   df_1200, df_1210, pd.DataFrame(), rubricas, mapa_nomes, 'EMPRESA SINTETICA LTDA', '12.345.678/0001-00')
+    _medir(etapas, 'pdf', gerar_zip_pdfs, dados, str(ano), os.path.join(saida_tmp, 'informes.zip'), workers=workers)
+    _medir(etapas, 'excel', gerar_excel, dados, os.path.join(saida_tmp, 'relatorio.xlsx'))
+    return {
+        'linhas_s1200': len(df_1200), 'linhas_s1210': len(df_1210), 'informes': len(dados),
+        'bytes_zips': sum(os.path.getsize(z) for z in zips), 'etapas': etapas,
+        'leitura_por_etapa': diagnostico.para_dict()['leitura_por_etapa'],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do gerador de informes.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[100, 1000, 10000, 50000], help="número de funcionários")
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--rubricas-por-holerite', type=int, default=6)
+    parser.add_argument('--taxa-pagamento-faltante', type=float, default=0.02)
+    parser.add_argument('--processos', type=int, default=1, help="processos paralelos na leitura e nos PDFs")
+    parser.add_argument('--dados', default=os.path.join(tempfile.gettempdir(), 'informeesocial_bench'))
+    parser.add_argument('--saida', help="arquivo JSON (padrão: saída padrão)")
+    parser.add_argument('--sem-memoria', action='store_true', help="não medir o pico de memória (tracemalloc)")
+    args = parser.parse_args(argv)
+
+    resultado = {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0], 'pandas': pd.__version__, 'plataforma': platform.platform(),
+        'cpus': os.cpu_count(), 'processos': args.processos, 'memoria_medida': not args.sem_memoria,
+        'execucoes': [],
+    }
+    if not args.sem_memoria: tracemalloc.start()
+    for funcionarios in args.tamanhos:
+        zips = _dataset(args.dados, funcionarios, args.meses, args.rubricas_por_holerite, args.taxa_pagamento_faltante)
+        with tempfile.TemporaryDirectory() as saida_tmp:
+            execucao = {'funcionarios': funcionarios, 'meses': args.meses,
+                        **executar_tamanho(zips, 2025, args.processos, saida_tmp)}
+        if resource is not None:
+            pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            execucao['max_rss_mb'] = round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+        elif tracemalloc.is_tracing():
+            execucao['pico_mb'] = max(etapa['pico_mb'] for etapa in execucao['etapas'].values())
+        resultado['execucoes'].append(execucao)
+        print(f"{funcionarios} funcionários: " + ", ".join(f"{k} {v['segundos']}s" for k, v in execucao['etapas'].items()), file=sys.stderr)
+
+    texto = json.dumps(resultado, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f: f.write(texto + '\n')
+    else:
+        print(texto)
+
+if __name__ == '__main__':
+    main()
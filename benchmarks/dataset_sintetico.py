@@ -0,0 +1,166 @@
+"""Gerador de ZIPs sintéticos do eSocial para medir o desempenho do processamento.
+
+Gera um ZIP de tabelas/cadastro (S-1010, S-2200, S-2300, S-2299, S-2399) e um ZIP
+por competência com os S-1200 (vários dmDev/itensRemun) e S-1210 (infoPgto e
+planSaude), com os namespaces dos leiautes oficiais.
+
+    python -m benchmarks.dataset_sintetico destino/ --funcionarios 1000 --meses 12
+"""
+import argparse
+import os
+import random
+import zipfile
+
+NS_EVENTO = "http://www.esocial.gov.br/schema/evt/{}/v_S_01_02_00"
+NS_ASSINATURA = "http://www.w3.org/2000/09/xmldsig#"
+
+# (codRubr, tpRubr, codIncCP, codIncIRRF): cobre todas as categorias da classificação automática
+RUBRICAS = [
+    ('1000', '1', '11', '11'),  # salário
+    ('1010', '1', '11', '11'),  # horas extras
+    ('1020', '1', '11', '13'),  # férias
+    ('1300', '1', '12', '12'),  # 13º salário
+    ('9201', '2', '31', '31'),  # INSS
+    ('9202', '2', '32', '31'),  # INSS 13º
+    ('9203', '2', '00', '32'),  # IRRF
+    ('9204', '2', '00', '33'),  # IRRF 13º
+    ('5000', '1', '00', '00'),  # não tributável
+    ('5010', '3', '00', '00'),  # informativa
+]
+
+def _evento(tag, corpo, cnpj, seq):
+    # Id como o oficial: ID + tpInsc + nrInsc (14 posições) + sequencial, único entre empregadores
+    return (f'<?xml version="1.0" encoding="UTF-8"?><eSocial xmlns="{NS_EVENTO.format(tag)}">'
+            f'<{tag} Id="ID1{cnpj.ljust(14, "0")}{seq:019d}">{corpo}</{tag}>'
+            f'<Signature xmlns="{NS_ASSINATURA}"><SignedInfo/><SignatureValue>AA==</SignatureValue></Signature></eSocial>')
+
+def _empregador(cnpj):
+    return f'<ideEmpregador><tpInsc>1</tpInsc><nrInsc>{cnpj}</nrInsc></ideEmpregador>'
+
+def _s1010(cod, tp, inc_cp, inc_irrf, cnpj, seq):
+    corpo = (f'<ideEvento><tpAmb>1</tpAmb><procEmi>1</procEmi></ideEvento>{_empregador(cnpj)}'
+             f'<infoRubrica><inclusao><ideRubrica><codRubr>{cod}</codRubr><ideTabRubr>TAB</ideTabRubr>'
+             f'<iniValid>2020-01</iniValid></ideRubrica><dadosRubrica><dscRubr>RUBRICA {cod}</dscRubr>'
+             f'<natRubr>1000</natRubr><tpRubr>{tp}</tpRubr><codIncCP>{inc_cp}</codIncCP>'
+             f'<codIncIRRF>{inc_irrf}</codIncIRRF><codIncFGTS>00</codIncFGTS></dadosRubrica></inclusao></infoRubrica>')
+    return _evento('evtTabRubrica', corpo, cnpj, seq)
+
+def _inicio(cpf, nome, data, tsv, cnpj, seq):
+    if tsv:
+        corpo = (f'<ideEvento><indRetif>1</indRetif></ideEvento>{_empregador(cnpj)}'
+                 f'<trabalhador><cpfTrab>{cpf}</cpfTrab><nmTrab>{nome}</nmTrab><sexo>F</sexo></trabalhador>'
+                 f'<infoTSVInicio><cadIni>N</cadIni><codCateg>721</codCateg><dtInicio>{data}</dtInicio></infoTSVInicio>')
+        return _evento('evtTSVInicio', corpo, cnpj, seq)
+    corpo = (f'<ideEvento><indRetif>1</indRetif></ideEvento>{_empregador(cnpj)}'
+             f'<trabalhador><cpfTrab>{cpf}</cpfTrab><nmTrab>{nome}</nmTrab><sexo>M</sexo></trabalhador>'
+             f'<vinculo><matricula>{cpf[-6:]}</matricula><infoRegimeTrab><infoCeletista>'
+             f'<dtAdm>{data}</dtAdm><tpAdmissao>1</tpAdmissao></infoCeletista></infoRegimeTrab></vinculo>')
+    return _evento('evtAdmissao', corpo, cnpj, seq)
+
+def _termino(cpf, data, tsv, cnpj, seq):
+    if tsv:
+        corpo = (f'<ideEvento><indRetif>1</indRetif></ideEvento>{_empregador(cnpj)}'
+                 f'<ideTrabSemVinculo><cpfTrab>{cpf}</cpfTrab><codCateg>721</codCateg></ideTrabSemVinculo>'
+                 f'<infoTSVTermino><dtTerm>{data}</dtTerm></infoTSVTermino>')
+        return _evento('evtTSVTermino', corpo, cnpj, seq)
+    corpo = (f'<ideEvento><indRetif>1</indRetif></ideEvento>{_empregador(cnpj)}'
+             f'<ideVinculo><cpfTrab>{cpf}</cpfTrab><matricula>{cpf[-6:]}</matricula></ideVinculo>'
+             f'<infoDeslig><mtvDeslig>02</mtvDeslig><dtDeslig>{data}</dtDeslig></infoDeslig>')
+    return _evento('evtDeslig', corpo, cnpj, seq)
+
+def _s1200(cpf, per_apur, dmdevs, cnpj, seq):
+    blocos = []
+    for ide_dm_dev, itens in enumerate(dmdevs, 1):
+        remun = ''.join(f'<itensRemun><codRubr>{cod}</codRubr><ideTabRubr>TAB</ideTabRubr>'
+                        f'<vrRubr>{valor:.2f}</vrRubr><indApurIR>0</indApurIR></itensRemun>' for cod, valor in itens)
+        blocos.append(f'<dmDev><ideDmDev>{ide_dm_dev}</ideDmDev><codCateg>101</codCateg><infoPerApur><ideEstabLot>'
+                      f'<tpInsc>1</tpInsc><nrInsc>{cnpj}0001</nrInsc><codLotacao>L1</codLotacao>'
+                      f'<remunPerApur>{remun}</remunPerApur></ideEstabLot></infoPerApur></dmDev>')
+    corpo = (f'<ideEvento><indRetif>1</indRetif><indApuracao>{2 if len(per_apur) == 4 else 1}</indApuracao>'
+             f'<perApur>{per_apur}</perApur></ideEvento>{_empregador(cnpj)}'
+             f'<ideTrabalhador><cpfTrab>{cpf}</cpfTrab></ideTrabalhador>{"".join(blocos)}')
+    return _evento('evtRemun', corpo, cnpj, seq)
+
+def _s1210(cpf, per_apur, n_dmdev, planos, cnpj, seq):
+    pagamentos = ''.join(f'<infoPgto><dtPgto>{per_apur}-05</dtPgto><tpPgto>1</tpPgto><perRef>{per_apur}</perRef>'
+                         f'<ideDmDev>{i}</ideDmDev><vrLiq>100.00</vrLiq></infoPgto>' for i in range(1, n_dmdev + 1))
+    saude = ''.join(f'<planSaude><cnpjOper>{cnpj_oper}</cnpjOper><regANS>{ans}</regANS>'
+                    f'<vlrSaudeTit>{valor:.2f}</vlrSaudeTit></planSaude>' for cnpj_oper, ans, valor in planos)
+    corpo = (f'<ideEvento><indRetif>1</indRetif><perApur>{per_apur}</perApur></ideEvento>{_empregador(cnpj)}'
+             f'<ideBenef><cpfBenef>{cpf}</cpfBenef>{pagamentos}'
+             + (f'<infoIRComplem>{saude}</infoIRComplem>' if saude else '') + '</ideBenef>')
+    return _evento('evtPgtos', corpo, cnpj, seq)
+
+def gerar_dataset(destino, funcionarios=100, meses=12, rubricas_por_holerite=6, taxa_pagamento_faltante=0.02,
+                  ano=2025, cnpj='12345678', semente=42):
+    """Grava os ZIPs em `destino` e retorna a lista de caminhos gerados.
+
+    taxa_pagamento_faltante: fração das competências sem S-1210 correspondente.
+    Cerca de 10% dos trabalhadores são TSV (S-2300/S-2399), 8% entram e 8% saem
+    durante o ano, e 30% têm plano de saúde informado no S-1210."""
+    rnd = random.Random(semente)
+    os.makedirs(destino, exist_ok=True)
+    seq = 0
+    rubricas_mensais = [r for r in RUBRICAS if r[0] not in ('1300', '9202', '9204')]
+    trabalhadores = []
+    for k in range(funcionarios):
+        inicio = rnd.randint(2, meses) if meses > 1 and rnd.random() < 0.08 else 1
+        desligado = rnd.random() < 0.08
+        fim = rnd.randint(inicio, meses) if desligado else meses
+        trabalhadores.append({
+            'cpf': f'{10_000_000_000 + k:011d}', 'nome': f'FUNCIONARIO {k:06d}', 'tsv': rnd.random() < 0.10,
+            'inicio': inicio, 'fim': fim, 'desligado': desligado, 'saude': rnd.random() < 0.30,
+        })
+
+    caminhos = []
+    caminho = os.path.join(destino, f'{ano}_tabelas_cadastro.zip')
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as z:
+        for cod, tp, inc_cp, inc_irrf in RUBRICAS:
+            seq += 1
+            z.writestr(f'S-1010/{seq}.xml', _s1010(cod, tp, inc_cp, inc_irrf, cnpj, seq))
+        for t in trabalhadores:
+            seq += 1
+            data_inicio = f'{ano}-{t["inicio"]:02d}-01' if t['inicio'] > 1 else f'{ano - 1 - seq % 5}-0{1 + seq % 9}-15'
+            z.writestr(f'{"S-2300" if t["tsv"] else "S-2200"}/{seq}.xml', _inicio(t['cpf'], t['nome'], data_inicio, t['tsv'], cnpj, seq))
+            if t['desligado']:
+                seq += 1
+                z.writestr(f'{"S-2399" if t["tsv"] else "S-2299"}/{seq}.xml', _termino(t['cpf'], f'{ano}-{t["fim"]:02d}-20', t['tsv'], cnpj, seq))
+    caminhos.append(caminho)
+
+    competencias = [f'{ano}-{m:02d}' for m in range(1, meses + 1)] + [str(ano)]  # perApur anual (13º)
+    for comp in competencias:
+        caminho = os.path.join(destino, f'{ano}_{comp.replace("-", "")}_folha.zip')
+        with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as z:
+            mes = int(comp[5:]) if len(comp) > 4 else None
+            for t in trabalhadores:
+                if mes is not None and not t['inicio'] <= mes <= t['fim']: continue
+                if mes is None: escolhidas = [r for r in RUBRICAS if r[0] in ('1300', '9202', '9204')]
+                else: escolhidas = rnd.sample(rubricas_mensais, min(rubricas_por_holerite, len(rubricas_mensais)))
+                n_dmdev = 2 if mes is not None and rnd.random() < 0.15 else 1
+                dmdevs = [[(cod, rnd.randint(100, 900_000) / 100) for cod, *_ in escolhidas] for _ in range(n_dmdev)]
+                seq += 1
+                z.writestr(f'S-1200/{seq}.xml', _s1200(t['cpf'], comp, dmdevs, cnpj, seq))
+                if mes is not None and rnd.random() >= taxa_pagamento_faltante:
+                    planos = [('11111111000191', '123456', rnd.randint(5_000, 90_000) / 100)] if t['saude'] else []
+                    seq += 1
+                    z.writestr(f'S-1210/{seq}.xml', _s1210(t['cpf'], comp, n_dmdev, planos, cnpj, seq))
+        caminhos.append(caminho)
+    return caminhos
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera ZIPs sintéticos do eSocial.")
+    parser.add_argument('destino')
+    parser.add_argument('--funcionarios', type=int, default=100)
+    parser.add_argument('--meses', type=int, default=12)
+    parser.add_argument('--rubricas-por-holerite', type=int, default=6)
+    parser.add_argument('--taxa-pagamento-faltante', type=float, default=0.02)
+    parser.add_argument('--ano', type=int, default=2025)
+    parser.add_argument('--cnpj', default='12345678', help="inscrição (raiz do CNPJ) do empregador")
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+    for caminho in gerar_dataset(args.destino, args.funcionarios, args.meses, args.rubricas_por_holerite,
+                                 args.taxa_pagamento_faltante, args.ano, args.cnpj, args.semente):
+        print(caminho)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1 @@
+"""Núcleo de processamento dos eventos do eSocial para os informes de rendimentos."""
@@ -0,0 +1,181 @@
+"""Base local por empregador e ano-calendário, alimentada aos poucos.
+
+A folha envia os ZIPs de um mês por vez. Em vez de reler o ano inteiro, cada envio
+lê só os XMLs que ainda não estão na base e grava o resultado como uma nova parte
+(apenas acréscimo). Os XMLs são identificados por nome, CRC-32 e tamanho, que vêm do
+diretório do ZIP: reenviar um ZIP, ou um ZIP que repete meses anteriores, não lê
+nada de novo. Um XML só é registrado na base depois de lido sem falhas; os que
+falharam são lidos de novo no próximo envio. Eventos de outro empregador ou de outro
+ano são descartados. Ao carregar, as partes são mescladas na ordem em que foram gravadas e
+passam pelo índice de retificações e exclusões, como numa leitura completa dos
+mesmos ZIPs. Cada parte usa o formato das entradas do cache (Parquet + JSON)."""
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+
+from esocial.cache import gravar_entrada, ler_entrada
+from esocial.diagnostico import Diagnostico
+from esocial.eventos import VERSAO_LEITOR
+from esocial.leitura import (
+    LIMITE_MEMORIA_PADRAO, juntar, ler_zips, montar_dataframes, parcial_das_tabelas, parcial_para_tabelas,
+)
+
+DIRETORIO_ACERVO = os.path.join(os.path.expanduser('~'), '.local', 'share', 'informeesocial', 'acervo')
+# Acima deste número de partes, as partes são regravadas numa só após o envio
+LIMITE_PARTES = 24
+
+class AcervoIncompativel(ValueError):
+    """A base foi gravada por outra versão do leitor e precisa ser recriada a partir dos ZIPs."""
+
+def raiz_cnpj(cnpj):
+    """Raiz (8 dígitos) de um CNPJ em qualquer formatação; CPFs de empregador ficam inteiros."""
+    digitos = re.sub(r'\D', '', str(cnpj))
+    if not digitos: raise ValueError(f"CNPJ inválido: {cnpj!r}")
+    return digitos[:8] if len(digitos) == 14 else digitos
+
+def _raizes(inscricoes):
+    digitos = inscricoes.astype(str).str.replace(r'\D', '', regex=True)
+    return digitos.where(digitos.str.len() != 14, digitos.str[:8])
+
+def _no_ano(competencias, ano):
+    return competencias.astype(str).str[:4] == str(ano)
+
+def _manter(df, mascara):
+    df = df[np.asarray(mascara, dtype=bool)].reset_index(drop=True)
+    for nome in df.select_dtypes('category'):
+        df[nome] = df[nome].cat.remove_unused_categories()
+    return df
+
+def chave_membro(info):
+    return f"{os.path.basename(info.filename)}:{info.CRC:08x}:{info.file_size}"
+
+class Acervo:
+    def __init__(self, cnpj, ano, diretorio=DIRETORIO_ACERVO):
+        self.cnpj = raiz_cnpj(cnpj)
+        self.ano = int(ano)
+        self.diretorio = os.path.join(diretorio, f"{self.cnpj}-{self.ano}")
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def partes(self):
+        """Partes gravadas, na ordem de gravação."""
+        return sorted(e.name for e in os.scandir(self.diretorio) if e.is_dir() and not e.name.startswith('.'))
+
+    def _verificar(self, mapas):
+        if mapas.get('versao') != VERSAO_LEITOR:
+            raise AcervoIncompativel(f"A base {self.diretorio} foi gravada por outra versão do leitor; apague-a e envie os ZIPs novamente.")
+        return mapas
+
+    def _mapas(self, parte):
+        with open(os.path.join(self.diretorio, parte, 'mapas.json'), encoding='utf-8') as f:
+            return self._verificar(json.load(f))
+
+    def membros(self):
+        """Chaves (chave_membro) dos XMLs já incorporados."""
+        vistos = set()
+        for parte in self.partes(): vistos.update(self._mapas(parte)['membros'])
+        return vistos
+
+    def _filtrar(self, tabelas, mapas):
+        """Descarta das tabelas e mapas lidos o que não é do empregador e do ano da base:
+        S-1200 pelo perApur, S-1210 pelo perApur ou por pagar competência do ano, S-3000
+        pelo período excluído (quando houver). Devolve (tabelas, mapas, descartados)."""
+        eventos, exclusoes = tabelas['eventos'], tabelas['exclusoes']
+        linhas = eventos['Linhas'].to_numpy(dtype=np.int64)
+        do_ano = _no_ano(eventos['Competencia'], self.ano).to_numpy(copy=True)
+        # S-1210 de janeiro que paga dezembro do ano: basta uma competência paga no ano
+        e_1210 = (eventos['Tipo'] == 'S-1210').to_numpy()
+        s1210 = tabelas['s1210']
+        evento_da_linha = np.repeat(np.flatnonzero(e_1210), linhas[e_1210])
+        paga_no_ano = _no_ano(s1210['Competencia_Paga'], self.ano).to_numpy() & (s1210['Tipo'] == 'Pagamento_Check').to_numpy()
+        do_ano[np.unique(evento_da_linha[paga_no_ano])] = True
+        manter = (_raizes(eventos['CNPJ_Emp']) == self.cnpj).to_numpy() & do_ano
+        manter_exclusoes = ((_raizes(exclusoes['CNPJ_Emp']) == self.cnpj)
+                            & (exclusoes['Competencia'].isna() | _no_ano(exclusoes['Competencia'], self.ano))).to_numpy()
+        descartados = int((~manter).sum() + (~manter_exclusoes).sum())
+
+        tabelas = dict(tabelas, eventos=_manter(eventos, manter), exclusoes=_manter(exclusoes, manter_exclusoes))
+        for tabela, tipo in (('s1200', 'S-1200'), ('s1210', 'S-1210')):
+            do_tipo = (eventos['Tipo'] == tipo).to_numpy()
+            tabelas[tabela] = _manter(tabelas[tabela], np.repeat(manter[do_tipo], linhas[do_tipo]))
+        filtrados = {}
+        for chave, por_empregador in mapas.items():
+            filtrados[chave] = {}
+            for empregador, mapa in por_empregador.items():
+                if empregador and raiz_cnpj(empregador) != self.cnpj: descartados += len(mapa)
+                else: filtrados[chave][empregador] = mapa
+        return tabelas, filtrados, descartados
+
+    def adicionar(self, uploaded_files, workers=None, progresso=None, diagnostico=None,
+                  limite_memoria=LIMITE_MEMORIA_PADRAO):
+        """Lê dos ZIPs só os XMLs que ainda não estão na base e grava-os numa nova parte.
+        Devolve {'novos': XMLs incorporados, 'repetidos': XMLs que já estavam na base,
+        'falhas': XMLs com falha de leitura (ficam de fora e são relidos no próximo envio),
+        'descartados': eventos e cadastros de outro empregador ou ano}."""
+        workers = workers or os.cpu_count() or 1
+        progresso = progresso or (lambda fracao: None)
+        diagnostico = diagnostico or Diagnostico()
+        with diagnostico.etapa('acervo'):
+            vistos = self.membros()
+        # (ZIP, caminho do ZIP interno, membro) -> chave; a chave só entra na base se o membro for lido sem falhas
+        candidatos, repetidos = {}, Counter()
+
+        def filtro(i, caminho, info):
+            chave = chave_membro(info)
+            if chave in vistos:
+                repetidos[caminho] += 1
+                return False
+            vistos.add(chave)
+            candidatos[i, caminho, info.filename] = chave
+            return True
+
+        lidos = ler_zips(list(uploaded_files), None, workers, progresso, diagnostico, limite_memoria, filtro=filtro)
+        falhos = {(i, caminho, arquivo) for i, (_, resumo) in enumerate(lidos)
+                  for caminho, r in resumo.items() for arquivo, _ in r['falhas']}
+        novos = [chave for membro, chave in candidatos.items() if membro not in falhos]
+        descartados = 0
+        if novos:
+            with diagnostico.etapa('dataframe'):
+                tabelas, mapas = parcial_para_tabelas(juntar(parcial for parcial, _ in lidos))
+                tabelas, mapas, descartados = self._filtrar(tabelas, mapas)
+            del lidos
+            with diagnostico.etapa('acervo'):
+                gravar_entrada(self.diretorio, f"{time.time_ns():020d}", tabelas, dict(mapas, membros=novos, versao=VERSAO_LEITOR))
+                if len(self.partes()) > LIMITE_PARTES: self.compactar()
+        return {'novos': len(novos), 'repetidos': sum(repetidos.values()),
+                'falhas': len(candidatos) - len(novos), 'descartados': descartados}
+
+    def _ler_partes(self, partes):
+        for parte in partes:
+            tabelas, mapas = ler_entrada(os.path.join(self.diretorio, parte))
+            self._verificar(mapas)
+            yield parcial_das_tabelas(tabelas, mapas), mapas['membros']
+
+    def carregar(self, diagnostico=None, por_empregador=False):
+        """Devolve o mesmo resultado de processar_arquivos a partir das partes gravadas, sem reler ZIPs."""
+        diagnostico = diagnostico or Diagnostico()
+        with diagnostico.etapa('acervo'):
+            total = juntar(parcial for parcial, _ in self._ler_partes(self.partes()))
+        return montar_dataframes(total, diagnostico, por_empregador)
+
+    def compactar(self):
+        """Regrava todas as partes numa só, na mesma ordem, e apaga as antigas."""
+        partes = self.partes()
+        if len(partes) < 2: return
+        membros = []
+        def com_membros():
+            for parcial, chaves in self._ler_partes(partes):
+                membros.extend(chaves)
+                yield parcial
+        tabelas, mapas = parcial_para_tabelas(juntar(com_membros()))
+        # o nome fica entre a última parte lida e qualquer parte gravada depois dela
+        gravar_entrada(self.diretorio, f"{partes[-1]}-c", tabelas, dict(mapas, membros=membros, versao=VERSAO_LEITOR))
+        for parte in partes: shutil.rmtree(os.path.join(self.diretorio, parte), ignore_errors=True)
+
+    def apagar(self):
+        shutil.rmtree(self.diretorio, ignore_errors=True)
+        os.makedirs(self.diretorio, exist_ok=True)
@@ -0,0 +1,79 @@
+"""Auditoria de integridade (S-1200 ausente, meses faltantes e competências sem S-1210)."""
+import numpy as np
+import pandas as pd
+
+COLUNAS_SEM_RUBRICA = ["CPF", "Nome", "Obs"]
+COLUNAS_MESES_FALTANTES = ["CPF", "Nome", "Meses Faltantes", "Data Admissão/Início", "Data Demissão/Fim", "Regra Aplicada"]
+COLUNAS_PENDENCIAS = ["CPF", "Nome", "Competencia Faltante", "Data Pagamento (DD/MM/AAAA)", "IRRF Manual (R$)"]
+
+def _nomes(cpfs, mapa_nomes):
+    return [mapa_nomes.get(cpf, f"CPF {cpf}") for cpf in cpfs]
+
+def _pares(df, coluna_cpf, coluna_comp):
+    """Pares (CPF, Competencia) distintos como texto."""
+    pares = df[[coluna_cpf, coluna_comp]].drop_duplicates().astype(str)
+    return pares.set_axis(['CPF', 'Competencia'], axis=1)
+
+def _janela_meses(cpfs, mapa_admissao, mapa_demissao, ano):
+    """Mês inicial/final esperados no ano para cada CPF, a partir das datas de início e término."""
+    janela = pd.DataFrame({'CPF': cpfs})
+    adm = pd.to_datetime(janela['CPF'].map(mapa_admissao), format='%Y-%m-%d', errors='coerce')
+    dem = pd.to_datetime(janela['CPF'].map(mapa_demissao), format='%Y-%m-%d', errors='coerce')
+
+    janela['mes_inicio'] = np.select([adm.dt.year == ano, adm.dt.year > ano], [adm.dt.month, 13], 1)
+    janela['mes_fim'] = np.select([dem.dt.year == ano, dem.dt.year < ano], [dem.dt.month, 0], 12)
+
+    janela['Data Admissão/Início'] = adm.dt.strftime('%d/%m/%Y').fillna("Não encontrada (S-2200/2300 ausente)")
+    janela['Data Demissão/Fim'] = dem.dt.strftime('%d/%m/%Y').fillna("Ativo")
+    janela['Regra Aplicada'] = np.select(
+        [dem.dt.year == ano, adm.dt.year == ano],
+        ["Término em " + janela['Data Demissão/Fim'], "Início em " + janela['Data Admissão/Início']],
+        "Ano Completo")
+    return janela
+
+def auditar(df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, ano):
+    """Retorna (alertas_sem_rubrica, alertas_meses_faltantes, pendencias_pagamento) como DataFrames."""
+    cpfs_1200 = set(df_1200['CPF'].unique()) if not df_1200.empty else set()
+    cpfs_1210 = set(df_1210['CPF'].unique()) if not df_1210.empty else set()
+
+    # CPFs só com S-1210
+    sem_1200 = sorted(cpfs_1210 - cpfs_1200)
+    alertas_sem_rubrica = pd.DataFrame({
+        "CPF": sem_1200, "Nome": _nomes(sem_1200, mapa_nomes),
+        "Obs": "Nenhum S-1200 encontrado. Impossível calcular Bruto/INSS."
+    }, columns=COLUNAS_SEM_RUBRICA)
+
+    if not cpfs_1200:
+        return alertas_sem_rubrica, pd.DataFrame(columns=COLUNAS_MESES_FALTANTES), pd.DataFrame(columns=COLUNAS_PENDENCIAS)
+
+    encontradas = _pares(df_1200, 'CPF', 'Competencia')
+
+    # Meses esperados x competências encontradas (anti-join)
+    janela = _janela_meses(sorted(cpfs_1200), mapa_admissao, mapa_demissao, ano)
+    meses = pd.DataFrame({'mes': range(1, 13)})
+    esperados = janela[['CPF', 'mes_inicio', 'mes_fim']].merge(meses, how='cross')
+    esperados = esperados[(esperados['mes'] >= esperados['mes_inicio']) & (esperados['mes'] <= esperados['mes_fim'])]
+    esperados = esperados.assign(Competencia=f"{ano}-" + esperados['mes'].astype(str).str.zfill(2))
+    faltantes = esperados.merge(encontradas, on=['CPF', 'Competencia'], how='left', indicator=True)
+    faltantes = faltantes[faltantes['_merge'] == 'left_only'].sort_values(['CPF', 'mes'])
+    lista_faltantes = faltantes.groupby('CPF', sort=True)['Competencia'].agg(", ".join).rename("Meses Faltantes")
+
+    alertas_meses_faltantes = janela.merge(lista_faltantes, left_on='CPF', right_index=True, how='inner')
+    alertas_meses_faltantes["Nome"] = _nomes(alertas_meses_faltantes['CPF'], mapa_nomes)
+    alertas_meses_faltantes = alertas_meses_faltantes[COLUNAS_MESES_FALTANTES].reset_index(drop=True)
+
+    # Competências calculadas sem pagamento no S-1210 (anti-join)
+    if not df_1210.empty:
+        pagas = _pares(df_1210[df_1210['Tipo'] == 'Pagamento_Check'], 'CPF', 'Competencia_Paga')
+        sem_pagamento = encontradas.merge(pagas, on=['CPF', 'Competencia'], how='left', indicator=True)
+        sem_pagamento = sem_pagamento[sem_pagamento['_merge'] == 'left_only']
+    else:
+        sem_pagamento = encontradas
+    sem_pagamento = sem_pagamento.sort_values(['CPF', 'Competencia'])
+    pendencias_pagamento = pd.DataFrame({
+        "CPF": sem_pagamento['CPF'].to_numpy(), "Nome": _nomes(sem_pagamento['CPF'], mapa_nomes),
+        "Competencia Faltante": sem_pagamento['Competencia'].to_numpy(),
+        "Data Pagamento (DD/MM/AAAA)": "", "IRRF Manual (R$)": 0.0
+    }, columns=COLUNAS_PENDENCIAS)
+
+    return alertas_sem_rubrica, alertas_meses_faltantes, pendencias_pagamento
@@ -0,0 +1,92 @@
+"""Cache em disco dos ZIPs já lidos, endereçado pelo conteúdo de cada ZIP.
+
+Cada entrada é um diretório <sha256>-v<versão do leitor> com as tabelas em
+Parquet (colunas categóricas preservadas) e os mapas em JSON. A entrada mais
+antiga (pelo último acesso) é descartada quando o tamanho total passa do limite."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import pandas as pd
+
+from esocial.eventos import VERSAO_LEITOR
+
+DIRETORIO_PADRAO = os.path.join(os.path.expanduser('~'), '.cache', 'informeesocial', 'leitura')
+LIMITE_PADRAO = 2 * 1024 ** 3  # 2 GB
+
+def hash_arquivo(arquivo, tamanho_bloco=1024 * 1024):
+    """SHA-256 do conteúdo de um caminho ou objeto de arquivo (o cursor volta ao início)."""
+    h = hashlib.sha256()
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as f:
+            for bloco in iter(lambda: f.read(tamanho_bloco), b''): h.update(bloco)
+    elif hasattr(arquivo, 'getbuffer'):
+        h.update(arquivo.getbuffer())
+    else:
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(tamanho_bloco), b''): h.update(bloco)
+        arquivo.seek(0)
+    return h.hexdigest()
+
+def ler_entrada(caminho):
+    """(tabelas, mapas) gravados por gravar_entrada; OSError/ValueError se faltar ou estiver corrompida."""
+    with open(os.path.join(caminho, 'mapas.json'), encoding='utf-8') as f:
+        mapas = json.load(f)
+    tabelas = {nome: pd.read_parquet(os.path.join(caminho, f'{nome}.parquet')) for nome in mapas.pop('_tabelas')}
+    return tabelas, mapas
+
+def gravar_entrada(diretorio, nome, tabelas, mapas):
+    """Grava as tabelas (Parquet) e os mapas (JSON) em diretorio/nome. A entrada é montada
+    num temporário e renomeada, então leitores nunca veem uma entrada pela metade."""
+    destino = os.path.join(diretorio, nome)
+    if os.path.isdir(destino): return
+    tmp = tempfile.mkdtemp(dir=diretorio, prefix='.tmp-')
+    try:
+        for tabela, df in tabelas.items():
+            df.to_parquet(os.path.join(tmp, f'{tabela}.parquet'), index=False)
+        with open(os.path.join(tmp, 'mapas.json'), 'w', encoding='utf-8') as f:
+            json.dump({**mapas, '_tabelas': list(tabelas)}, f, ensure_ascii=False)
+        os.rename(tmp, destino)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.isdir(destino): raise
+
+def _tamanho(caminho):
+    return sum(e.stat().st_size for e in os.scandir(caminho) if e.is_file())
+
+class CacheLeitura:
+    def __init__(self, diretorio=DIRETORIO_PADRAO, limite_bytes=LIMITE_PADRAO):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        os.makedirs(diretorio, exist_ok=True)
+        self._descartar_excesso()
+
+    def chave(self, arquivo):
+        return f"{hash_arquivo(arquivo)}-v{VERSAO_LEITOR}"
+
+    def carregar(self, chave):
+        """Retorna (tabelas, mapas) da entrada ou None se ela não existir."""
+        caminho = os.path.join(self.diretorio, chave)
+        try:
+            entrada = ler_entrada(caminho)
+        except (OSError, ValueError):
+            return None
+        os.utime(caminho)  # marca o acesso para o LRU
+        return entrada
+
+    def guardar(self, chave, tabelas, mapas):
+        gravar_entrada(self.diretorio, chave, tabelas, mapas)
+        self._descartar_excesso()
+
+    def _descartar_excesso(self):
+        entradas = []
+        for e in os.scandir(self.diretorio):
+            if e.is_dir() and not e.name.startswith('.'):
+                entradas.append((e.stat().st_mtime, _tamanho(e.path), e.path))
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        for _, tamanho, caminho in sorted(entradas):
+            if total <= self.limite_bytes: break
+            shutil.rmtree(caminho, ignore_errors=True)
+            total -= tamanho
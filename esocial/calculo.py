@@ -0,0 +1,144 @@
+"""Cálculo vetorizado dos totais do informe de rendimentos."""
+import pandas as pd
+
+from esocial.formatacao import fmt
+
+# Categorias do informe e a chave correspondente em 'calculados'
+CATEGORIAS = ('v_bruto', 'v_13_bruto', 'v_inss', 'v_13_inss', 'v_irrf', 'v_13_irrf')
+
+def tabela_rubricas(rubricas):
+    """Converte {categoria: [rubricas]} numa tabela Rubrica -> Categoria.
+    Uma rubrica selecionada em mais de uma categoria soma em todas elas."""
+    linhas = [(rubr, cat) for cat, lista in rubricas.items() for rubr in lista]
+    return pd.DataFrame(linhas, columns=['Rubrica', 'Categoria'], dtype=str)
+
+def competencias_pagas(df_1210, df_manuais):
+    """Pares (CPF, Competencia) com pagamento: S-1210 mais as correções manuais."""
+    partes = []
+    if not df_1210.empty:
+        checks = df_1210.loc[df_1210['Tipo'] == 'Pagamento_Check', ['CPF', 'Competencia_Paga']]
+        partes.append(checks.set_axis(['CPF', 'Competencia'], axis=1).astype(str))
+    if not df_manuais.empty:
+        manuais = df_manuais[['CPF', 'Competencia Faltante']]
+        partes.append(manuais.set_axis(['CPF', 'Competencia'], axis=1).astype(str))
+    if not partes: return pd.DataFrame(columns=['CPF', 'Competencia'], dtype=str)
+    return pd.concat(partes, ignore_index=True).drop_duplicates()
+
+def itens_pagos(df_1200, df_1210, df_manuais):
+    """Itens do S-1200 que entram no informe, somados por (CPF, Competencia, Rubrica). Itens
+    entram quando a competência foi paga (S-1210 ou correção manual) ou quando o perApur é
+    anual (AAAA). Não depende do mapeamento de rubricas, então pode ser reaproveitado
+    quando só as rubricas selecionadas mudam."""
+    # Reduz primeiro a (CPF, Competência, Rubrica) usando os códigos categóricos
+    itens = df_1200.groupby(['CPF', 'Competencia', 'Rubrica'], observed=True, sort=False)['Valor'].sum().reset_index()
+    itens[['CPF', 'Competencia', 'Rubrica']] = itens[['CPF', 'Competencia', 'Rubrica']].astype(str)
+
+    pagas = competencias_pagas(df_1210, df_manuais).assign(_paga=True)
+    itens = itens.merge(pagas, on=['CPF', 'Competencia'], how='left')
+    return itens[itens['_paga'].notna() | (itens['Competencia'].str.len() == 4)].drop(columns='_paga')
+
+def itens_por_categoria(df_1200, df_1210, df_manuais, rubricas, itens=None):
+    """Itens de itens_pagos ligados à categoria do mapeamento (`itens` já calculados, se dados)."""
+    if itens is None: itens = itens_pagos(df_1200, df_1210, df_manuais)
+    return itens.merge(tabela_rubricas(rubricas), on='Rubrica', how='inner')
+
+def totais_por_cpf(df_1200, df_1210, df_manuais, rubricas, itens=None):
+    """Totais de todas as categorias para todos os CPFs com S-1200 num único groupby.
+
+    Os itens considerados são os de itens_por_categoria. Retorna um DataFrame indexado pelo CPF
+    (ordenado) com uma coluna por categoria, já incluindo o IRRF manual e o 13º líquido.
+    Os totais são arredondados aos centavos: a soma em ponto flutuante depende da ordem
+    dos itens, e o arredondamento dá o mesmo valor em qualquer ordem."""
+    cpfs = sorted(set(df_1200['CPF'].unique())) if not df_1200.empty else []
+    totais = pd.DataFrame(0.0, index=pd.Index(cpfs, name='CPF', dtype=str), columns=list(CATEGORIAS))
+    if not cpfs: return totais.assign(v_13_liq=0.0)
+
+    por_categoria = itens_por_categoria(df_1200, df_1210, df_manuais, rubricas, itens)
+    if not por_categoria.empty:
+        pivo = por_categoria.groupby(['CPF', 'Categoria'])['Valor'].sum().unstack('Categoria')
+        totais.update(pivo.reindex(index=totais.index, columns=totais.columns).fillna(0.0))
+
+    if not df_manuais.empty:
+        irrf_manual = df_manuais.assign(CPF=df_manuais['CPF'].astype(str)).groupby('CPF')['IRRF Manual (R$)'].sum()
+        totais['v_irrf'] += irrf_manual.reindex(totais.index, fill_value=0.0)
+
+    # o 13º líquido sai das somas exatas, como no cálculo por CPF, e só então tudo é arredondado
+    totais['v_13_liq'] = totais['v_13_bruto'] - totais['v_13_inss']
+    return totais.round(2)
+
+def detalhe_por_competencia(df_1200, df_1210, df_manuais, rubricas, itens=None):
+    """Valor de cada categoria por CPF e competência (colunas CPF, Competencia e uma por
+    categoria), ordenado e arredondado aos centavos. Inclui o IRRF manual na competência
+    corrigida, de modo que a soma por CPF bate com totais_por_cpf."""
+    colunas = ['CPF', 'Competencia', *CATEGORIAS]
+    if df_1200.empty: return pd.DataFrame(columns=colunas)
+    por_categoria = itens_por_categoria(df_1200, df_1210, df_manuais, rubricas, itens)[['CPF', 'Competencia', 'Categoria', 'Valor']]
+    if not df_manuais.empty:
+        cpfs = set(df_1200['CPF'].unique())
+        manuais = df_manuais[df_manuais['CPF'].astype(str).isin(cpfs)]
+        irrf_manual = pd.DataFrame({
+            'CPF': manuais['CPF'].astype(str), 'Competencia': manuais['Competencia Faltante'].astype(str),
+            'Categoria': 'v_irrf', 'Valor': manuais['IRRF Manual (R$)'].astype(float)})
+        por_categoria = pd.concat([por_categoria, irrf_manual[irrf_manual['Valor'] != 0]], ignore_index=True)
+    if por_categoria.empty: return pd.DataFrame(columns=colunas)
+    detalhe = por_categoria.groupby(['CPF', 'Competencia', 'Categoria'])['Valor'].sum().unstack('Categoria')
+    return detalhe.reindex(columns=list(CATEGORIAS)).fillna(0.0).round(2).reset_index()[colunas]
+
+def textos_saude(df_1210):
+    """Texto de informações complementares (planos de saúde) por CPF."""
+    textos = {}
+    if df_1210.empty: return textos
+    saude = df_1210[df_1210['Tipo'] == 'Saude']
+    if saude.empty: return textos
+    agrupado = saude.groupby(['CPF', 'CNPJ', 'ANS'], observed=True, sort=False)['Valor'].sum()
+    for (cpf, cnpj, ans), valor in agrupado.items():
+        if cpf not in textos: textos[cpf] = "DESPESAS MÉDICAS/ODONTOLÓGICAS:\n"
+        textos[cpf] += f"OPERADORA CNPJ: {cnpj} (Reg. ANS: {ans}) - VALOR ANUAL: R$ {fmt(valor)}\n"
+    return textos
+
+def calcular_todos_funcionarios(df_1200, df_1210, df_manuais, rubricas, mapa_nomes, nome_emp, cnpj_emp,
+                                itens=None, saude=None):
+    """Monta 'calculados' e 'cadastrais' de cada CPF com S-1200.
+
+    rubricas: {categoria: [rubricas]} com as chaves de CATEGORIAS.
+    itens/saude: resultados já calculados de itens_pagos e textos_saude (opcionais)."""
+    totais = totais_por_cpf(df_1200, df_1210, df_manuais, rubricas, itens)
+    saude = textos_saude(df_1210) if saude is None else saude
+
+    resultados = []
+    for cpf, linha in zip(totais.index, totais.to_dict('records')):
+        nome = mapa_nomes.get(cpf, f"CPF {cpf}")
+        calculados = {chave: linha[chave] for chave in CATEGORIAS}
+        calculados['v_13_liq'] = linha['v_13_liq']
+        calculados['txt_saude'] = saude.get(cpf, "Sem informações complementares.")
+        resultados.append({
+            'cpf': cpf, 'nome': nome,
+            'calculados': calculados,
+            'cadastrais': {
+                'CPF': cpf, 'Nome': nome,
+                'Empregador_Nome': nome_emp, 'Empregador_CNPJ': cnpj_emp
+            }
+        })
+    return resultados
+
+# --- UM FUNCIONÁRIO ---
+# Para conferir um informe sem calcular a empresa inteira: o índice guarda as posições
+# das linhas de cada CPF (montado uma vez por conjunto de dados) e o cálculo roda só
+# sobre essas linhas, com as mesmas funções do cálculo completo.
+
+def indice_por_cpf(df_1200, df_1210):
+    """{'s1200': {CPF: posições}, 's1210': {CPF: posições}} das linhas de cada CPF."""
+    return {
+        chave: df.groupby('CPF', observed=True, sort=False).indices if not df.empty else {}
+        for chave, df in (('s1200', df_1200), ('s1210', df_1210))
+    }
+
+def calcular_funcionario(cpf, df_1200, df_1210, df_manuais, rubricas, mapa_nomes, nome_emp, cnpj_emp, indice):
+    """Item de calcular_todos_funcionarios para um único CPF (None se o CPF não tem S-1200),
+    calculado só com as linhas do CPF no `indice` (indice_por_cpf)."""
+    if cpf not in indice['s1200']: return None
+    linhas_1200 = df_1200.iloc[indice['s1200'][cpf]]
+    linhas_1210 = df_1210.iloc[indice['s1210'].get(cpf, [])]
+    manuais = df_manuais[df_manuais['CPF'].astype(str) == cpf] if not df_manuais.empty else df_manuais
+    resultado = calcular_todos_funcionarios(linhas_1200, linhas_1210, manuais, rubricas, mapa_nomes, nome_emp, cnpj_emp)
+    return resultado[0]
@@ -0,0 +1,112 @@
+"""Linha de comando: gera os informes (PDF em ZIP) e o relatório Excel sem navegador.
+
+Exemplo:
+    python -m esocial 2025_*.zip --ano 2025 --saida informes/ \
+        --empresa-nome "EMPRESA LTDA" --empresa-cnpj 00.000.000/0001-00 --rubricas mapa.json
+
+Com --acervo, os XMLs ainda não vistos dos ZIPs são acrescentados à base local do
+empregador (--empresa-cnpj) no ano e os informes saem da base inteira; a cada mês
+basta passar os ZIPs novos (ou nenhum, para só regerar).
+
+Com --por-empregador, ZIPs de várias empresas podem ir juntos: os dados são separados
+pela inscrição do empregador dos eventos e cada empresa recebe o seu ZIP
+(Informes_<inscrição>_<ano>.zip, com os PDFs e o Excel), usando o próprio S-1010. O
+nome e o CNPJ completo de cada empresa, que vão no campo da fonte pagadora, vêm de
+--empregadores, um JSON {inscrição: {"nome": ..., "cnpj": ...}}.
+
+O arquivo de rubricas é um JSON {categoria: [códigos]} com as categorias
+v_bruto, v_13_bruto, v_inss, v_13_inss, v_irrf e v_13_irrf. Sem ele (ou para as
+categorias que ele não traz), vale a classificação confirmada no app para o empregador
+(esocial.mapeamentos) e, para rubricas novas, a do S-1010."""
+import argparse
+import json
+import sys
+
+from esocial.calculo import CATEGORIAS
+from esocial.cache import CacheLeitura
+from esocial.motor import (
+    Acervo, AcervoIncompativel, Diagnostico, EmpregadorIncompleto, Mapeamentos, gerar_informes, gerar_informes_por_empregador,
+)
+
+def _ler_rubricas(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        rubricas = json.load(f)
+    invalidas = set(rubricas) - set(CATEGORIAS)
+    if invalidas:
+        raise SystemExit(f"Categorias inválidas em {caminho}: {', '.join(sorted(invalidas))}")
+    return {categoria: [str(cod) for cod in codigos] for categoria, codigos in rubricas.items()}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m esocial', description="Gera informes de rendimentos a partir de ZIPs do eSocial.")
+    parser.add_argument('zips', nargs='*', help="ZIPs com os XMLs do eSocial")
+    parser.add_argument('--ano', type=int, required=True, help="ano-calendário")
+    parser.add_argument('--saida', required=True, help="diretório de saída")
+    parser.add_argument('--empresa-nome')
+    parser.add_argument('--empresa-cnpj', help="CNPJ do informe; com --acervo, identifica a base local")
+    parser.add_argument('--por-empregador', action='store_true', help="separa os dados pela inscrição do empregador e gera um ZIP por empresa")
+    parser.add_argument('--empregadores', metavar='ARQUIVO', help='JSON {inscrição: {"nome": ..., "cnpj": ...}} das empresas (obrigatório com --por-empregador)')
+    parser.add_argument('--rubricas', help="JSON {categoria: [rubricas]}; sem ele usa a classificação do S-1010")
+    parser.add_argument('--processos', type=int, default=None, help="processos paralelos (padrão: todos os núcleos)")
+    parser.add_argument('--acervo', action='store_true', help="acumula os ZIPs na base local do empregador e ano e gera os informes a partir dela")
+    parser.add_argument('--sem-cache', action='store_true', help="não usar o cache de ZIPs já lidos")
+    parser.add_argument('--limite-memoria', type=int, default=64, metavar='MB', help="memória total para ZIPs dentro de ZIPs; os que não couberem são extraídos para o disco (padrão: 64)")
+    parser.add_argument('--partes', type=int, default=None, metavar='MB', help="divide o ZIP de PDFs em partes de até este tamanho")
+    parser.add_argument('--sem-pdf', action='store_true')
+    parser.add_argument('--sem-excel', action='store_true')
+    parser.add_argument('--excel-detalhado', action='store_true', help="inclui no Excel o detalhe por competência, a auditoria e o resumo de rubricas")
+    parser.add_argument('--diagnostico', metavar='ARQUIVO', help="grava em JSON os tempos por etapa, eventos por tipo/ZIP e falhas de leitura")
+    parser.add_argument('--medir-memoria', action='store_true', help="inclui no diagnóstico o pico de memória de cada etapa (mais lento)")
+    args = parser.parse_args(argv)
+    if not args.zips and not args.acervo:
+        parser.error("informe ao menos um ZIP (ou use --acervo para gerar a partir da base local)")
+    if not args.por_empregador and not (args.empresa_nome and args.empresa_cnpj):
+        parser.error("--empresa-nome e --empresa-cnpj são obrigatórios (exceto com --por-empregador)")
+    if args.acervo and not args.empresa_cnpj:
+        parser.error("--acervo exige --empresa-cnpj")
+    if args.por_empregador and not args.empregadores:
+        parser.error("--por-empregador exige --empregadores com o nome e o CNPJ de cada empresa")
+    if args.partes and args.por_empregador:
+        parser.error("--partes não se aplica a --por-empregador (um ZIP por empresa)")
+
+    diagnostico = Diagnostico(memoria=args.medir_memoria)
+    try:
+        acervo = Acervo(args.empresa_cnpj, args.ano) if args.acervo else None
+    except ValueError as e:
+        parser.error(str(e))
+    opcoes = dict(
+        rubricas=_ler_rubricas(args.rubricas) if args.rubricas else None,
+        workers=args.processos, cache=None if args.sem_cache else CacheLeitura(),
+        pdf=not args.sem_pdf, excel=not args.sem_excel, excel_detalhado=args.excel_detalhado, diagnostico=diagnostico,
+        limite_memoria=args.limite_memoria * 1024 * 1024, acervo=acervo, mapeamentos=Mapeamentos())
+    try:
+        if args.por_empregador:
+            with open(args.empregadores, encoding='utf-8') as f: empregadores = json.load(f)
+            resumo = gerar_informes_por_empregador(args.zips, args.ano, args.saida, empregadores, **opcoes)
+        else:
+            resumo = gerar_informes(args.zips, args.ano, args.saida, args.empresa_nome, args.empresa_cnpj,
+                                    tamanho_parte=args.partes * 1024 * 1024 if args.partes else None, **opcoes)
+    except (AcervoIncompativel, EmpregadorIncompleto) as e:
+        raise SystemExit(str(e))
+    if args.diagnostico: diagnostico.salvar_json(args.diagnostico)
+
+    if resumo['acervo'] is not None:
+        print(f"Base local {acervo.diretorio}: {resumo['acervo']['novos']} XMLs novos, "
+              f"{resumo['acervo']['repetidos']} já estavam na base, {resumo['acervo']['falhas']} com falha "
+              f"(relidos no próximo envio), {resumo['acervo']['descartados']} eventos de outro empregador ou ano descartados.",
+              file=sys.stderr)
+    por_empresa = resumo['empregadores'] if args.por_empregador else {None: resumo}
+    for empregador, r in por_empresa.items():
+        prefixo = f"[{empregador}] " if empregador is not None else ""
+        if not r['rubricas']['v_bruto']:
+            print(f"{prefixo}Atenção: nenhuma rubrica de Salário Tributável mapeada.", file=sys.stderr)
+        print(f"{prefixo}{r['funcionarios']} informes | sem S-1200: {len(r['alertas_sem_rubrica'])} | "
+              f"meses faltantes: {len(r['alertas_meses_faltantes'])} | "
+              f"competências sem S-1210: {len(r['pendencias_pagamento'])}", file=sys.stderr)
+    descartes = {motivo: diagnostico.total_descartados(motivo) for motivo in ('duplicado', 'retificado', 'excluido')}
+    if any(descartes.values()):
+        print(f"Eventos descartados: {descartes['duplicado']} duplicados | {descartes['retificado']} substituídos por retificação | "
+              f"{descartes['excluido']} excluídos (S-3000)", file=sys.stderr)
+    if diagnostico.total_falhas:
+        print(f"Atenção: {diagnostico.total_falhas} XMLs não puderam ser lidos (detalhes com --diagnostico).", file=sys.stderr)
+    for caminho in resumo['arquivos']: print(caminho)
+    return 0
@@ -0,0 +1,108 @@
+"""Instrumentação do processamento: tempo e memória por etapa, contagem de eventos
+por tipo e por ZIP e os documentos ignorados ou com falha (arquivo e motivo)."""
+import json
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Falhas guardadas por diagnóstico; as demais só entram na contagem
+LIMITE_FALHAS = 1000
+
+# Etapas medidas dentro dos processos de leitura (somadas entre os processos):
+# descompressão dos membros, classificação + extração do XML (passada única) e
+# acúmulo nos buffers colunares
+ETAPAS_LEITURA = ('descompactar', 'ler_xml', 'acumular')
+
+def novo_registro():
+    """Registro de um lote de leitura: dicionário simples, devolvido pelos processos do pool."""
+    return {'tempos': dict.fromkeys(ETAPAS_LEITURA, 0.0), 'eventos': {}, 'falhas': [], 'membros': 0}
+
+def _rss_max_mb():
+    if resource is None: return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+class Diagnostico:
+    """Coleta as medições de uma execução.
+
+    memoria: rastreia o pico de memória alocada em cada etapa com tracemalloc (mais
+    lento); sem ele registra apenas o pico de RSS do processo ao fim de cada etapa."""
+    def __init__(self, memoria=False):
+        self.memoria = memoria
+        self.etapas = {}
+        self.leitura = dict.fromkeys(ETAPAS_LEITURA, 0.0)
+        self.eventos = Counter()
+        self.por_zip = {}
+        self.falhas = []
+        self.total_falhas = 0
+        self.deduplicacao = {}
+
+    @contextmanager
+    def etapa(self, nome):
+        rastreando = self.memoria and not tracemalloc.is_tracing()
+        if rastreando: tracemalloc.start()
+        elif self.memoria: tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro = self.etapas.setdefault(nome, {'segundos': 0.0, 'chamadas': 0, 'pico_mb': None, 'rss_max_mb': None})
+            registro['segundos'] += time.perf_counter() - inicio
+            registro['chamadas'] += 1
+            if self.memoria:
+                pico = tracemalloc.get_traced_memory()[1] / 2**20
+                registro['pico_mb'] = round(max(pico, registro['pico_mb'] or 0), 1)
+                if rastreando: tracemalloc.stop()
+            registro['rss_max_mb'] = _rss_max_mb()
+
+    def incorporar_etapas(self, etapas):
+        """Soma as etapas medidas em outro processo (o `etapas` de outro Diagnostico)."""
+        for nome, outro in etapas.items():
+            registro = self.etapas.setdefault(nome, {'segundos': 0.0, 'chamadas': 0, 'pico_mb': None, 'rss_max_mb': None})
+            registro['segundos'] += outro['segundos']
+            registro['chamadas'] += outro['chamadas']
+            for campo in ('pico_mb', 'rss_max_mb'):
+                if outro[campo] is not None: registro[campo] = max(outro[campo], registro[campo] or 0)
+
+    def zip(self, nome, membros=0, cache=False):
+        return self.por_zip.setdefault(nome, {'membros': membros, 'cache': cache, 'eventos': Counter(), 'falhas': 0})
+
+    def registrar_lote(self, nome_zip, registro):
+        """Soma o registro de um lote (ver novo_registro) ao ZIP de origem."""
+        for etapa, segundos in registro['tempos'].items(): self.leitura[etapa] += segundos
+        self.eventos.update(registro['eventos'])
+        por_zip = self.zip(nome_zip)
+        por_zip['eventos'].update(registro['eventos'])
+        por_zip['falhas'] += len(registro['falhas'])
+        self.total_falhas += len(registro['falhas'])
+        espaco = LIMITE_FALHAS - len(self.falhas)
+        self.falhas.extend({'zip': nome_zip, 'arquivo': arquivo, 'motivo': motivo} for arquivo, motivo in registro['falhas'][:espaco])
+
+    def para_dict(self):
+        return {
+            'etapas': {nome: dict(r, segundos=round(r['segundos'], 4)) for nome, r in self.etapas.items()},
+            'leitura_por_etapa': {nome: round(s, 4) for nome, s in self.leitura.items()},
+            'eventos': dict(self.eventos),
+            'zips': {nome: dict(z, eventos=dict(z['eventos'])) for nome, z in self.por_zip.items()},
+            'deduplicacao': self.deduplicacao,
+            'total_falhas': self.total_falhas,
+            'falhas': self.falhas,
+        }
+
+    def total_descartados(self, motivo):
+        return sum(self.deduplicacao.get(motivo, {}).values())
+
+    def salvar_json(self, destino):
+        """Grava o diagnóstico em JSON num caminho ou objeto de arquivo texto."""
+        if hasattr(destino, 'write'):
+            json.dump(self.para_dict(), destino, ensure_ascii=False, indent=2)
+            return
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(self.para_dict(), f, ensure_ascii=False, indent=2)
@@ -0,0 +1,353 @@
+"""Classificação e extração dos eventos do eSocial (apenas biblioteca padrão,
+para que os processos do pool de leitura iniciem rápido)."""
+import zipfile
+import zlib
+import xml.etree.ElementTree as ET
+from array import array
+from time import perf_counter
+
+from esocial.diagnostico import novo_registro
+
+# Versão do formato extraído pelos leitores; incrementar ao mudar o que é lido
+# (invalida o cache de ZIPs já processados).
+VERSAO_LEITOR = 7
+
+# Leitura em passada única: o iterparse identifica a tag raiz do evento (evt*)
+# logo no início e despacha o restante do documento para um leitor específico,
+# que recolhe apenas os campos necessários e libera os elementos já lidos.
+
+class EventoInvalido(ValueError):
+    """XML malformado."""
+
+def _tag_local(tag):
+    return tag.rpartition('}')[2]
+
+def _percorrer(contexto, tag_evento):
+    """Consome o iterparse até o fim do elemento do evento, devolvendo (tag, pilha, texto)
+    a cada elemento fechado. A pilha contém as tags locais dos ancestrais."""
+    pilha = [tag_evento]
+    for acao, el in contexto:
+        if acao == 'start':
+            pilha.append(_tag_local(el.tag))
+            continue
+        tag = pilha.pop()
+        texto = el.text
+        el.clear()
+        if not pilha: return
+        yield tag, pilha, texto
+
+def _empregador(elementos, ide):
+    """Repassa os elementos ao leitor do evento, guardando em ide['nrInsc'] a inscrição
+    do empregador (ideEmpregador), presente em todos os eventos lidos."""
+    for tag, pilha, texto in elementos:
+        if tag == 'nrInsc' and pilha[-1] == 'ideEmpregador': ide.setdefault('nrInsc', texto)
+        yield tag, pilha, texto
+
+def _ler_s1010(elementos):
+    cod = tp = incCP = incIRRF = None
+    validade = {'iniValid': None, 'fimValid': None}
+    nova_validade = {}
+    tem_dados = excluido = False
+    for tag, pilha, texto in elementos:
+        if 'exclusao' in pilha: excluido = True
+        if pilha[-1] == 'ideRubrica':
+            if tag == 'codRubr' and cod is None: cod = texto
+            elif tag in validade: validade[tag] = texto
+        elif pilha[-1] == 'novaValidade' and tag in validade: nova_validade[tag] = texto
+        elif pilha[-1] == 'dadosRubrica' and ('inclusao' in pilha or 'alteracao' in pilha):
+            tem_dados = True
+            if tag == 'tpRubr': tp = texto
+            elif tag == 'codIncCP': incCP = texto
+            elif tag == 'codIncIRRF': incIRRF = texto
+    if cod is None or not (tem_dados or excluido): return None
+    # a exclusão só identifica o período (codRubr + iniValid), que deixa de valer
+    # a alteração identifica o período pelo iniValid original e pode trazer um novo período
+    periodo = {'iniValid': validade['iniValid'] or "", 'fimValid': validade['fimValid'] or ""}
+    if nova_validade: periodo = {'iniValid': nova_validade.get('iniValid') or "", 'fimValid': nova_validade.get('fimValid') or ""}
+    return {'cod': cod, 'tp': tp or "", 'incCP': incCP or "", 'incIRRF': incIRRF or "", 'excluido': excluido,
+            'chave': f"{cod}|{validade['iniValid'] or ''}", **periodo}
+
+def _ler_vinculo(elementos):
+    # S-2200/S-2300: início do vínculo; o próprio evento pode trazer desligamento/término
+    dados = {'cpf': None, 'nome': None, 'dt_inicio': None, 'dt_fim': None}
+    for tag, pilha, texto in elementos:
+        if tag == 'cpfTrab' and dados['cpf'] is None: dados['cpf'] = texto
+        elif tag == 'nmTrab' and dados['nome'] is None: dados['nome'] = texto
+        elif tag in ('dtAdm', 'dtInicio') and dados['dt_inicio'] is None: dados['dt_inicio'] = texto
+        elif tag in ('dtDeslig', 'dtTerm') and dados['dt_fim'] is None: dados['dt_fim'] = texto
+    return dados if dados['cpf'] else None
+
+def _ler_desligamento(elementos):
+    # S-2299/S-2399
+    dados = {'cpf': None, 'nome': None, 'dt_inicio': None, 'dt_fim': None}
+    for tag, pilha, texto in elementos:
+        if tag == 'cpfTrab' and dados['cpf'] is None: dados['cpf'] = texto
+        elif tag in ('dtDeslig', 'dtTerm') and dados['dt_fim'] is None: dados['dt_fim'] = texto
+    return dados if dados['cpf'] else None
+
+def _ler_s1200(elementos):
+    cpf = per_apur = cnpj_emp = None
+    retificacao = {}
+    itens = []
+    cod = valor = None
+    for tag, pilha, texto in elementos:
+        if tag == 'codRubr' and pilha[-1] == 'itensRemun': cod = texto
+        elif tag == 'vrRubr' and pilha[-1] == 'itensRemun': valor = texto
+        elif tag == 'itensRemun':
+            if 'dmDev' in pilha: itens.append((cod, float(valor)))
+            cod = valor = None
+        elif tag == 'cpfTrab' and cpf is None: cpf = texto
+        elif tag == 'perApur' and per_apur is None: per_apur = texto
+        elif tag == 'nrInsc' and cnpj_emp is None and pilha[-1] == 'ideEmpregador': cnpj_emp = texto
+        elif tag in ('indRetif', 'nrRecibo') and pilha[-1] == 'ideEvento': retificacao[tag] = texto
+    if cpf is None or per_apur is None or cnpj_emp is None: return None
+    return {'cpf': cpf, 'per_apur': per_apur, 'cnpj_emp': cnpj_emp, 'itens': itens,
+            'ind_retif': retificacao.get('indRetif'), 'recibo_retificado': retificacao.get('nrRecibo')}
+
+def _ler_s1210(elementos):
+    cpf = None
+    ide_evento = {}
+    pagamentos = []
+    planos = []
+    per_ref = None
+    plano = {}
+    for tag, pilha, texto in elementos:
+        pai = pilha[-1]
+        if tag == 'cpfBenef' and pai == 'ideBenef': cpf = texto
+        elif pai == 'ideEvento' and tag in ('indRetif', 'nrRecibo', 'perApur'): ide_evento[tag] = texto
+        elif tag == 'perRef' and pai == 'infoPgto': per_ref = texto
+        elif tag == 'infoPgto':
+            pagamentos.append(per_ref)
+            per_ref = None
+        elif pai == 'planSaude' and tag in ('cnpjOper', 'regANS', 'vlrSaudeTit'): plano[tag] = texto
+        elif tag == 'planSaude':
+            planos.append((plano['cnpjOper'], plano['regANS'], float(plano['vlrSaudeTit'])))
+            plano = {}
+    if cpf is None or None in pagamentos: return None
+    return {'cpf': cpf, 'pagamentos': pagamentos, 'planos': planos, 'per_apur': ide_evento.get('perApur'),
+            'ind_retif': ide_evento.get('indRetif'), 'recibo_retificado': ide_evento.get('nrRecibo')}
+
+def _ler_s3000(elementos):
+    # Exclusão: tipo e recibo do evento excluído, CPF e período (eventos periódicos)
+    dados = {'tp_evento': None, 'recibo': None, 'cpf': None, 'per_apur': None}
+    for tag, pilha, texto in elementos:
+        pai = pilha[-1]
+        if pai == 'infoExclusao' and tag == 'tpEvento': dados['tp_evento'] = texto
+        elif pai == 'infoExclusao' and tag == 'nrRecEvt': dados['recibo'] = texto
+        elif pai == 'ideTrabalhador' and tag == 'cpfTrab': dados['cpf'] = texto
+        elif pai == 'ideFolhaPagto' and tag == 'perApur': dados['per_apur'] = texto
+    return dados if dados['tp_evento'] and (dados['recibo'] or dados['cpf']) else None
+
+LEITORES_EVENTO = {
+    'evtTabRubrica': ('S-1010', _ler_s1010),
+    'evtAdmissao': ('S-2200', _ler_vinculo),
+    'evtTSVInicio': ('S-2200', _ler_vinculo),
+    'evtDeslig': ('S-2299', _ler_desligamento),
+    'evtTSVTermino': ('S-2299', _ler_desligamento),
+    'evtRemun': ('S-1200', _ler_s1200),
+    'evtPgtos': ('S-1210', _ler_s1210),
+    'evtExclusao': ('S-3000', _ler_s3000),
+}
+
+def _e_evento(tag):
+    # evtRemun, evtPgtos...; exclui invólucros como o <evt> dos arquivos de download
+    return tag.startswith('evt') and tag[3:4].isupper()
+
+def ler_eventos(fonte):
+    """Classifica e extrai os eventos de um XML do eSocial numa única passada, em fluxo.
+    O XML pode trazer um evento ou um lote deles (arquivos de lote/download).
+
+    Produz (tipo, dados) por evento, com o atributo Id do evento em dados['id'] e a
+    inscrição do empregador em dados['cnpj_emp'] ('' se ausente).
+    Eventos não utilizados produzem (None, tag); eventos sem os campos obrigatórios
+    produzem ('falha', motivo); um XML sem evento produz (None, None). O recibo de
+    processamento que acompanha o evento nos arquivos de download produz
+    ('recibo', nrRecibo). Levanta EventoInvalido para XML malformado."""
+    # Os ancestores abertos são esvaziados à medida que os filhos terminam, para que
+    # a memória não cresça com o número de eventos do lote.
+    abertos = []
+    encontrou = False
+    try:
+        contexto = ET.iterparse(fonte, events=('start', 'end'))
+        for acao, el in contexto:
+            if acao == 'end':
+                abertos.pop()
+                if abertos and el.text and _tag_local(el.tag) == 'nrRecibo' and _tag_local(abertos[-1].tag) == 'recibo':
+                    yield 'recibo', el.text
+                el.clear()
+                if abertos: abertos[-1].clear()
+                continue
+            tag = _tag_local(el.tag)
+            if not _e_evento(tag):
+                abertos.append(el)
+                continue
+            encontrou = True
+            id_evento = el.get('Id')
+            elementos = _percorrer(contexto, tag)
+            if tag not in LEITORES_EVENTO:
+                evento = None, tag
+            else:
+                tipo, leitor = LEITORES_EVENTO[tag]
+                ide = {}
+                try:
+                    dados = leitor(_empregador(elementos, ide))
+                    if dados is not None:
+                        dados['id'] = id_evento
+                        dados['cnpj_emp'] = dados.get('cnpj_emp') or ide.get('nrInsc') or ''
+                    evento = (tipo, dados) if dados is not None else ('falha', f"{tag}: campos obrigatórios ausentes")
+                except (KeyError, TypeError, ValueError) as e:
+                    evento = 'falha', f"{tag}: {type(e).__name__}: {e}"
+            for _ in elementos: pass  # consome o restante do evento
+            if abertos: abertos[-1].clear()
+            yield evento
+    except ET.ParseError as e: raise EventoInvalido(f"XML inválido: {e}") from e
+    if not encontrou: yield None, None
+
+# --- RESULTADOS PARCIAIS ---
+# As linhas de S-1200/S-1210 são guardadas em buffers colunares: valores em
+# array('d') e textos repetidos (CPF, competência, rubrica, CNPJ) internados
+# como códigos inteiros, que viram colunas categóricas no DataFrame final.
+
+ESQUEMA_S1200 = (('CPF', 'cat'), ('Competencia', 'cat'), ('Rubrica', 'cat'), ('Valor', 'num'), ('CNPJ_Emp', 'cat'))
+ESQUEMA_S1210 = (('CPF', 'cat'), ('Competencia_Paga', 'cat'), ('Tipo', 'cat'), ('CNPJ', 'cat'), ('ANS', 'cat'), ('Valor', 'num'),
+                 ('CNPJ_Emp', 'cat'))
+
+# Um registro por S-1200/S-1210 lido, na mesma ordem das linhas: 'Linhas' é quantas
+# linhas o evento ocupa na tabela do seu tipo. Com as exclusões (S-3000), alimenta o
+# índice de retificação (esocial.retificacao) que decide quais eventos valem.
+ESQUEMA_EVENTOS = (('Tipo', 'cat'), ('Id', 'cat'), ('Recibo', 'cat'), ('IndRetif', 'cat'), ('Recibo_Retificado', 'cat'),
+                   ('CNPJ_Emp', 'cat'), ('CPF', 'cat'), ('Competencia', 'cat'), ('Linhas', 'num'))
+ESQUEMA_EXCLUSOES = (('Tipo', 'cat'), ('Id', 'cat'), ('Recibo', 'cat'), ('CNPJ_Emp', 'cat'), ('CPF', 'cat'), ('Competencia', 'cat'))
+
+# Os mapas (S-1010, nomes, datas de início e término) são separados por empregador:
+# {inscrição do empregador: {chave: valor}}. A chave é o CPF ou, no S-1010,
+# "<codRubr>|<iniValid>": cada período de validade de uma rubrica é uma entrada. Uma
+# exclusão do S-1010 grava na chave do período um registro com 'excluido' verdadeiro,
+# que substitui a inclusão lida antes dela.
+MAPAS = ('s1010', 'nomes', 'admissao', 'demissao')
+
+class Colunas:
+    """Buffers colunares de uma tabela. Colunas 'cat' guardam códigos em array('i')
+    e o domínio valor -> código (na ordem de inserção); None vira o código -1.
+    Colunas 'num' guardam float em array('d'); None vira NaN."""
+    def __init__(self, esquema):
+        self.esquema = esquema
+        self.codigos = {nome: array('i') for nome, tipo in esquema if tipo == 'cat'}
+        self.dominios = {nome: {} for nome, tipo in esquema if tipo == 'cat'}
+        self.numeros = {nome: array('d') for nome, tipo in esquema if tipo == 'num'}
+
+    def __len__(self):
+        nome = self.esquema[0][0]
+        return len(self.codigos[nome]) if nome in self.codigos else len(self.numeros[nome])
+
+    def codigo(self, nome, valor):
+        if valor is None: return -1
+        dominio = self.dominios[nome]
+        cod = dominio.get(valor)
+        if cod is None: cod = dominio[valor] = len(dominio)
+        return cod
+
+    def adicionar(self, *valores):
+        for (nome, tipo), valor in zip(self.esquema, valores):
+            if tipo == 'cat': self.codigos[nome].append(self.codigo(nome, valor))
+            else: self.numeros[nome].append(float('nan') if valor is None else valor)
+
+def novo_parcial():
+    return {'s1200': Colunas(ESQUEMA_S1200), 's1210': Colunas(ESQUEMA_S1210), 'eventos': Colunas(ESQUEMA_EVENTOS),
+            'exclusoes': Colunas(ESQUEMA_EXCLUSOES), 's1010': {}, 'nomes': {}, 'admissao': {}, 'demissao': {}}
+
+def _acumular(parcial, tipo, dados):
+    empregador = dados['cnpj_emp']
+    # 0. S-1010 (TABELA DE RUBRICAS) - A MÁGICA ACONTECE AQUI
+    if tipo == 'S-1010':
+        parcial['s1010'].setdefault(empregador, {})[dados['chave']] = {
+            chave: dados[chave] for chave in ('cod', 'tp', 'incCP', 'incIRRF', 'iniValid', 'fimValid', 'excluido')}
+
+    # 1/2. ADMISSÃO/INÍCIO (S-2200 ou S-2300) E DESLIGAMENTO/TÉRMINO (S-2299 ou S-2399)
+    elif tipo in ('S-2200', 'S-2299'):
+        cpf = dados['cpf']
+        if dados['nome']: parcial['nomes'].setdefault(empregador, {})[cpf] = dados['nome']
+        if dados['dt_inicio']: parcial['admissao'].setdefault(empregador, {})[cpf] = dados['dt_inicio']
+        if dados['dt_fim']: parcial['demissao'].setdefault(empregador, {})[cpf] = dados['dt_fim']
+
+    # 3. S-1200
+    elif tipo == 'S-1200':
+        col = parcial['s1200']
+        c_cpf, c_per, c_cnpj = col.codigo('CPF', dados['cpf']), col.codigo('Competencia', dados['per_apur']), col.codigo('CNPJ_Emp', dados['cnpj_emp'])
+        for cod, valor in dados['itens']:
+            col.codigos['CPF'].append(c_cpf)
+            col.codigos['Competencia'].append(c_per)
+            col.codigos['Rubrica'].append(col.codigo('Rubrica', cod))
+            col.numeros['Valor'].append(valor)
+            col.codigos['CNPJ_Emp'].append(c_cnpj)
+        parcial['eventos'].adicionar(tipo, dados['id'], None, dados['ind_retif'], dados['recibo_retificado'],
+                                     empregador, dados['cpf'], dados['per_apur'], len(dados['itens']))
+
+    # 4. S-1210
+    elif tipo == 'S-1210':
+        cpf = dados['cpf']
+        for per_ref in dados['pagamentos']:
+            parcial['s1210'].adicionar(cpf, per_ref, 'Pagamento_Check', None, None, None, empregador)
+        for cnpj, ans, valor in dados['planos']:
+            parcial['s1210'].adicionar(cpf, None, 'Saude', cnpj, ans, valor, empregador)
+        parcial['eventos'].adicionar(tipo, dados['id'], None, dados['ind_retif'], dados['recibo_retificado'],
+                                     empregador, cpf, dados['per_apur'], len(dados['pagamentos']) + len(dados['planos']))
+
+    # 5. S-3000 (exclusão de eventos)
+    elif tipo == 'S-3000':
+        parcial['exclusoes'].adicionar(dados['tp_evento'], dados['id'], dados['recibo'], empregador, dados['cpf'], dados['per_apur'])
+
+class _LeituraCronometrada:
+    """Envolve o membro do ZIP somando o tempo gasto em read() (descompressão)."""
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+        self.segundos = 0.0
+
+    def read(self, n=-1):
+        inicio = perf_counter()
+        bloco = self.arquivo.read(n)
+        self.segundos += perf_counter() - inicio
+        return bloco
+
+def processar_lote(fonte, nomes):
+    """Executado nos processos do pool: lê um lote de membros de um ZIP.
+    O parcial traz em 'diagnostico' os tempos, a contagem por tipo e as falhas do lote."""
+    parcial = novo_parcial()
+    registro = parcial['diagnostico'] = novo_registro()
+    tempos, eventos, falhas = registro['tempos'], registro['eventos'], registro['falhas']
+    with zipfile.ZipFile(fonte, "r") as z:
+        for filename in nomes:
+            inicio = perf_counter()
+            stream = None
+            acumular = 0.0
+            try:
+                with z.open(filename) as f:
+                    stream = _LeituraCronometrada(f)
+                    periodico = False  # o último evento do XML foi um S-1200/S-1210
+                    for tipo, dados in ler_eventos(stream):
+                        if tipo == 'recibo':
+                            # recibo de processamento do evento que o precede no arquivo
+                            if periodico:
+                                col = parcial['eventos']
+                                col.codigos['Recibo'][-1] = col.codigo('Recibo', dados)
+                                periodico = False
+                            continue
+                        periodico = tipo in ('S-1200', 'S-1210')
+                        if tipo is None:
+                            tipo = f"ignorado:{dados}" if dados else 'sem_evento'
+                        elif tipo == 'falha':
+                            falhas.append((filename, dados))
+                        else:
+                            lido = perf_counter()
+                            _acumular(parcial, tipo, dados)
+                            acumular += perf_counter() - lido
+                        eventos[tipo] = eventos.get(tipo, 0) + 1
+            except (EventoInvalido, zipfile.BadZipFile, zlib.error, OSError, EOFError) as e:
+                falhas.append((filename, str(e) if isinstance(e, EventoInvalido) else f"{type(e).__name__}: {e}"))
+                eventos['falha'] = eventos.get('falha', 0) + 1
+            descompactar = stream.segundos if stream else 0.0
+            tempos['descompactar'] += descompactar
+            tempos['acumular'] += acumular
+            tempos['ler_xml'] += perf_counter() - inicio - descompactar - acumular
+    registro['membros'] = len(nomes)
+    return parcial
@@ -0,0 +1,91 @@
+"""Relatório de conferência em Excel.
+
+Gravado com o xlsxwriter em modo de memória constante: cada linha vai para o
+arquivo temporário da planilha assim que é escrita, então o relatório não é
+montado inteiro em memória (nem como DataFrame, nem como lista)."""
+import math
+
+import pandas as pd
+import xlsxwriter
+
+from esocial.calculo import CATEGORIAS
+
+ROTULOS = {
+    'v_bruto': "Rend. Tributáveis", 'v_inss': "INSS Oficial", 'v_irrf': "IRRF", 'v_13_liq': "13º Líquido",
+    'v_13_bruto': "13º Bruto", 'v_13_inss': "INSS 13º", 'v_13_irrf': "IRRF 13º",
+}
+COLUNAS_CONFERENCIA = ('v_bruto', 'v_inss', 'v_irrf', 'v_13_liq', 'v_13_bruto', 'v_13_inss', 'v_13_irrf')
+
+# O Excel aceita 1.048.576 linhas por planilha; tabelas maiores continuam em "Nome (2)", "Nome (3)"...
+LINHAS_POR_PLANILHA = 1_048_575
+TAMANHO_BLOCO_EXCEL = 10_000
+FORMATO_VALOR = '#,##0.00'
+
+def _planilha(wb, nome, cabecalho, formatos):
+    ws = wb.add_worksheet(nome)
+    negrito = formatos['cabecalho']
+    for col, titulo in enumerate(cabecalho):
+        ws.write_string(0, col, titulo, negrito)
+    ws.freeze_panes(1, 0)
+    return ws
+
+def _escrever_conferencia(wb, dados, formatos):
+    cabecalho = ["CPF", "Nome", *(ROTULOS[chave] for chave in COLUNAS_CONFERENCIA), "Info Saúde"]
+    ws = _planilha(wb, 'Conferência', cabecalho, formatos)
+    ws.set_column(0, 0, 14)
+    ws.set_column(1, 1, 40)
+    ws.set_column(2, 1 + len(COLUNAS_CONFERENCIA), 16, formatos['valor'])
+    ws.set_column(2 + len(COLUNAS_CONFERENCIA), 2 + len(COLUNAS_CONFERENCIA), 80)
+    for linha, item in enumerate(dados, start=1):
+        c = item['calculados']
+        ws.write_string(linha, 0, item['cpf'])
+        ws.write_string(linha, 1, item['nome'])
+        for col, chave in enumerate(COLUNAS_CONFERENCIA, start=2):
+            ws.write_number(linha, col, c[chave])
+        ws.write_string(linha, 2 + len(COLUNAS_CONFERENCIA), c['txt_saude'].replace('\n', ' | '))
+
+def _escrever_tabela(wb, nome, colunas, formatos, valores=()):
+    """Escreve {título: Series} em blocos, dividindo em várias planilhas se passar do limite
+    do Excel. Colunas numéricas viram células numéricas; as de `valores` recebem o formato
+    de moeda. NaN/None ficam em branco."""
+    titulos, series = list(colunas), list(colunas.values())
+    e_numerica = [t in valores or pd.api.types.is_numeric_dtype(s) for t, s in colunas.items()]
+    total = len(series[0]) if series else 0
+    for parte, inicio in enumerate(range(0, max(total, 1), LINHAS_POR_PLANILHA), start=1):
+        ws = _planilha(wb, nome if parte == 1 else f"{nome} ({parte})", [str(t) for t in titulos], formatos)
+        for col, titulo in enumerate(titulos):
+            ws.set_column(col, col, 16, formatos['valor'] if titulo in valores else None)
+        fim = min(inicio + LINHAS_POR_PLANILHA, total)
+        linha = 1
+        for b in range(inicio, fim, TAMANHO_BLOCO_EXCEL):
+            for registro in zip(*(s.iloc[b:min(b + TAMANHO_BLOCO_EXCEL, fim)].tolist() for s in series)):
+                for col, valor in enumerate(registro):
+                    if valor is None or (isinstance(valor, float) and math.isnan(valor)): continue
+                    if e_numerica[col] and isinstance(valor, (int, float)): ws.write_number(linha, col, valor)
+                    else: ws.write_string(linha, col, str(valor))
+                linha += 1
+
+def gerar_excel(dados, destino, detalhe=None, auditoria=None, resumo=None):
+    """Grava em `destino` (caminho ou arquivo) a planilha de conferência dos itens de calcular_todos_funcionarios.
+
+    Planilhas opcionais:
+    detalhe: DataFrame de detalhe_por_competencia (CPF x competência x categoria);
+    auditoria: tupla (sem S-1200, meses faltantes, pendências S-1210) devolvida por auditar;
+    resumo: DataFrame de resumo_rubricas."""
+    wb = xlsxwriter.Workbook(destino, {'constant_memory': True})
+    formatos = {'cabecalho': wb.add_format({'bold': True}), 'valor': wb.add_format({'num_format': FORMATO_VALOR})}
+    _escrever_conferencia(wb, dados, formatos)
+
+    if detalhe is not None:
+        nomes = {item['cpf']: item['nome'] for item in dados}
+        colunas = {'CPF': detalhe['CPF'], 'Nome': detalhe['CPF'].map(nomes), 'Competência': detalhe['Competencia']}
+        colunas.update((ROTULOS[c], detalhe[c]) for c in CATEGORIAS)
+        _escrever_tabela(wb, 'Detalhe por Competência', colunas, formatos, valores=[ROTULOS[c] for c in CATEGORIAS])
+    if auditoria is not None:
+        sem_s1200, meses_faltantes, pendencias = auditoria
+        _escrever_tabela(wb, 'Sem S-1200', dict(sem_s1200.items()), formatos)
+        _escrever_tabela(wb, 'Meses Faltantes', dict(meses_faltantes.items()), formatos)
+        _escrever_tabela(wb, 'Pendências S-1210', dict(pendencias.items()), formatos, valores=['IRRF Manual (R$)'])
+    if resumo is not None:
+        _escrever_tabela(wb, 'Rubricas', dict(resumo.items()), formatos, valores=['Total'])
+    wb.close()
@@ -0,0 +1,10 @@
+"""Formatação de valores no padrão brasileiro."""
+
+def fmt(valor):
+    if isinstance(valor, str): return valor
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def fmt_inscricao(digitos):
+    """CNPJ (14 dígitos) ou CPF (11 dígitos) com a pontuação usual."""
+    if len(digitos) == 14: return f"{digitos[:2]}.{digitos[2:5]}.{digitos[5:8]}/{digitos[8:12]}-{digitos[12:]}"
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
@@ -0,0 +1,323 @@
+"""Leitura dos XMLs do eSocial contidos nos ZIPs enviados."""
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+import zlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from esocial.diagnostico import LIMITE_FALHAS, Diagnostico
+from esocial.eventos import MAPAS, Colunas, novo_parcial, processar_lote
+from esocial.retificacao import linhas_vigentes
+
+# --- INGESTÃO PARALELA ---
+# Os membros de cada ZIP são divididos em lotes processados num pool de processos.
+# Cada lote devolve um resultado parcial compacto; o processo principal mescla os
+# parciais na ordem dos lotes, o que reproduz exatamente a leitura sequencial.
+
+TAMANHO_LOTE = 256
+
+def _estender_colunas(total, parcial):
+    """Acrescenta os buffers de um parcial ao total, traduzindo os códigos internados
+    do parcial para o domínio do total."""
+    for nome, codigos in parcial.codigos.items():
+        dominio = total.dominios[nome]
+        traducao = np.fromiter((dominio.setdefault(v, len(dominio)) for v in parcial.dominios[nome]), dtype=np.int32, count=len(parcial.dominios[nome]))
+        traducao = np.append(traducao, np.int32(-1))  # o código -1 (vazio) continua -1
+        total.codigos[nome].frombytes(traducao[np.frombuffer(codigos, dtype=np.int32)].tobytes())
+    for nome, numeros in parcial.numeros.items():
+        total.numeros[nome].extend(numeros)
+
+def _para_dataframe(colunas):
+    dados = {}
+    for nome, tipo in colunas.esquema:
+        if tipo == 'cat':
+            codigos = np.frombuffer(colunas.codigos[nome], dtype=np.int32)
+            dados[nome] = pd.Categorical.from_codes(codigos, categories=list(colunas.dominios[nome]))
+        else:
+            dados[nome] = np.frombuffer(colunas.numeros[nome], dtype=np.float64)
+    return pd.DataFrame(dados, columns=[nome for nome, _ in colunas.esquema])
+
+def _de_dataframe(df, esquema):
+    """Reconstrói os buffers colunares a partir de um DataFrame (ex.: lido do cache)."""
+    colunas = Colunas(esquema)
+    for nome, tipo in esquema:
+        if tipo == 'cat':
+            cat = df[nome].astype('category')
+            colunas.codigos[nome].frombytes(cat.cat.codes.to_numpy(dtype=np.int32).tobytes())
+            colunas.dominios[nome] = {valor: i for i, valor in enumerate(cat.cat.categories)}
+        else:
+            colunas.numeros[nome].frombytes(df[nome].to_numpy(dtype=np.float64).tobytes())
+    return colunas
+
+TABELAS = ('s1200', 's1210', 'eventos', 'exclusoes')
+
+def _mesclar(total, parcial):
+    for tabela in TABELAS:
+        _estender_colunas(total[tabela], parcial[tabela])
+    for chave in MAPAS:
+        for empregador, mapa in parcial[chave].items():
+            total[chave].setdefault(empregador, {}).update(mapa)
+
+@contextmanager
+def _zip_em_disco(arquivo):
+    """Os processos do pool abrem o ZIP pelo caminho; uploads em memória são copiados para um temporário."""
+    if isinstance(arquivo, (str, os.PathLike)):
+        yield arquivo
+        return
+    if hasattr(arquivo, 'seek'): arquivo.seek(0)
+    tmp = tempfile.NamedTemporaryFile(suffix='.zip', delete=False)
+    try:
+        with tmp: shutil.copyfileobj(arquivo, tmp)
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
+
+# --- ZIPS ANINHADOS ---
+# Downloads do eSocial podem vir como ZIPs de ZIPs. O zipfile precisa de acesso
+# aleatório, então cada ZIP interno é copiado em fluxo para um temporário, que fica
+# aberto até o fim da leitura. Os ZIPs internos de uma leitura dividem um único
+# orçamento de `limite_memoria` bytes: cabem em memória enquanto houver saldo e os
+# demais vão para o disco (sempre em disco quando lidos pelo pool, que abre os ZIPs
+# pelo caminho).
+
+LIMITE_MEMORIA_PADRAO = 64 * 1024 * 1024
+PROFUNDIDADE_MAXIMA = 8
+
+class _Orcamento:
+    """Saldo de bytes em memória para os ZIPs internos abertos de uma leitura."""
+    def __init__(self, limite):
+        self.livre = limite
+
+@contextmanager
+def _zip_interno(z, info, em_disco, orcamento):
+    # file_size é o tamanho descompactado; o zipfile não lê além dele
+    em_memoria = not em_disco and info.file_size <= orcamento.livre
+    if em_memoria:
+        tmp = io.BytesIO()
+        orcamento.livre -= info.file_size
+    else:
+        tmp = tempfile.NamedTemporaryFile(suffix='.zip', delete=False) if em_disco else tempfile.TemporaryFile()
+    try:
+        with z.open(info) as origem: shutil.copyfileobj(origem, tmp)
+        if em_disco:
+            tmp.close()
+            yield tmp.name
+        else:
+            tmp.seek(0)
+            yield tmp
+    finally:
+        tmp.close()
+        if em_disco: os.remove(tmp.name)
+        if em_memoria: orcamento.livre += info.file_size
+
+def _listar_xmls(fonte, pilha, em_disco, orcamento, falhas, caminho='', profundidade=0, filtro=None):
+    """Devolve [(caminho, fonte, nomes_xml)] do ZIP e, recursivamente, dos ZIPs contidos
+    nele (caminho '' é o próprio ZIP), com os ZIPs internos abertos em `pilha` dentro do
+    `orcamento` de memória. ZIPs internos ilegíveis vão para `falhas`.
+    filtro(caminho, ZipInfo), quando dado, escolhe quais XMLs entram."""
+    with zipfile.ZipFile(fonte, "r") as z:
+        infos = z.infolist()
+        xmls = [i for i in infos if i.filename.endswith('.xml') and (filtro is None or filtro(caminho, i))]
+        encontrados = [(caminho, fonte, [i.filename for i in xmls])]
+        for info in infos:
+            if not info.filename.lower().endswith('.zip'): continue
+            if profundidade >= PROFUNDIDADE_MAXIMA:
+                falhas.append((caminho, info.filename, "ZIP aninhado além da profundidade máxima"))
+                continue
+            try:
+                interno = pilha.enter_context(_zip_interno(z, info, em_disco, orcamento))
+                encontrados += _listar_xmls(interno, pilha, em_disco, orcamento, falhas,
+                                            f"{caminho}/{info.filename}".lstrip('/'), profundidade + 1, filtro)
+            except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+                falhas.append((caminho, info.filename, f"ZIP inválido: {e}"))
+    return encontrados
+
+def _rotulo(nome_zip, caminho):
+    return f"{nome_zip}/{caminho}" if caminho else nome_zip
+
+def parcial_para_tabelas(parcial):
+    """(tabelas, mapas) de um parcial: buffers como DataFrames e mapas simples, para gravar em Parquet/JSON."""
+    tabelas = {tabela: _para_dataframe(parcial[tabela]) for tabela in TABELAS}
+    mapas = {k: parcial[k] for k in MAPAS}
+    return tabelas, mapas
+
+def parcial_das_tabelas(tabelas, mapas):
+    parcial = novo_parcial()
+    for tabela in TABELAS:
+        parcial[tabela] = _de_dataframe(tabelas[tabela], parcial[tabela].esquema)
+    parcial.update((k, mapas[k]) for k in MAPAS)
+    return parcial
+
+def _guardar_no_cache(cache, chave, parcial, resumo):
+    # resumo: {caminho: membros, eventos por tipo e falhas}, para o diagnóstico de leituras futuras
+    tabelas, mapas = parcial_para_tabelas(parcial)
+    mapas['leitura'] = {caminho: dict(r, falhas=r['falhas'][:LIMITE_FALHAS]) for caminho, r in resumo.items()}
+    cache.guardar(chave, tabelas, mapas)
+
+def _carregar_do_cache(cache, chave):
+    entrada = cache.carregar(chave)
+    if entrada is None: return None
+    tabelas, mapas = entrada
+    parcial = parcial_das_tabelas(tabelas, mapas)
+    parcial['leitura'] = mapas.get('leitura') or {}
+    return parcial
+
+def _filtrar(df, mascara):
+    """Mantém as linhas da máscara (booleana ou de posições), descartando as categorias
+    que deixaram de ser usadas."""
+    if mascara is None: return df
+    df = df.iloc[mascara].reset_index(drop=True)
+    for nome in df.select_dtypes('category'):
+        df[nome] = df[nome].cat.remove_unused_categories()
+    return df
+
+def _nome_zip(arquivo, i):
+    nome = getattr(arquivo, 'name', None) or (os.fspath(arquivo) if isinstance(arquivo, (str, os.PathLike)) else None)
+    return os.path.basename(nome) if nome else f"zip_{i + 1}"
+
+def ler_zips(fontes, nomes_zip, workers, progresso, diagnostico, limite_memoria=LIMITE_MEMORIA_PADRAO, filtro=None):
+    """Lê os ZIPs em lotes (no pool quando workers > 1) e devolve, por ZIP, (parcial, resumo),
+    com resumo = {caminho do ZIP interno: membros, eventos por tipo e falhas}.
+    nomes_zip: rótulos dos ZIPs no diagnóstico (padrão: nome de cada arquivo).
+    filtro: função (índice do ZIP em fontes, caminho, ZipInfo) -> bool opcional; membros recusados não são lidos."""
+    nomes_zip = nomes_zip or [_nome_zip(f, i) for i, f in enumerate(fontes)]
+    resumos = [{} for _ in fontes]
+    orcamento = _Orcamento(limite_memoria)
+    with ExitStack() as pilha, diagnostico.etapa('leitura'):
+        lotes = []
+        for i, arquivo in enumerate(fontes):
+            fonte = pilha.enter_context(_zip_em_disco(arquivo)) if workers > 1 else arquivo
+            falhas = []
+            for caminho, fonte_xml, nomes in _listar_xmls(fonte, pilha, workers > 1, orcamento, falhas,
+                                                          filtro=partial(filtro, i) if filtro else None):
+                resumos[i][caminho] = {'membros': len(nomes), 'eventos': Counter(), 'falhas': []}
+                diagnostico.zip(_rotulo(nomes_zip[i], caminho), membros=len(nomes))
+                lotes.extend((i, caminho, fonte_xml, nomes[k:k + TAMANHO_LOTE]) for k in range(0, len(nomes), TAMANHO_LOTE))
+            for caminho, arquivo_xml, motivo in falhas:
+                resumos[i][caminho]['falhas'].append((arquivo_xml, motivo))
+                diagnostico.registrar_lote(_rotulo(nomes_zip[i], caminho), {'tempos': {}, 'eventos': {}, 'falhas': [(arquivo_xml, motivo)]})
+
+        total_membros = sum(len(nomes) for *_, nomes in lotes)
+        parciais = [None] * len(lotes)
+        concluidos = 0
+        if workers == 1 or len(lotes) <= 1:
+            for j, (*_, fonte, nomes) in enumerate(lotes):
+                parciais[j] = processar_lote(fonte, nomes)
+                concluidos += len(nomes)
+                progresso(concluidos / total_membros)
+        else:
+            contexto_mp = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(lotes)), mp_context=contexto_mp) as pool:
+                futuros = {pool.submit(processar_lote, fonte, nomes): j for j, (*_, fonte, nomes) in enumerate(lotes)}
+                for futuro in as_completed(futuros):
+                    j = futuros[futuro]
+                    parciais[j] = futuro.result()
+                    concluidos += len(lotes[j][3])
+                    progresso(concluidos / total_membros)
+    progresso(1.0)
+
+    # Junta os lotes de cada ZIP, na ordem
+    por_zip = [None] * len(fontes)
+    with diagnostico.etapa('dataframe'):
+        for j, (i, caminho, _, _) in enumerate(lotes):
+            registro = parciais[j].pop('diagnostico')
+            diagnostico.registrar_lote(_rotulo(nomes_zip[i], caminho), registro)
+            resumos[i][caminho]['eventos'].update(registro['eventos'])
+            resumos[i][caminho]['falhas'].extend(registro['falhas'])
+            if por_zip[i] is None: por_zip[i] = parciais[j]
+            else: _mesclar(por_zip[i], parciais[j])
+            parciais[j] = None
+    return [(parcial or novo_parcial(), resumo) for parcial, resumo in zip(por_zip, resumos)]
+
+def juntar(parciais):
+    """Mescla os parciais, na ordem, no primeiro deles (ou num parcial vazio)."""
+    parciais = iter(parciais)
+    total = next(parciais, None) or novo_parcial()
+    for parcial in parciais: _mesclar(total, parcial)
+    return total
+
+def _achatar(por_empregador, *empregadores):
+    """Junta os mapas {empregador: {chave: valor}} dos empregadores dados (todos, se
+    nenhum), na ordem; o de um empregador prevalece sobre o sem inscrição ('')."""
+    mapa = {}
+    for empregador in empregadores or por_empregador:
+        mapa.update(por_empregador.get(empregador, {}))
+    return mapa
+
+def _separar_por_empregador(df_1200, df_1210, total):
+    """{inscrição do empregador: tupla de processar_arquivos} com as linhas e os mapas de cada um."""
+    grupos_1200 = df_1200.groupby('CNPJ_Emp', observed=True).indices
+    grupos_1210 = df_1210.groupby('CNPJ_Emp', observed=True).indices
+    vazio = np.array([], dtype=np.int64)
+    resultado = {}
+    for empregador in sorted(set(grupos_1200) | set(grupos_1210)):
+        mapas = (_achatar(total[k], '', empregador) for k in ('nomes', 'admissao', 'demissao', 's1010'))
+        resultado[empregador] = (_filtrar(df_1200, grupos_1200.get(empregador, vazio)),
+                                 _filtrar(df_1210, grupos_1210.get(empregador, vazio)), *mapas)
+    return resultado
+
+def montar_dataframes(total, diagnostico, por_empregador=False):
+    """Aplica retificações e exclusões ao parcial total e devolve a tupla de processar_arquivos
+    (ou, com por_empregador, um dicionário {empregador: tupla})."""
+    # Retificações e exclusões valem entre ZIPs, então o índice roda sobre o total
+    with diagnostico.etapa('deduplicacao'):
+        mascaras, diagnostico.deduplicacao = linhas_vigentes(total['eventos'], total['exclusoes'])
+    with diagnostico.etapa('dataframe'):
+        df_1200 = _filtrar(_para_dataframe(total['s1200']), mascaras['S-1200'])
+        df_1210 = _filtrar(_para_dataframe(total['s1210']), mascaras['S-1210'])
+        if por_empregador: return _separar_por_empregador(df_1200, df_1210, total)
+    return df_1200, df_1210, *(_achatar(total[k]) for k in ('nomes', 'admissao', 'demissao', 's1010'))
+
+def processar_arquivos(uploaded_files, workers=None, progresso=None, cache=None, diagnostico=None,
+                       limite_memoria=LIMITE_MEMORIA_PADRAO, por_empregador=False):
+    """Lê todos os ZIPs e devolve (df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, s1010).
+
+    workers: número de processos (padrão: todos os núcleos; 1 lê tudo no processo atual).
+    progresso: função chamada com a fração concluída (0 a 1) a cada lote terminado.
+    cache: CacheLeitura opcional; ZIPs com conteúdo já lido são carregados dele e
+    apenas os demais são processados.
+    diagnostico: Diagnostico opcional que recebe os tempos das etapas, a contagem de
+    eventos por tipo e por ZIP, os documentos que falharam e, em `deduplicacao`, os
+    eventos descartados por duplicidade, retificação ou exclusão (S-3000).
+    limite_memoria: bytes de ZIPs aninhados mantidos em memória, somados entre todos;
+    acima disso vão para o disco. Os XMLs são sempre lidos em fluxo, sem carregar o membro inteiro.
+    por_empregador: devolve {inscrição do empregador (CNPJ_Emp): tupla acima}, cada uma
+    com as linhas, o S-1010 e os cadastros daquele empregador (mapas de eventos sem
+    ideEmpregador valem para todos)."""
+    workers = workers or os.cpu_count() or 1
+    progresso = progresso or (lambda fracao: None)
+    diagnostico = diagnostico or Diagnostico()
+
+    fontes = list(uploaded_files)
+    nomes_zip = [_nome_zip(f, i) for i, f in enumerate(fontes)]
+    with diagnostico.etapa('cache'):
+        chaves = [cache.chave(f) if cache else None for f in fontes]
+        por_zip = [_carregar_do_cache(cache, c) if cache else None for c in chaves]
+    pendentes = [i for i, parcial in enumerate(por_zip) if parcial is None]
+    for i, parcial in enumerate(por_zip):
+        if parcial is None: continue
+        for caminho, r in parcial.pop('leitura').items():
+            diagnostico.zip(_rotulo(nomes_zip[i], caminho), membros=r['membros'], cache=True)
+            diagnostico.registrar_lote(_rotulo(nomes_zip[i], caminho), dict(r, tempos={}))
+
+    lidos = ler_zips([fontes[i] for i in pendentes], [nomes_zip[i] for i in pendentes],
+                     workers, progresso, diagnostico, limite_memoria)
+    for i, (parcial, _) in zip(pendentes, lidos): por_zip[i] = parcial
+    if cache:
+        with diagnostico.etapa('cache'):
+            for i, (parcial, resumo) in zip(pendentes, lidos): _guardar_no_cache(cache, chaves[i], parcial, resumo)
+    del lidos
+
+    with diagnostico.etapa('dataframe'):
+        total = juntar(por_zip)
+        del por_zip
+    return montar_dataframes(total, diagnostico, por_empregador)
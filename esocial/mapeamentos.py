@@ -0,0 +1,67 @@
+"""Mapeamentos de rubricas confirmados, guardados por empregador.
+
+Um JSON por empregador (raiz do CNPJ) com o S-1010 já visto e a última classificação
+confirmada pelo usuário. Nas próximas vezes, as rubricas que o usuário já classificou
+voltam como ele as deixou (inclusive as desmarcadas) e as novas são classificadas pelo
+S-1010 guardado mais o do envio atual, mesmo que o envio não traga a tabela."""
+import json
+import os
+import time
+
+from esocial.acervo import raiz_cnpj
+from esocial.calculo import CATEGORIAS
+from esocial.rubricas import classificar_rubricas
+
+DIRETORIO_MAPEAMENTOS = os.path.join(os.path.expanduser('~'), '.local', 'share', 'informeesocial', 'mapeamentos')
+
+class Mapeamentos:
+    def __init__(self, diretorio=DIRETORIO_MAPEAMENTOS):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, cnpj):
+        return os.path.join(self.diretorio, f"{raiz_cnpj(cnpj)}.json")
+
+    def ler(self, cnpj):
+        """{'s1010': {...}, 'rubricas': {categoria: [rubricas]}, 'conhecidas': [rubricas]} do empregador."""
+        try:
+            with open(self._caminho(cnpj), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'s1010': {}, 'rubricas': {}, 'conhecidas': []}
+
+    def _gravar(self, cnpj, registro):
+        caminho = self._caminho(cnpj)
+        with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(dict(registro, atualizado=time.time()), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(caminho + '.tmp', caminho)
+
+    def guardar_s1010(self, cnpj, s1010):
+        """Acrescenta ao registro do empregador os períodos de rubricas do S-1010 lido."""
+        if not s1010: return
+        registro = self.ler(cnpj)
+        if all(registro['s1010'].get(chave) == valor for chave, valor in s1010.items()): return
+        registro['s1010'].update(s1010)
+        self._gravar(cnpj, registro)
+
+    def confirmar(self, cnpj, rubricas, mapeamento):
+        """Guarda `mapeamento` ({categoria: [rubricas]}) como a classificação confirmada das `rubricas` exibidas."""
+        registro = self.ler(cnpj)
+        conhecidas = set(registro['conhecidas']) | set(rubricas)
+        anteriores = {categoria: set(lista) - set(rubricas) for categoria, lista in registro['rubricas'].items()}
+        registro['rubricas'] = {categoria: sorted(anteriores.get(categoria, set()) | set(mapeamento.get(categoria, [])))
+                                for categoria in CATEGORIAS}
+        registro['conhecidas'] = sorted(conhecidas)
+        self._gravar(cnpj, registro)
+
+    def pre_selecao(self, cnpj, rubricas, s1010, ano=None):
+        """Como classificar_rubricas, com o S-1010 guardado do empregador e a classificação
+        confirmada valendo para as rubricas que o usuário já viu."""
+        registro = self.ler(cnpj)
+        mapeamento = classificar_rubricas(rubricas, {**registro['s1010'], **s1010}, ano)
+        conhecidas = set(registro['conhecidas'])
+        for categoria in CATEGORIAS:
+            confirmadas = set(registro['rubricas'].get(categoria, []))
+            classificadas = set(mapeamento[categoria])
+            mapeamento[categoria] = [r for r in rubricas if r in confirmadas or (r not in conhecidas and r in classificadas)]
+        return mapeamento
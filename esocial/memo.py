@@ -0,0 +1,68 @@
+"""Memoização das etapas entre reexecuções do app.
+
+Cada interação no Streamlit reexecuta o script inteiro. As etapas caras (auditoria,
+classificação das rubricas, itens pagos do cálculo...) são guardadas por uma chave
+feita de impressões digitais das entradas; a memória das entradas é limitada e as
+menos usadas são descartadas primeiro. Os valores guardados são devolvidos sem cópia
+e não devem ser alterados por quem os recebe."""
+import hashlib
+import json
+import sys
+from collections import OrderedDict
+
+import pandas as pd
+
+LIMITE_MEMO_PADRAO = 512 * 1024 * 1024
+
+def impressao(*valores):
+    """Impressão digital (hex) de DataFrames/Series e de valores serializáveis em JSON."""
+    h = hashlib.sha1()
+    for valor in valores:
+        if isinstance(valor, (pd.DataFrame, pd.Series)):
+            colunas = list(valor.columns) if isinstance(valor, pd.DataFrame) else [valor.name]
+            h.update(repr((valor.shape, colunas)).encode())
+            h.update(pd.util.hash_pandas_object(valor, index=False).to_numpy().tobytes())
+        else:
+            h.update(json.dumps(valor, sort_keys=True, default=str, ensure_ascii=False).encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+def tamanho_aproximado(valor):
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        uso = valor.memory_usage(index=True, deep=True)
+        return int(uso.sum() if isinstance(valor, pd.DataFrame) else uso)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(k) + tamanho_aproximado(v) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set)):
+        return sys.getsizeof(valor) + sum(tamanho_aproximado(v) for v in valor)
+    return sys.getsizeof(valor)
+
+class Memo:
+    """Cache LRU de resultados limitado a `limite_bytes` (tamanho estimado das entradas)."""
+    def __init__(self, limite_bytes=LIMITE_MEMO_PADRAO):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()  # chave -> (valor, bytes)
+        self.bytes = 0
+        self.acertos = 0
+        self.calculos = 0
+
+    def obter(self, chave, calcular):
+        """Valor guardado para `chave` ou, na falta dele, calcular() (guardado se couber)."""
+        if chave in self._entradas:
+            self._entradas.move_to_end(chave)
+            self.acertos += 1
+            return self._entradas[chave][0]
+        valor = calcular()
+        self.calculos += 1
+        tamanho = tamanho_aproximado(valor)
+        if tamanho <= self.limite_bytes:
+            self._entradas[chave] = (valor, tamanho)
+            self.bytes += tamanho
+            while self.bytes > self.limite_bytes:
+                _, (_, descartado) = self._entradas.popitem(last=False)
+                self.bytes -= descartado
+        return valor
+
+    def limpar(self):
+        self._entradas.clear()
+        self.bytes = 0
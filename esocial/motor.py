@@ -0,0 +1,221 @@
+"""Motor de processamento sem interface: leitura, auditoria, mapeamento de rubricas,
+cálculo e exportação. Não importa o Streamlit; serve à linha de comando e ao app."""
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from esocial.acervo import Acervo, AcervoIncompativel
+from esocial.auditoria import auditar
+from esocial.cache import CacheLeitura
+from esocial.calculo import (
+    CATEGORIAS, calcular_funcionario, calcular_todos_funcionarios, detalhe_por_competencia, indice_por_cpf, itens_pagos, textos_saude,
+)
+from esocial.diagnostico import Diagnostico
+from esocial.excel import gerar_excel
+from esocial.formatacao import fmt_inscricao
+from esocial.leitura import LIMITE_MEMORIA_PADRAO, processar_arquivos
+from esocial.mapeamentos import Mapeamentos
+from esocial.memo import Memo, impressao
+from esocial.pdf import gerar_zip_pdfs, nomes_arquivos_pdf, renderizar_pdf
+from esocial.rubricas import classificar_rubricas, resumo_rubricas, rubricas_unicas, tabela_s1010
+from esocial.saidas import PastaSessao, limpar_saidas_antigas
+from esocial.tarefas import Tarefas
+
+__all__ = [
+    'Acervo', 'AcervoIncompativel', 'CATEGORIAS', 'CacheLeitura', 'Diagnostico', 'EmpregadorIncompleto', 'Mapeamentos', 'Memo', 'PastaSessao', 'Tarefas', 'auditar',
+    'calcular_funcionario', 'calcular_todos_funcionarios', 'classificar_rubricas', 'detalhe_por_competencia', 'exportar_por_empregador', 'gerar_excel', 'gerar_informes', 'gerar_informes_por_empregador',
+    'gerar_zip_pdfs', 'identificar_empregadores', 'impressao', 'indice_por_cpf', 'itens_pagos', 'limpar_saidas_antigas', 'nomes_arquivos_pdf', 'processar_arquivos',
+    'renderizar_pdf', 'resumo_rubricas', 'rubricas_unicas', 'tabela_s1010', 'textos_saude',
+]
+
+def _ler(zips, workers, cache, diagnostico, limite_memoria, acervo, por_empregador=False):
+    if acervo is None:
+        return processar_arquivos(zips, workers=workers, cache=cache, diagnostico=diagnostico,
+                                  limite_memoria=limite_memoria, por_empregador=por_empregador), None
+    envio = acervo.adicionar(zips, workers=workers, diagnostico=diagnostico, limite_memoria=limite_memoria)
+    return acervo.carregar(diagnostico, por_empregador=por_empregador), envio
+
+def _classificar(dados_lidos, ano, rubricas, mapeamentos):
+    """Classificação do S-1010, ou a salva em `mapeamentos` quando os dados são de um único
+    empregador (Mapeamentos.pre_selecao), com `rubricas` por cima."""
+    df_1200, df_1210, s1010 = dados_lidos[0], dados_lidos[1], dados_lidos[5]
+    inscricoes = {e for df in (df_1200, df_1210) for e in df['CNPJ_Emp'].dropna().unique() if e}
+    if mapeamentos is not None and len(inscricoes) == 1:
+        mapeamento = mapeamentos.pre_selecao(inscricoes.pop(), rubricas_unicas(df_1200), s1010, ano)
+    else:
+        mapeamento = classificar_rubricas(rubricas_unicas(df_1200), s1010, ano)
+    mapeamento.update(rubricas or {})
+    return mapeamento
+
+def _gerar(dados_lidos, ano, empregador_nome, empregador_cnpj, rubricas, df_manuais, workers, pdf, excel,
+           excel_detalhado, diagnostico, destino_pdf, destino_excel, tamanho_parte=None, mapeamentos=None):
+    """Auditoria, rubricas, cálculo e exportação a partir da tupla de processar_arquivos.
+    O resumo traz em 'dados' os itens do cálculo (um por CPF)."""
+    df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, s1010 = dados_lidos
+    with diagnostico.etapa('auditoria'):
+        alertas_sem_rubrica, alertas_meses_faltantes, pendencias_pagamento = auditar(
+            df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, ano)
+
+    with diagnostico.etapa('rubricas'):
+        mapeamento = _classificar(dados_lidos, ano, rubricas, mapeamentos)
+    df_manuais = df_manuais if df_manuais is not None else pd.DataFrame()
+    with diagnostico.etapa('calculo'):
+        dados = calcular_todos_funcionarios(df_1200, df_1210, df_manuais, mapeamento, mapa_nomes, empregador_nome, empregador_cnpj)
+
+    arquivos = []
+    if pdf:
+        with diagnostico.etapa('pdf'): arquivos += gerar_zip_pdfs(dados, str(ano), destino_pdf, workers=workers, tamanho_parte=tamanho_parte)
+    if excel:
+        with diagnostico.etapa('excel'):
+            if excel_detalhado:
+                gerar_excel(dados, destino_excel, detalhe=detalhe_por_competencia(df_1200, df_1210, df_manuais, mapeamento),
+                            auditoria=(alertas_sem_rubrica, alertas_meses_faltantes, pendencias_pagamento),
+                            resumo=resumo_rubricas(df_1200))
+            else:
+                gerar_excel(dados, destino_excel)
+        arquivos.append(destino_excel)
+
+    return {
+        'funcionarios': len(dados), 'linhas_s1200': len(df_1200), 'linhas_s1210': len(df_1210),
+        'rubricas': mapeamento, 'alertas_sem_rubrica': alertas_sem_rubrica,
+        'alertas_meses_faltantes': alertas_meses_faltantes, 'pendencias_pagamento': pendencias_pagamento,
+        'arquivos': arquivos, 'dados': dados,
+    }
+
+def gerar_informes(zips, ano, saida, empregador_nome, empregador_cnpj, rubricas=None, df_manuais=None,
+                   workers=None, cache=None, pdf=True, excel=True, excel_detalhado=False, diagnostico=None,
+                   limite_memoria=LIMITE_MEMORIA_PADRAO, acervo=None, tamanho_parte=None, mapeamentos=None):
+    """Executa o fluxo completo e grava os arquivos em `saida`.
+
+    rubricas: {categoria: [rubricas]}; quando None usa a classificação automática do S-1010
+    (categorias ausentes no mapeamento informado também são preenchidas por ela).
+    df_manuais: correções de pagamento no formato do painel do app (opcional).
+    excel_detalhado: inclui no Excel o detalhe por competência, a auditoria e o resumo de rubricas.
+    diagnostico: Diagnostico opcional que recebe as medições de todas as etapas.
+    limite_memoria: bytes de ZIPs aninhados mantidos em memória na leitura.
+    acervo: Acervo opcional; os XMLs novos dos ZIPs são acrescentados a ele e os informes
+    saem da base inteira (o cache não é usado).
+    tamanho_parte: bytes; divide o ZIP de PDFs em partes de até esse tamanho.
+    mapeamentos: Mapeamentos opcional; com um único empregador nos dados, parte da classificação salva para ele.
+    Retorna um resumo com as contagens, as tabelas da auditoria e os caminhos gerados."""
+    diagnostico = diagnostico or Diagnostico()
+    dados_lidos, envio = _ler(zips, workers, cache, diagnostico, limite_memoria, acervo)
+    os.makedirs(saida, exist_ok=True)
+    destino_pdf = os.path.join(saida, f"Informes_PDF_{ano}.zip")
+    destino_excel = os.path.join(saida, "Relatorio_Conferencia.xlsx")
+    resumo = _gerar(dados_lidos, ano, empregador_nome, empregador_cnpj, rubricas, df_manuais, workers, pdf, excel,
+                    excel_detalhado, diagnostico, destino_pdf, destino_excel, tamanho_parte, mapeamentos)
+    del resumo['dados']
+    resumo.update(deduplicacao=diagnostico.deduplicacao, acervo=envio)
+    return resumo
+
+# --- VÁRIOS EMPREGADORES ---
+# Escritórios de contabilidade enviam ZIPs de várias empresas juntos. A leitura é feita
+# uma vez e separada pela inscrição do empregador (ideEmpregador/nrInsc), com o S-1010
+# e os cadastros de cada um; auditoria, cálculo e exportação de cada empregador rodam
+# em paralelo, um processo por empregador, cada um gravando o seu próprio ZIP.
+
+def _informes_do_empregador(empregador, dados_lidos, ano, saida, empregador_nome, empregador_cnpj, rubricas, df_manuais,
+                            workers, pdf, excel, excel_detalhado, medir_memoria, mapeamentos):
+    """Executado no pool: gera Informes_<inscrição>_<ano>.zip com os PDFs e o Excel do empregador."""
+    diagnostico = Diagnostico(memoria=medir_memoria)
+    destino = os.path.join(saida, f"Informes_{empregador or 'sem_inscricao'}_{ano}.zip")
+    with tempfile.TemporaryDirectory(dir=saida) as tmp:
+        destino_excel = os.path.join(tmp, "Relatorio_Conferencia.xlsx")
+        resumo = _gerar(dados_lidos, ano, empregador_nome, empregador_cnpj, rubricas, df_manuais, workers, pdf, excel,
+                        excel_detalhado, diagnostico, destino, destino_excel, mapeamentos=mapeamentos)
+        del resumo['dados']
+        with zipfile.ZipFile(destino, 'a' if pdf else 'w', zipfile.ZIP_DEFLATED) as z:
+            if excel: z.write(destino_excel, "Relatorio_Conferencia.xlsx")
+    resumo.update(arquivos=[destino], etapas=diagnostico.etapas)
+    return resumo
+
+class EmpregadorIncompleto(ValueError):
+    """Empregador sem nome ou sem CNPJ completo para a fonte pagadora dos informes."""
+
+def identificar_empregadores(inscricoes, empregadores):
+    """{inscrição: (nome, CNPJ/CPF formatado)} das `inscricoes` a partir de `empregadores`
+    ({inscrição: {'nome': ..., 'cnpj': ...}}). O CNPJ precisa ter os 14 dígitos e a raiz
+    da inscrição (CPF: os 11 dígitos); levanta ValueError listando os empregadores sem
+    nome ou sem CNPJ completo (EmpregadorIncompleto)."""
+    identificados, pendentes = {}, []
+    for inscricao in inscricoes:
+        dados = (empregadores or {}).get(inscricao) or {}
+        nome = str(dados.get('nome') or '').strip()
+        digitos = re.sub(r'\D', '', str(dados.get('cnpj') or ''))
+        cnpj_valido = ((len(digitos) == 14 and (not inscricao or digitos[:8] == inscricao[:8]))
+                       or (len(digitos) == 11 and digitos == inscricao))
+        if not nome or nome == f"EMPREGADOR {inscricao}" or not cnpj_valido:
+            pendentes.append(inscricao or 'sem inscrição')
+        else:
+            identificados[inscricao] = (nome, fmt_inscricao(digitos))
+    if pendentes:
+        raise EmpregadorIncompleto("Informe o nome e o CNPJ completo (14 dígitos, da mesma raiz da inscrição) dos empregadores: "
+                         + ", ".join(pendentes))
+    return identificados
+
+def _manuais_do_empregador(df_manuais, df_1200):
+    """Correções manuais das competências (CPF, perApur) que o empregador tem no S-1200."""
+    if df_manuais is None or df_manuais.empty: return df_manuais
+    pares = set(zip(df_1200['CPF'].astype(str), df_1200['Competencia'].astype(str)))
+    chaves = zip(df_manuais['CPF'].astype(str), df_manuais['Competencia Faltante'].astype(str))
+    return df_manuais[[chave in pares for chave in chaves]]
+
+def exportar_por_empregador(por_empregador, ano, saida, empregadores=None, rubricas=None, df_manuais=None,
+                            workers=None, pdf=True, excel=True, excel_detalhado=False, diagnostico=None,
+                            mapeamentos=None):
+    """Gera em `saida` um ZIP por empregador (PDFs + Excel) a partir do resultado de
+    processar_arquivos(..., por_empregador=True), um processo por empregador.
+
+    empregadores: {inscrição: {'nome': ..., 'cnpj': ...}} da fonte pagadora de cada informe;
+    todos os empregadores precisam de nome e CNPJ completo (ver identificar_empregadores).
+    rubricas: mapeamento aplicado a todos os empregadores, por cima da classificação do S-1010 de cada um.
+    df_manuais: correções de pagamento; cada empregador recebe só as das suas competências.
+    mapeamentos: Mapeamentos opcional; cada empregador parte da classificação salva para ele.
+    Retorna {inscrição: resumo como o de gerar_informes}, em ordem de inscrição."""
+    workers = workers or os.cpu_count() or 1
+    diagnostico = diagnostico or Diagnostico()
+    identificados = identificar_empregadores(por_empregador, empregadores)
+    os.makedirs(saida, exist_ok=True)
+    tarefas = {
+        empregador: dict(empregador=empregador, dados_lidos=dados_lidos, ano=ano, saida=saida,
+                         empregador_nome=identificados[empregador][0], empregador_cnpj=identificados[empregador][1],
+                         rubricas=rubricas, mapeamentos=mapeamentos,
+                         df_manuais=_manuais_do_empregador(df_manuais, dados_lidos[0]), workers=1, pdf=pdf, excel=excel,
+                         excel_detalhado=excel_detalhado, medir_memoria=diagnostico.memoria)
+        for empregador, dados_lidos in por_empregador.items()
+    }
+
+    resumos = {}
+    if workers == 1 or len(tarefas) <= 1:
+        # um único empregador usa os processos nos PDFs
+        for empregador, kwargs in tarefas.items():
+            resumos[empregador] = _informes_do_empregador(**dict(kwargs, workers=workers))
+    else:
+        contexto_mp = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(tarefas)), mp_context=contexto_mp) as pool:
+            futuros = {pool.submit(_informes_do_empregador, **kwargs): empregador for empregador, kwargs in tarefas.items()}
+            for futuro in as_completed(futuros):
+                resumos[futuros[futuro]] = futuro.result()
+    for resumo in resumos.values(): diagnostico.incorporar_etapas(resumo.pop('etapas'))
+    return dict(sorted(resumos.items()))
+
+def gerar_informes_por_empregador(zips, ano, saida, empregadores=None, rubricas=None, df_manuais=None,
+                                  workers=None, cache=None, pdf=True, excel=True, excel_detalhado=False,
+                                  diagnostico=None, limite_memoria=LIMITE_MEMORIA_PADRAO, acervo=None,
+                                  mapeamentos=None):
+    """Como gerar_informes, mas separando os dados por empregador (ver exportar_por_empregador).
+    Retorna {'empregadores': {inscrição: resumo}, 'deduplicacao', 'acervo', 'arquivos'}."""
+    diagnostico = diagnostico or Diagnostico()
+    por_empregador, envio = _ler(zips, workers, cache, diagnostico, limite_memoria, acervo, por_empregador=True)
+    resumos = exportar_por_empregador(por_empregador, ano, saida, empregadores, rubricas, df_manuais, workers,
+                                      pdf, excel, excel_detalhado, diagnostico, mapeamentos)
+    return {
+        'empregadores': resumos, 'deduplicacao': diagnostico.deduplicacao, 'acervo': envio,
+        'arquivos': [caminho for resumo in resumos.values() for caminho in resumo['arquivos']],
+    }
@@ -0,0 +1,365 @@
+"""Informe de rendimentos em PDF (layout da Receita Federal) e geração em lote."""
+import datetime
+import functools
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from fpdf import FPDF
+
+from esocial.formatacao import fmt
+
+# --- CLASSE PDF (LAYOUT RECEITA FEDERAL - BOX) ---
+class Campo(str):
+    """Marca um valor variável ao montar o modelo; o texto é a chave do valor."""
+
+class PDFLayoutReceita(FPDF):
+    def __init__(self, ano_calendario):
+        super().__init__()
+        self.ano_calendario = ano_calendario
+        self.exercicio = int(ano_calendario) + 1
+        self.set_auto_page_break(auto=True, margin=10)
+        self.set_line_width(0.2) 
+        self.carimbos = None  # lista enquanto o modelo está sendo montado
+        self.sem_cabecalho = False
+
+    def header(self):
+        if self.sem_cabecalho: return
+        self.set_font('Arial', 'B', 8)
+        self.cell(0, 4, 'MINISTÉRIO DA FAZENDA', 0, 1, 'L')
+        self.cell(0, 4, 'SECRETARIA DA RECEITA FEDERAL DO BRASIL', 0, 1, 'L')
+        self.ln(2)
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 5, 'COMPROVANTE DE RENDIMENTOS PAGOS E DE', 0, 1, 'C')
+        self.cell(0, 5, 'IMPOSTO SOBRE A RENDA RETIDO NA FONTE', 0, 1, 'C')
+        self.ln(2)
+        self.set_font('Arial', 'B', 9)
+        self.cell(0, 5, f'ANO-CALENDÁRIO: {self.ano_calendario}   |   EXERCÍCIO: {self.exercicio}', 0, 1, 'R')
+        self.ln(4)
+        self.set_font('Arial', '', 6)
+        self.multi_cell(0, 3, "Verifique as condições e o prazo para a apresentação da Declaração do Imposto sobre a Renda da Pessoa Física...", 0, 'C')
+        self.ln(3)
+
+    def campo_box(self, label, valor, w, h=10, ln=0):
+        x = self.get_x()
+        y = self.get_y()
+        self.rect(x, y, w, h)
+        self.set_font('Arial', '', 6)
+        self.set_xy(x + 1, y + 1)
+        self.cell(w-2, 3, label, 0, 0)
+        self.set_font('Arial', 'B', 8)
+        self.set_xy(x + 1, y + 5)
+        if isinstance(valor, Campo) and self.carimbos is not None:
+            self.carimbos.append((str(valor), x + 1, y + 5, w - 2, 4, '', int(w/2)))
+        else:
+            valor_str = str(valor)
+            if len(valor_str) > int(w/2): self.set_font('Arial', 'B', 7)
+            self.cell(w-2, 4, valor_str, 0, 0)
+        if ln == 1: self.set_xy(self.l_margin, y + h)
+        else: self.set_xy(x + w, y)
+
+    def linha_tabela(self, texto, valor):
+        self.set_font('Arial', '', 7)
+        self.cell(160, 5, texto, 1, 0, 'L') 
+        self.set_font('Arial', 'B', 8)
+        if isinstance(valor, Campo) and self.carimbos is not None:
+            x, y = self.get_x(), self.get_y()
+            self.carimbos.append((str(valor), x, y, self.w - self.r_margin - x, 5, 'R', None))
+            valor = ''
+        self.cell(0, 5, valor, 1, 1, 'R') 
+
+    def titulo_secao(self, numero, texto):
+        self.set_fill_color(230, 230, 230) 
+        self.set_font('Arial', 'B', 8)
+        self.cell(0, 6, f"{numero}. {texto}", 1, 1, 'L', 1) 
+
+def _secoes_fixas(pdf, dados_calculados, dados_cadastrais):
+    # 1. Fonte
+    pdf.titulo_secao("1", "FONTE PAGADORA PESSOA JURÍDICA OU PESSOA FÍSICA")
+    pdf.campo_box("CNPJ/CPF", dados_cadastrais['Empregador_CNPJ'], w=50) 
+    pdf.campo_box("Nome Empresarial / Nome Completo", dados_cadastrais['Empregador_Nome'], w=140, ln=1)
+    pdf.ln(2)
+
+    # 2. Beneficiário
+    pdf.titulo_secao("2", "PESSOA FÍSICA BENEFICIÁRIA DOS RENDIMENTOS")
+    pdf.campo_box("CPF", dados_cadastrais['CPF'], w=40)
+    pdf.campo_box("Nome Completo", dados_cadastrais['Nome'], w=150, ln=1)
+    pdf.campo_box("Natureza do Rendimento", "Rendimento do Trabalho Assalariado", w=190, h=8, ln=1)
+    pdf.ln(2)
+
+    # 3. Rendimentos
+    pdf.titulo_secao("3", "RENDIMENTOS TRIBUTÁVEIS, DEDUÇÕES E IMPOSTO RETIDO NA FONTE")
+    pdf.linha_tabela("1. Total dos rendimentos (inclusive férias)", fmt(dados_calculados['v_bruto']))
+    pdf.linha_tabela("2. Contribuição previdenciária oficial", fmt(dados_calculados['v_inss']))
+    pdf.linha_tabela("3. Contribuição a previdência complementar", "0,00")
+    pdf.linha_tabela("4. Pensão alimentícia", "0,00")
+    pdf.linha_tabela("5. Imposto sobre a renda retido na fonte", fmt(dados_calculados['v_irrf']))
+    pdf.ln(2)
+
+    # 4. Isentos
+    pdf.titulo_secao("4", "RENDIMENTOS ISENTOS E NÃO TRIBUTÁVEIS")
+    pdf.linha_tabela("1. Parcela isenta de aposentadoria (65 anos+)", "0,00")
+    pdf.linha_tabela("7. Outros", "0,00")
+    pdf.ln(2)
+
+    # 5. Exclusiva
+    pdf.titulo_secao("5", "RENDIMENTOS SUJEITOS À TRIBUTAÇÃO EXCLUSIVA (RENDIMENTO LÍQUIDO)")
+    pdf.linha_tabela("1. Décimo terceiro salário", fmt(dados_calculados['v_13_liq']))
+    pdf.linha_tabela("2. Imposto sobre a renda retido na fonte sobre 13º salário", fmt(dados_calculados['v_13_irrf']))
+    pdf.ln(2)
+
+    # 7. Info Complementar (título)
+    pdf.titulo_secao("7", "INFORMAÇÕES COMPLEMENTARES")
+
+def _info_complementar(pdf, txt_saude):
+    pdf.set_font('Arial', '', 7)
+    pdf.multi_cell(0, 4, txt_saude, 1, 'L')
+    pdf.ln(2)
+
+def _responsavel(pdf, dados_cadastrais, data_assinatura):
+    # 8. Responsável
+    pdf.titulo_secao("8", "RESPONSÁVEL PELAS INFORMAÇÕES")
+    pdf.campo_box("Nome", dados_cadastrais['Empregador_Nome'], w=110)
+    pdf.campo_box("Data", data_assinatura, w=30)
+    pdf.campo_box("Assinatura", "", w=50, ln=1)
+    
+    pdf.ln(5)
+    pdf.set_font('Arial', '', 6)
+    pdf.cell(0, 4, "Aprovado pela Instrução Normativa RFB nº 1.682, de 28 de dezembro de 2016.", 0, 0, 'C')
+
+def _data_assinatura(ano_base):
+    return datetime.date.today().strftime('%d/%m/') + str(int(ano_base)+1)
+
+def gerar_pdf_final(dados_calculados, dados_cadastrais, ano_base):
+    pdf = PDFLayoutReceita(ano_base)
+    pdf.add_page()
+    _secoes_fixas(pdf, dados_calculados, dados_cadastrais)
+    _info_complementar(pdf, dados_calculados['txt_saude'])
+    _responsavel(pdf, dados_cadastrais, _data_assinatura(ano_base))
+    return pdf
+
+# --- MODELO PRÉ-RENDERIZADO ---
+# O conteúdo fixo da página (cabeçalho, títulos, caixas, linhas "0,00") é gerado
+# uma vez por ano-calendário/empregador. Cada informe copia esse conteúdo e só
+# escreve os valores do funcionário nas coordenadas registradas (carimbos).
+# O bloco 8 e o rodapé dependem apenas da altura das informações complementares
+# e ficam guardados por posição vertical.
+
+CAMPOS_CADASTRAIS = ('CPF', 'Nome')
+CAMPOS_CALCULADOS = ('v_bruto', 'v_inss', 'v_irrf', 'v_13_liq', 'v_13_irrf')
+
+@functools.lru_cache(maxsize=8)
+def _modelo(ano_base, empregador_nome, empregador_cnpj):
+    pdf = PDFLayoutReceita(ano_base)
+    pdf.add_page()
+    pdf.carimbos = []
+    cadastrais = {'Empregador_Nome': empregador_nome, 'Empregador_CNPJ': empregador_cnpj}
+    cadastrais.update({campo: Campo(campo) for campo in CAMPOS_CADASTRAIS})
+    _secoes_fixas(pdf, {campo: Campo(campo) for campo in CAMPOS_CALCULADOS}, cadastrais)
+    return {
+        'pagina': pdf.pages[pdf.page], 'fontes': pdf.fonts, 'carimbos': pdf.carimbos,
+        'y': pdf.get_y(), 'rodapes': {},
+    }
+
+def gerar_pdf_modelo(dados_calculados, dados_cadastrais, ano_base):
+    """Mesmo documento de gerar_pdf_final, montado a partir do modelo pré-renderizado."""
+    modelo = _modelo(str(ano_base), dados_cadastrais['Empregador_Nome'], dados_cadastrais['Empregador_CNPJ'])
+    pdf = PDFLayoutReceita(ano_base)
+    pdf.fonts = {chave: dict(fonte) for chave, fonte in modelo['fontes'].items()}
+    pdf.sem_cabecalho = True
+    pdf.add_page()
+    pdf.sem_cabecalho = False
+    pdf.pages[pdf.page] = modelo['pagina']
+    pdf.set_fill_color(230, 230, 230)
+
+    valores = {campo: str(dados_cadastrais[campo]) for campo in CAMPOS_CADASTRAIS}
+    valores.update({campo: fmt(dados_calculados[campo]) for campo in CAMPOS_CALCULADOS})
+    for campo, x, y, w, h, alinhamento, limite in modelo['carimbos']:
+        texto = valores[campo]
+        pdf.set_font('Arial', 'B', 7 if limite is not None and len(texto) > limite else 8)
+        pdf.set_xy(x, y)
+        pdf.cell(w, h, texto, 0, 0, alinhamento)
+
+    pdf.set_xy(pdf.l_margin, modelo['y'])
+    _info_complementar(pdf, dados_calculados['txt_saude'])
+
+    data_assinatura = _data_assinatura(ano_base)
+    chave = (pdf.page, pdf.get_y(), data_assinatura)
+    if chave in modelo['rodapes']:
+        pdf.pages[pdf.page] += modelo['rodapes'][chave]
+    else:
+        pagina, inicio = pdf.page, len(pdf.pages[pdf.page])
+        _responsavel(pdf, dados_cadastrais, data_assinatura)
+        if pdf.page == pagina == 1: modelo['rodapes'][chave] = pdf.pages[pagina][inicio:]
+    return pdf
+
+# --- GERAÇÃO EM LOTE ---
+# Os documentos são renderizados num pool de processos, em blocos de funcionários.
+# Cada bloco devolve (nome do arquivo, bytes do PDF); o processo principal grava os
+# blocos no ZIP na ordem original assim que ficam disponíveis.
+
+TAMANHO_BLOCO_PDF = 50
+
+def _nome_seguro(texto):
+    return str(texto).replace('/', '-').replace('\\', '-')
+
+def nomes_arquivos_pdf(dados):
+    """Nome do PDF de cada item; homônimos recebem o CPF no nome para não colidirem no ZIP."""
+    contagem = {}
+    for item in dados: contagem[item['nome']] = contagem.get(item['nome'], 0) + 1
+    return [f"Informe_{_nome_seguro(item['nome'])}.pdf" if contagem[item['nome']] == 1
+            else f"Informe_{_nome_seguro(item['nome'])}_{item['cpf']}.pdf" for item in dados]
+
+def renderizar_pdf(dados_calculados, dados_cadastrais, ano_base, usar_modelo=True):
+    gerar = gerar_pdf_modelo if usar_modelo else gerar_pdf_final
+    return gerar(dados_calculados, dados_cadastrais, ano_base).output(dest='S').encode('latin-1')
+
+def _renderizar_bloco(bloco, ano_base, usar_modelo=True):
+    """Executado nos processos do pool."""
+    return [(nome, renderizar_pdf(calculados, cadastrais, ano_base, usar_modelo)) for nome, calculados, cadastrais in bloco]
+
+class _ZipEmPartes:
+    """ZIP gravado direto no destino; com `tamanho_parte` (bytes), dividido em
+    <destino>_parte01.zip, _parte02.zip... de até esse tamanho (um membro maior que o
+    limite fica sozinho numa parte). Se tudo couber numa parte, ela fica com o nome de `destino`."""
+    def __init__(self, destino, tamanho_parte=None):
+        if tamanho_parte and not isinstance(destino, (str, os.PathLike)):
+            raise ValueError("tamanho_parte exige um caminho de destino")
+        self.destino = destino
+        self.tamanho_parte = tamanho_parte
+        self.arquivos = []
+        self._zip = None
+
+    def _abrir(self):
+        if self.tamanho_parte:
+            raiz, extensao = os.path.splitext(self.destino)
+            caminho = f"{raiz}_parte{len(self.arquivos) + 1:02d}{extensao}"
+        else:
+            caminho = self.destino
+        self.arquivos.append(caminho)
+        self._zip = zipfile.ZipFile(caminho, "w")
+        self._diretorio_central = 22  # registro final do ZIP
+
+    def _reservar(self, nome, tamanho):
+        # o diretório central (uma entrada por membro) só é gravado no fechamento
+        entrada_central = 46 + len(nome.encode()) + 32
+        tamanho += 30 + len(nome.encode()) + 32 + entrada_central
+        if self._zip is None:
+            self._abrir()
+        elif (self.tamanho_parte and self._zip.infolist()
+              and self._zip.fp.tell() + self._diretorio_central + tamanho > self.tamanho_parte):
+            self._zip.close()
+            self._abrir()
+        self._diretorio_central += entrada_central
+
+    def writestr(self, nome, conteudo):
+        self._reservar(nome, len(conteudo))
+        self._zip.writestr(nome, conteudo)
+
+    def write(self, caminho, nome):
+        self._reservar(nome, os.path.getsize(caminho))
+        self._zip.write(caminho, nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        if self._zip is None: self._abrir()
+        self._zip.close()
+        if self.tamanho_parte and len(self.arquivos) == 1:
+            os.replace(self.arquivos[0], self.destino)
+            self.arquivos = [self.destino]
+
+def gerar_zip_pdfs(dados, ano_base, destino, workers=None, progresso=None, usar_modelo=True, tamanho_parte=None):
+    """Grava no ZIP `destino` (caminho ou arquivo) um PDF por item de calcular_todos_funcionarios.
+
+    workers: número de processos (padrão: todos os núcleos; 1 renderiza no processo atual).
+    progresso: função chamada com a fração concluída (0 a 1).
+    usar_modelo: monta cada PDF a partir do modelo pré-renderizado (gerar_pdf_modelo).
+    tamanho_parte: bytes; divide o ZIP em partes de até esse tamanho (ver _ZipEmPartes).
+    Retorna a lista dos ZIPs gravados."""
+    workers = workers or os.cpu_count() or 1
+    progresso = progresso or (lambda fracao: None)
+    itens = [(nome, item['calculados'], item['cadastrais']) for nome, item in zip(nomes_arquivos_pdf(dados), dados)]
+    blocos = [itens[k:k + TAMANHO_BLOCO_PDF] for k in range(0, len(itens), TAMANHO_BLOCO_PDF)]
+    total = len(itens) or 1
+    concluidos = 0
+
+    with _ZipEmPartes(destino, tamanho_parte) as z_out:
+        if workers == 1 or len(blocos) <= 1:
+            for bloco in blocos:
+                for nome, conteudo in _renderizar_bloco(bloco, ano_base, usar_modelo):
+                    z_out.writestr(nome, conteudo)
+                    concluidos += 1
+                    progresso(concluidos / total)
+        else:
+            contexto_mp = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(workers, len(blocos)), mp_context=contexto_mp) as pool:
+                futuros = {pool.submit(_renderizar_bloco, bloco, ano_base, usar_modelo): i for i, bloco in enumerate(blocos)}
+                prontos = {}
+                proximo = 0
+                for futuro in as_completed(futuros):
+                    prontos[futuros[futuro]] = futuro.result()
+                    concluidos += len(blocos[futuros[futuro]])
+                    progresso(concluidos / total)
+                    # Grava em ordem: só escreve os blocos contíguos ao último gravado
+                    while proximo in prontos:
+                        for nome, conteudo in prontos.pop(proximo):
+                            z_out.writestr(nome, conteudo)
+                        proximo += 1
+    progresso(1.0)
+    return z_out.arquivos
+
+# --- GERAÇÃO RETOMÁVEL ---
+# Para execuções longas (esocial.tarefas), cada PDF é gravado num arquivo próprio
+# (<posição>.pdf, com renomeação atômica) pelo processo que o renderizou. Uma geração
+# interrompida recomeça do primeiro funcionário sem arquivo; o ZIP é montado no fim.
+
+def _arquivo_pdf(diretorio, posicao):
+    return os.path.join(diretorio, f"{posicao:07d}.pdf")
+
+def _renderizar_bloco_em_disco(bloco, ano_base, diretorio, usar_modelo=True):
+    """Executado nos processos do pool; devolve quantos PDFs gravou."""
+    for posicao, calculados, cadastrais in bloco:
+        destino = _arquivo_pdf(diretorio, posicao)
+        with open(destino + '.tmp', 'wb') as f:
+            f.write(renderizar_pdf(calculados, cadastrais, ano_base, usar_modelo))
+        os.replace(destino + '.tmp', destino)
+    return len(bloco)
+
+def gerar_pdfs_em_disco(dados, ano_base, diretorio, workers=None, progresso=None, usar_modelo=True):
+    """Grava em `diretorio` um PDF por item de calcular_todos_funcionarios, pulando os já gravados.
+
+    progresso: função chamada com (concluídos, total) a cada bloco; os já existentes contam como concluídos.
+    `dados` deve ser o mesmo (mesma ordem) entre a execução interrompida e a retomada."""
+    workers = workers or os.cpu_count() or 1
+    progresso = progresso or (lambda concluidos, total: None)
+    os.makedirs(diretorio, exist_ok=True)
+    pendentes = [(posicao, item['calculados'], item['cadastrais']) for posicao, item in enumerate(dados)
+                 if not os.path.exists(_arquivo_pdf(diretorio, posicao))]
+    total = len(dados)
+    concluidos = total - len(pendentes)
+    progresso(concluidos, total)
+    # blocos menores que os do ZIP: uma interrupção perde no máximo um bloco por processo
+    tamanho = max(1, min(TAMANHO_BLOCO_PDF, len(pendentes) // (workers * 4) or 1))
+    blocos = [pendentes[k:k + tamanho] for k in range(0, len(pendentes), tamanho)]
+    if workers == 1 or len(blocos) <= 1:
+        for bloco in blocos:
+            concluidos += _renderizar_bloco_em_disco(bloco, ano_base, diretorio, usar_modelo)
+            progresso(concluidos, total)
+    else:
+        contexto_mp = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(workers, len(blocos)), mp_context=contexto_mp) as pool:
+            futuros = [pool.submit(_renderizar_bloco_em_disco, bloco, ano_base, diretorio, usar_modelo) for bloco in blocos]
+            for futuro in as_completed(futuros):
+                concluidos += futuro.result()
+                progresso(concluidos, total)
+
+def compactar_pdfs(dados, diretorio, destino, tamanho_parte=None):
+    """Monta o ZIP `destino` com os PDFs de gerar_pdfs_em_disco, na ordem e com os nomes de
+    gerar_zip_pdfs (e, como ela, dividido em partes com `tamanho_parte`); retorna os ZIPs gravados."""
+    with _ZipEmPartes(destino, tamanho_parte) as z_out:
+        for posicao, nome in enumerate(nomes_arquivos_pdf(dados)):
+            z_out.write(_arquivo_pdf(diretorio, posicao), nome)
+    return z_out.arquivos
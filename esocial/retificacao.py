@@ -0,0 +1,136 @@
+"""Índice de eventos para retificações (indRetif=2) e exclusões (S-3000).
+
+Cada S-1200/S-1210 lido entra no índice com custo O(1); o mesmo evento (mesmo Id ou
+mesmo recibo) lido de novo é descartado como duplicado. Eventos com a mesma chave
+(tipo, empregador, CPF, perApur) são versões do mesmo evento e, no fim, são postos em
+ordem cronológica pela data/hora de geração do Id oficial (ID + tpInsc + nrInsc +
+AAAAMMDDHHMMSS + sequencial), não pela ordem dos arquivos; sem esse Id, vale a ordem
+de leitura. Percorrendo a chave nessa ordem:
+- cada versão nova substitui a vigente, salvo quando a vigente é a retificação que
+  aponta (nrRecibo) para o recibo dela; sem data de geração dos dois lados, a
+  retificação prevalece sobre o original;
+- cada S-3000 exclui a versão vigente naquele momento (a do recibo informado em
+  nrRecEvt ou, quando os recibos dos eventos não vieram nos arquivos, a da chave).
+  Uma versão gerada depois da exclusão (reenvio do original ou nova retificação)
+  volta a valer; exclusões sem Id oficial são aplicadas por último.
+As exclusões são resolvidas no fim, pois podem ser lidas antes do evento que excluem."""
+from collections import Counter
+
+import numpy as np
+
+MOTIVOS = ('duplicado', 'retificado', 'excluido', 'exclusao_sem_evento')
+
+def geracao(id_evento):
+    """AAAAMMDDHHMMSS + sequencial do Id oficial do evento (36 caracteres), que ordena as
+    versões por geração; None para Ids fora desse formato."""
+    if id_evento and len(id_evento) == 36 and id_evento.startswith('ID') and id_evento[2:].isdigit():
+        return id_evento[17:]
+    return None
+
+class IndiceEventos:
+    def __init__(self):
+        self.valido = []
+        self._chave = []
+        self._recibo = []
+        self._retificacao = []
+        self._recibo_retificado = []
+        self._geracao = []
+        self._versoes = {}   # (tipo, empregador, cpf, competência) -> posições das versões
+        self._por_id = set()
+        self._por_recibo = {}
+        self._exclusoes = []
+        self.descartes = Counter()  # (motivo, tipo) -> quantidade
+
+    def adicionar(self, tipo, id_evento, recibo, ind_retif, recibo_retificado, empregador, cpf, competencia):
+        pos = len(self.valido)
+        chave = (tipo, empregador, cpf, competencia)
+        self._chave.append(chave)
+        self._recibo.append(recibo)
+        self._retificacao.append(ind_retif == '2')
+        self._recibo_retificado.append(recibo_retificado)
+        self._geracao.append(geracao(id_evento))
+        if (id_evento and id_evento in self._por_id) or (recibo and recibo in self._por_recibo):
+            self.valido.append(False)
+            self.descartes['duplicado', tipo] += 1
+            return
+        self.valido.append(True)
+        if id_evento: self._por_id.add(id_evento)
+        if recibo: self._por_recibo[recibo] = pos
+        self._versoes.setdefault(chave, []).append(pos)
+
+    def _prevalece(self, novo, atual):
+        if self._recibo_retificado[novo] and self._recibo_retificado[novo] == self._recibo[atual]: return True
+        if self._recibo_retificado[atual] and self._recibo_retificado[atual] == self._recibo[novo]: return False
+        if self._geracao[novo] and self._geracao[atual]: return self._geracao[novo] >= self._geracao[atual]
+        if self._retificacao[novo] != self._retificacao[atual]: return self._retificacao[novo]
+        return True
+
+    def excluir(self, tipo, id_evento, recibo, empregador, cpf, competencia):
+        self._exclusoes.append((tipo, geracao(id_evento), recibo, (tipo, empregador, cpf, competencia)))
+
+    def _resolver(self, tipo, versoes, exclusoes):
+        # Linha do tempo da chave: versões e exclusões pela geração ('' = desconhecida,
+        # antes de todas; exclusão sem geração, depois de todas), depois pela ordem de leitura
+        linha = [((self._geracao[pos] or '', 0, pos), pos, None) for pos in versoes]
+        linha += [((gerada or '~', 1, i), None, recibo) for i, (gerada, recibo) in enumerate(exclusoes)]
+        vigente = None
+        for _, pos, recibo in sorted(linha):
+            if pos is not None:
+                if vigente is not None:
+                    perdedor = vigente if self._prevalece(pos, vigente) else pos
+                    self.valido[perdedor] = False
+                    self.descartes['retificado', tipo] += 1
+                    if perdedor == pos: continue
+                vigente = pos
+            # com recibos conhecidos dos dois lados, só exclui se coincidirem
+            elif vigente is None or (recibo and self._recibo[vigente] and self._recibo[vigente] != recibo):
+                self.descartes['exclusao_sem_evento', tipo] += 1
+            else:
+                self.valido[vigente] = False
+                self.descartes['excluido', tipo] += 1
+                vigente = None
+
+    def finalizar(self):
+        """Resolve versões e exclusões; devolve a lista `valido` (uma posição por evento adicionado)."""
+        exclusoes = {}
+        for tipo, gerada, recibo, chave in self._exclusoes:
+            pos = self._por_recibo.get(recibo) if recibo else None
+            if pos is not None: chave = self._chave[pos]
+            exclusoes.setdefault(chave, []).append((gerada, recibo))
+        for chave, versoes in self._versoes.items():
+            self._resolver(chave[0], versoes, exclusoes.pop(chave, []))
+        for chave, sem_evento in exclusoes.items():
+            self.descartes['exclusao_sem_evento', chave[0]] += len(sem_evento)
+        self._versoes, self._exclusoes = {}, []
+        return self.valido
+
+    def relatorio(self):
+        """{motivo: {tipo: quantidade}} com os eventos descartados."""
+        rel = {motivo: {} for motivo in MOTIVOS}
+        for (motivo, tipo), qtd in sorted(self.descartes.items()):
+            rel[motivo][tipo] = qtd
+        return rel
+
+def _decodificar(colunas, nome):
+    valores = list(colunas.dominios[nome])
+    return [valores[c] if c >= 0 else None for c in colunas.codigos[nome]]
+
+def linhas_vigentes(eventos, exclusoes):
+    """Passa os buffers de eventos e exclusões (esocial.eventos) pelo índice.
+    Devolve ({'S-1200': máscara, 'S-1210': máscara}, relatório), com uma máscara booleana
+    por linha da tabela de cada tipo (None quando nenhuma linha é descartada)."""
+    indice = IndiceEventos()
+    nomes = ('Tipo', 'Id', 'Recibo', 'IndRetif', 'Recibo_Retificado', 'CNPJ_Emp', 'CPF', 'Competencia')
+    for registro in zip(*(_decodificar(eventos, nome) for nome in nomes)):
+        indice.adicionar(*registro)
+    for registro in zip(*(_decodificar(exclusoes, nome) for nome in ('Tipo', 'Id', 'Recibo', 'CNPJ_Emp', 'CPF', 'Competencia'))):
+        indice.excluir(*registro)
+    valido = np.array(indice.finalizar(), dtype=bool)
+
+    tipos = np.array(_decodificar(eventos, 'Tipo'), dtype=object)
+    linhas = np.frombuffer(eventos.numeros['Linhas'], dtype=np.float64).astype(np.int64)
+    mascaras = {}
+    for tipo in ('S-1200', 'S-1210'):
+        do_tipo = tipos == tipo
+        mascaras[tipo] = None if valido[do_tipo].all() else np.repeat(valido[do_tipo], linhas[do_tipo])
+    return mascaras, indice.relatorio()
@@ -0,0 +1,44 @@
+"""Mapeamento das rubricas do S-1200 para as categorias do informe."""
+import pandas as pd
+
+from esocial.calculo import CATEGORIAS
+
+def rubricas_unicas(df_1200):
+    return sorted(df_1200['Rubrica'].unique()) if not df_1200.empty else []
+
+# Regras de classificação pelo S-1010: (tpRubr, codIncIRRF, codIncCP ou None para
+# qualquer um) -> categoria. Tributáveis: 11 (mensal), 13 (férias) e 12 (13º); descontos:
+# INSS mensal (31/31) e do 13º (31/32), IRRF mensal (32) e do 13º (33).
+REGRAS_S1010 = pd.DataFrame([
+    ('1', '11', None, 'v_bruto'), ('1', '13', None, 'v_bruto'), ('1', '12', None, 'v_13_bruto'),
+    ('2', '31', '31', 'v_inss'), ('2', '31', '32', 'v_13_inss'), ('2', '32', None, 'v_irrf'), ('2', '33', None, 'v_13_irrf'),
+], columns=['tp', 'incIRRF', 'incCP_regra', 'Categoria'])
+
+def tabela_s1010(s1010, ano=None):
+    """Categoria de cada rubrica do S-1010 (colunas Rubrica e Categoria; rubricas sem categoria ficam de fora).
+
+    Cada rubrica pode ter vários períodos de validade (iniValid/fimValid, AAAA-MM). Com `ano`,
+    vale o período mais recente que alcança o ano-calendário; sem período no ano (ou sem `ano`),
+    o mais recente de todos. Períodos excluídos (registro com 'excluido') não valem."""
+    versoes = pd.DataFrame(list(s1010.values()), columns=['cod', 'tp', 'incCP', 'incIRRF', 'iniValid', 'fimValid', 'excluido'])
+    versoes = versoes[versoes['excluido'].ne(True)].drop(columns='excluido').fillna('')
+    if versoes.empty: return pd.DataFrame(columns=['Rubrica', 'Categoria'], dtype=str)
+    no_ano = True
+    if ano is not None:
+        no_ano = (versoes['iniValid'] <= f"{ano}-12") & ((versoes['fimValid'] == '') | (versoes['fimValid'] >= f"{ano}-01"))
+    versoes = versoes.assign(_no_ano=no_ano).sort_values(['_no_ano', 'iniValid'], kind='stable').drop_duplicates('cod', keep='last')
+    classificadas = versoes.merge(REGRAS_S1010, on=['tp', 'incIRRF'])
+    classificadas = classificadas[classificadas['incCP_regra'].isna() | (classificadas['incCP_regra'] == classificadas['incCP'])]
+    return classificadas[['cod', 'Categoria']].rename(columns={'cod': 'Rubrica'}).reset_index(drop=True)
+
+def classificar_rubricas(rubricas, s1010, ano=None):
+    """Pré-seleção automática a partir da tabela S-1010: {categoria: [rubricas]}, na ordem de `rubricas`."""
+    mapeamento = {categoria: [] for categoria in CATEGORIAS}
+    presentes = pd.DataFrame({'Rubrica': list(rubricas)}, dtype=str).merge(tabela_s1010(s1010, ano), on='Rubrica')
+    for categoria, grupo in presentes.groupby('Categoria', sort=False):
+        mapeamento[categoria] = grupo['Rubrica'].tolist()
+    return mapeamento
+
+def resumo_rubricas(df_1200):
+    """Total e quantidade de lançamentos por rubrica, do maior total para o menor."""
+    return df_1200.groupby('Rubrica', observed=True).agg(Total=('Valor', 'sum'), Qtd=('Rubrica', 'count')).reset_index().sort_values('Total', ascending=False)
@@ -0,0 +1,44 @@
+"""Arquivos exportados pelo app, gravados em disco em vez de memória.
+
+Cada sessão do Streamlit recebe uma pasta temporária; cada exportação (PDFs, Excel,
+ZIPs por empregador) grava numa subpasta própria, que é esvaziada na exportação
+seguinte do mesmo tipo. Os botões de download leem o arquivo só quando clicados.
+A pasta é apagada quando a sessão é descartada; pastas deixadas por um processo que
+caiu são apagadas na abertura de uma nova sessão, passado IDADE_MAXIMA_SAIDAS."""
+import os
+import shutil
+import tempfile
+import time
+import weakref
+
+DIRETORIO_SAIDAS = os.path.join(tempfile.gettempdir(), 'informeesocial-saidas')
+IDADE_MAXIMA_SAIDAS = 24 * 3600
+
+def limpar_saidas_antigas(diretorio=DIRETORIO_SAIDAS, idade_maxima=IDADE_MAXIMA_SAIDAS):
+    if not os.path.isdir(diretorio): return
+    limite = time.time() - idade_maxima
+    for entrada in os.scandir(diretorio):
+        if entrada.is_dir() and entrada.stat().st_mtime < limite:
+            shutil.rmtree(entrada.path, ignore_errors=True)
+
+class PastaSessao:
+    def __init__(self, diretorio=DIRETORIO_SAIDAS):
+        os.makedirs(diretorio, exist_ok=True)
+        self.caminho = tempfile.mkdtemp(dir=diretorio)
+        self._apagar = weakref.finalize(self, shutil.rmtree, self.caminho, True)
+
+    def nova(self, tipo):
+        """Subpasta vazia para uma exportação de `tipo`, descartando a anterior do mesmo tipo."""
+        destino = os.path.join(self.caminho, tipo)
+        shutil.rmtree(destino, ignore_errors=True)
+        os.makedirs(destino)
+        os.utime(self.caminho)
+        return destino
+
+    def arquivos(self, tipo):
+        """Arquivos da última exportação de `tipo`, em ordem de nome."""
+        destino = os.path.join(self.caminho, tipo)
+        return [os.path.join(destino, nome) for nome in sorted(os.listdir(destino))] if os.path.isdir(destino) else []
+
+    def apagar(self):
+        self._apagar()
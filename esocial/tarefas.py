@@ -0,0 +1,229 @@
+"""Fila local de tarefas: leitura, cálculo e exportação fora da sessão do Streamlit.
+
+Cada tarefa é um diretório com os ZIPs de entrada, os parâmetros e o estado em JSON.
+Um executor (processo separado, `python -m esocial.tarefas`) atende a fila em ordem
+de criação, uma tarefa por vez, e grava no estado a etapa, o progresso, a vazão
+(documentos por segundo) e a previsão de término, que o app consulta periodicamente.
+Fechar ou recarregar o navegador não interrompe o executor; se ele próprio for
+interrompido, a próxima execução retoma a tarefa: o resultado do cálculo fica gravado
+e os PDFs já gerados não são refeitos (ver esocial.pdf.gerar_pdfs_em_disco). Uma
+tarefa interrompida MAX_TENTATIVAS vezes é dada como falha."""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import traceback
+import uuid
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from esocial.acervo import Acervo
+from esocial.cache import CacheLeitura
+from esocial.diagnostico import Diagnostico
+from esocial.leitura import processar_arquivos
+from esocial.mapeamentos import Mapeamentos
+from esocial.pdf import compactar_pdfs, gerar_pdfs_em_disco
+
+DIRETORIO_TAREFAS = os.path.join(os.path.expanduser('~'), '.local', 'share', 'informeesocial', 'tarefas')
+ESTADOS = ('na_fila', 'executando', 'concluida', 'falhou')
+# Intervalo mínimo entre gravações do progresso no estado
+INTERVALO_PROGRESSO = 1.0
+# Execuções interrompidas (executor encerrado no meio) antes de a tarefa ser dada como falha
+MAX_TENTATIVAS = 3
+
+def _gravar_json(caminho, dados):
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False)
+    os.replace(caminho + '.tmp', caminho)
+
+def _ler_json(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return json.load(f)
+
+def _travar(arquivo):
+    """Trava exclusiva e não bloqueante no arquivo aberto; False se outro processo a detém."""
+    try:
+        if fcntl: fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else: msvcrt.locking(arquivo.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+class Tarefas:
+    def __init__(self, diretorio=DIRETORIO_TAREFAS):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, tarefa, *partes):
+        return os.path.join(self.diretorio, tarefa, *partes)
+
+    def criar(self, zips, ano, empregador_nome, empregador_cnpj, rubricas=None, df_manuais=None,
+              pdf=True, excel=True, excel_detalhado=False, workers=None, nomes=None, acervo=None,
+              tamanho_parte=None, mapeamentos=None):
+        """Copia os ZIPs (caminhos ou arquivos) para a tarefa e a coloca na fila; devolve o id.
+        Os parâmetros são os de motor.gerar_informes; `nomes` ({CPF: nome}) corrige os nomes
+        lidos do S-2200 e `acervo`, o CNPJ de uma base local, substitui os ZIPs pela base.
+        De `mapeamentos` fica gravado o diretório, lido de novo quando a tarefa roda."""
+        tarefa = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        tmp = os.path.join(self.diretorio, f".tmp-{tarefa}")
+        os.makedirs(os.path.join(tmp, 'entrada'))
+        for i, arquivo in enumerate(zips):
+            with open(os.path.join(tmp, 'entrada', f"{i:04d}.zip"), 'wb') as destino:
+                if isinstance(arquivo, (str, os.PathLike)):
+                    with open(arquivo, 'rb') as origem: shutil.copyfileobj(origem, destino)
+                else:
+                    arquivo.seek(0)
+                    shutil.copyfileobj(arquivo, destino)
+        manuais = df_manuais.to_dict('records') if df_manuais is not None and not df_manuais.empty else []
+        _gravar_json(os.path.join(tmp, 'parametros.json'), {
+            'ano': int(ano), 'empregador_nome': empregador_nome, 'empregador_cnpj': empregador_cnpj,
+            'rubricas': rubricas, 'manuais': manuais, 'pdf': pdf, 'excel': excel,
+            'excel_detalhado': excel_detalhado, 'workers': workers, 'nomes': nomes, 'acervo': acervo,
+            'tamanho_parte': tamanho_parte, 'mapeamentos': os.fspath(mapeamentos.diretorio) if mapeamentos else None,
+        })
+        _gravar_json(os.path.join(tmp, 'estado.json'), {
+            'id': tarefa, 'estado': 'na_fila', 'criada': time.time(), 'etapa': None, 'concluidos': 0, 'total': 0,
+            'docs_por_segundo': None, 'eta_segundos': None, 'arquivos': [], 'erro': None, 'tentativas': 0,
+        })
+        os.rename(tmp, self._caminho(tarefa))
+        return tarefa
+
+    def estado(self, tarefa):
+        return _ler_json(self._caminho(tarefa, 'estado.json'))
+
+    def listar(self):
+        """Estados de todas as tarefas, da mais antiga para a mais recente."""
+        estados = []
+        for nome in sorted(os.listdir(self.diretorio)):
+            if nome.startswith('.') or not os.path.isdir(self._caminho(nome)): continue
+            try:
+                estados.append(self.estado(nome))
+            except (OSError, ValueError):
+                continue
+        return sorted(estados, key=lambda e: e['criada'])
+
+    def remover(self, tarefa):
+        shutil.rmtree(self._caminho(tarefa), ignore_errors=True)
+
+    def pendentes(self):
+        # "executando" sem executor vivo é uma tarefa interrompida: volta para a fila
+        return [e for e in self.listar() if e['estado'] in ('na_fila', 'executando')]
+
+    def executor_ativo(self):
+        with open(os.path.join(self.diretorio, 'executor.lock'), 'a+') as trava:
+            livre = _travar(trava)
+        return not livre
+
+    def iniciar_executor(self):
+        """Dispara o executor em segundo plano se houver tarefas pendentes e nenhum executor ativo."""
+        if not self.pendentes() or self.executor_ativo(): return False
+        opcoes = {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP} if sys.platform == 'win32' else {'start_new_session': True}
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with open(os.path.join(self.diretorio, 'executor.log'), 'ab') as log:
+            subprocess.Popen([sys.executable, '-m', 'esocial.tarefas', self.diretorio], cwd=raiz,
+                             stdout=log, stderr=log, stdin=subprocess.DEVNULL, **opcoes)
+        return True
+
+    def executar_fila(self):
+        """Atende a fila até esvaziá-la. Só um executor por diretório (trava em executor.lock)."""
+        with open(os.path.join(self.diretorio, 'executor.lock'), 'a+') as trava:
+            if not _travar(trava): return
+            while True:
+                pendentes = self.pendentes()
+                if not pendentes: return
+                self.executar(pendentes[0]['id'])
+
+    def executar(self, tarefa):
+        estado = self.estado(tarefa)
+        if estado['tentativas'] >= MAX_TENTATIVAS:
+            # a tarefa derrubou o executor em todas as tentativas (ex.: falta de memória)
+            estado.update(estado='falhou', erro=f"Interrompida {estado['tentativas']} vezes sem concluir.")
+            estado['finalizada'] = time.time()
+            _gravar_json(self._caminho(tarefa, 'estado.json'), estado)
+            return
+        estado.update(estado='executando', erro=None, tentativas=estado['tentativas'] + 1)
+        _gravar_json(self._caminho(tarefa, 'estado.json'), estado)
+        try:
+            _Execucao(self, tarefa, estado).rodar()
+            estado.update(estado='concluida', etapa=None, eta_segundos=0)
+        except Exception as e:
+            estado.update(estado='falhou', erro=f"{type(e).__name__}: {e}")
+            traceback.print_exc()
+        estado['finalizada'] = time.time()
+        _gravar_json(self._caminho(tarefa, 'estado.json'), estado)
+
+class _Execucao:
+    """Uma execução (ou retomada) de tarefa; as etapas concluídas ficam gravadas no diretório dela."""
+    def __init__(self, tarefas, tarefa, estado):
+        self.caminho = lambda *partes: tarefas._caminho(tarefa, *partes)
+        self.estado = estado
+        self.parametros = _ler_json(self.caminho('parametros.json'))
+        self._gravado = 0.0
+
+    def _progresso(self, etapa, concluidos, total, inicio=None, feitos_antes=0):
+        agora = time.monotonic()
+        self.estado.update(etapa=etapa, concluidos=concluidos, total=total)
+        if inicio is not None and agora > inicio and concluidos > feitos_antes:
+            vazao = (concluidos - feitos_antes) / (agora - inicio)
+            self.estado.update(docs_por_segundo=round(vazao, 2), eta_segundos=round((total - concluidos) / vazao, 1))
+        if agora - self._gravado >= INTERVALO_PROGRESSO or concluidos == total:
+            _gravar_json(self.caminho('estado.json'), self.estado)
+            self._gravado = agora
+
+    def rodar(self):
+        p = self.parametros
+        saida = self.caminho('saida')
+        os.makedirs(saida, exist_ok=True)
+        if not os.path.exists(self.caminho('dados.json')):
+            dados = self._calcular(saida)
+            _gravar_json(self.caminho('dados.json'), dados)
+        else:
+            dados = _ler_json(self.caminho('dados.json'))
+        arquivos = [os.path.join(saida, "Relatorio_Conferencia.xlsx")] if p['excel'] else []
+
+        if p['pdf']:
+            pdfs = self.caminho('pdfs')
+            # só os PDFs completos: um .tmp é o que a interrupção deixou pela metade
+            ja_gerados = sum(nome.endswith('.pdf') for nome in os.listdir(pdfs)) if os.path.isdir(pdfs) else 0
+            inicio = time.monotonic()
+            gerar_pdfs_em_disco(dados, str(p['ano']), pdfs, workers=p['workers'],
+                                progresso=lambda feitos, total: self._progresso('pdf', feitos, total, inicio, ja_gerados))
+            self._progresso('zip', len(dados), len(dados))
+            destino = os.path.join(saida, f"Informes_PDF_{p['ano']}.zip")
+            zips = compactar_pdfs(dados, pdfs, destino, p.get('tamanho_parte'))
+            shutil.rmtree(pdfs, ignore_errors=True)
+            arquivos[:0] = zips
+        self.estado['arquivos'] = arquivos
+
+    def _calcular(self, saida):
+        """Leitura e, pelo motor (sem os PDFs), auditoria, rubricas, cálculo e Excel; devolve os itens do cálculo."""
+        # importado aqui: o motor importa este módulo
+        from esocial.motor import _gerar
+        p = self.parametros
+        entrada = self.caminho('entrada')
+        zips = [os.path.join(entrada, nome) for nome in sorted(os.listdir(entrada))]
+        self._progresso('leitura', 0, 1)
+        if p['acervo']:
+            dados_lidos = Acervo(p['acervo'], p['ano']).carregar()
+        else:
+            dados_lidos = processar_arquivos(zips, workers=p['workers'], cache=CacheLeitura(),
+                                             progresso=lambda fracao: self._progresso('leitura', round(fracao * 100), 100))
+        df_1200, df_1210, mapa_nomes, *cadastros = dados_lidos
+        dados_lidos = (df_1200, df_1210, dict(mapa_nomes, **(p['nomes'] or {})), *cadastros)
+        self._progresso('calculo', 0, 1)
+        mapeamentos = Mapeamentos(p['mapeamentos']) if p.get('mapeamentos') else None
+        resumo = _gerar(dados_lidos, p['ano'], p['empregador_nome'], p['empregador_cnpj'], p['rubricas'],
+                        pd.DataFrame(p['manuais']), p['workers'], False, p['excel'], p['excel_detalhado'], Diagnostico(),
+                        None, os.path.join(saida, "Relatorio_Conferencia.xlsx"), mapeamentos=mapeamentos)
+        return resumo['dados']
+
+if __name__ == '__main__':
+    Tarefas(*sys.argv[1:2]).executar_fila()
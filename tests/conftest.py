@@ -0,0 +1,27 @@
+import pytest
+
+from benchmarks.dataset_sintetico import gerar_dataset
+from esocial.leitura import processar_arquivos
+
+@pytest.fixture(scope='session')
+def dataset(tmp_path_factory):
+    """dataset(**parâmetros de gerar_dataset) -> caminhos dos ZIPs sintéticos, gerados uma
+    vez por sessão para cada combinação de parâmetros. Os ZIPs são compartilhados: copie
+    antes de alterar."""
+    gerados = {}
+    def gerar(**parametros):
+        chave = tuple(sorted(parametros.items()))
+        if chave not in gerados: gerados[chave] = gerar_dataset(tmp_path_factory.mktemp('zips'), **parametros)
+        return gerados[chave]
+    return gerar
+
+@pytest.fixture(scope='session')
+def lido(dataset):
+    """lido(**parâmetros de gerar_dataset) -> processar_arquivos(dataset(...), workers=1),
+    lido uma vez por sessão. Os DataFrames e mapas devolvidos não devem ser alterados."""
+    lidos = {}
+    def ler(**parametros):
+        chave = tuple(sorted(parametros.items()))
+        if chave not in lidos: lidos[chave] = processar_arquivos(dataset(**parametros), workers=1)
+        return lidos[chave]
+    return ler
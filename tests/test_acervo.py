@@ -0,0 +1,75 @@
+import shutil
+import zipfile
+
+import pandas as pd
+import pytest
+
+from esocial import acervo as modulo_acervo
+from esocial.acervo import Acervo
+from esocial.leitura import processar_arquivos
+
+CNPJ = '12345678'
+
+def _exclusao(cpf, competencia):
+    # S-3000 gerado depois de todos os eventos do conjunto sintético
+    return (f'<eSocial xmlns="http://www.esocial.gov.br/schema/evt/evtExclusao/v_S_01_02_00">'
+            f'<evtExclusao Id="ID1{CNPJ.ljust(14, "0")}{10**18:019d}"><ideEmpregador><tpInsc>1</tpInsc><nrInsc>{CNPJ}</nrInsc>'
+            f'</ideEmpregador><infoExclusao><tpEvento>S-1200</tpEvento><nrRecEvt>1.1.1</nrRecEvt><ideTrabalhador>'
+            f'<cpfTrab>{cpf}</cpfTrab></ideTrabalhador><ideFolhaPagto><perApur>{competencia}</perApur></ideFolhaPagto>'
+            f'</infoExclusao></evtExclusao></eSocial>')
+
+@pytest.fixture
+def envios(tmp_path, dataset):
+    caminhos = dataset(funcionarios=30, meses=6, cnpj=CNPJ)
+    exclusao = tmp_path / 'exclusao.zip'
+    with zipfile.ZipFile(exclusao, 'w') as z:
+        z.writestr('S-3000/1.xml', _exclusao('10000000000', '2025-01'))
+    # um mês reenviado junto com o seguinte, como a folha costuma mandar
+    reenvio = tmp_path / 'reenvio.zip'
+    shutil.copy(caminhos[2], reenvio)
+    return [*caminhos, str(exclusao)], [[c] for c in caminhos[:3]] + [[str(reenvio), caminhos[3]]] + [[c] for c in caminhos[4:]] + [[str(exclusao)]]
+
+def _comparar(obtido, esperado):
+    for df_obtido, df_esperado in zip(obtido[:2], esperado[:2]):
+        pd.testing.assert_frame_equal(df_obtido, df_esperado)
+    assert obtido[2:] == esperado[2:]
+
+def test_acervo_incremental_igual_a_leitura_completa(tmp_path, envios):
+    todos, por_envio = envios
+    completo = processar_arquivos(todos, workers=1)
+    assert '10000000000' not in set(completo[0].loc[completo[0]['Competencia'] == '2025-01', 'CPF'])
+
+    acervo = Acervo(CNPJ, 2025, tmp_path / 'acervo')
+    resumos = [acervo.adicionar(zips, workers=1) for zips in por_envio]
+    assert resumos[3]['repetidos'] > 0 and all(r['novos'] > 0 for r in resumos)
+    assert acervo.adicionar(todos[:2], workers=1) == {'novos': 0, 'repetidos': resumos[0]['novos'] + resumos[1]['novos'],
+                                                      'falhas': 0, 'descartados': 0}
+    _comparar(acervo.carregar(), completo)
+
+def test_acervo_compactado_igual_a_leitura_completa(tmp_path, envios, monkeypatch):
+    todos, por_envio = envios
+    monkeypatch.setattr(modulo_acervo, 'LIMITE_PARTES', 3)
+    acervo = Acervo(CNPJ, 2025, tmp_path / 'acervo')
+    for zips in por_envio: acervo.adicionar(zips, workers=1)
+    assert len(acervo.partes()) <= 3
+    _comparar(acervo.carregar(), processar_arquivos(todos, workers=1))
+
+def test_descarta_eventos_de_outro_empregador_ou_ano(tmp_path, dataset, lido):
+    proprios = dataset(funcionarios=10, meses=3, cnpj=CNPJ)
+    outro_empregador = dataset(funcionarios=5, meses=2, cnpj='87654321')
+    outro_ano = [c for c in dataset(funcionarios=5, meses=2, ano=2024, cnpj=CNPJ) if 'folha' in c]
+    acervo = Acervo(f'{CNPJ}000190', 2025, tmp_path / 'acervo')
+    envio = acervo.adicionar([*proprios, *outro_empregador, *outro_ano], workers=1)
+    assert envio['descartados'] > 0 and envio['falhas'] == 0
+    _comparar(acervo.carregar(), lido(funcionarios=10, meses=3, cnpj=CNPJ))
+
+def test_xml_com_falha_fica_fora_da_base_e_e_relido(tmp_path, dataset):
+    caminhos = [shutil.copy(c, tmp_path) for c in dataset(funcionarios=5, meses=1, cnpj=CNPJ)]
+    with zipfile.ZipFile(caminhos[-1], 'a') as z:
+        z.writestr('S-1200/quebrado.xml', '<eSocial><evtRemun Id="ID1">')
+    acervo = Acervo(CNPJ, 2025, tmp_path / 'acervo')
+    primeiro = acervo.adicionar(caminhos, workers=1)
+    assert primeiro['falhas'] == 1
+    assert not any(chave.startswith('quebrado.xml:') for chave in acervo.membros())
+    segundo = acervo.adicionar(caminhos, workers=1)
+    assert segundo == {'novos': 0, 'repetidos': primeiro['novos'], 'falhas': 1, 'descartados': 0}
@@ -0,0 +1,60 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from esocial.auditoria import COLUNAS_MESES_FALTANTES, COLUNAS_PENDENCIAS, COLUNAS_SEM_RUBRICA, auditar
+
+ANO = 2025
+
+def _auditoria_original(df_1200, df_1210, mapa_nomes, mapa_admissao, mapa_demissao, ano):
+    """A auditoria antes da vetorização: um laço por CPF."""
+    cpfs_1200, cpfs_1210 = set(df_1200['CPF'].unique()), set(df_1210['CPF'].unique())
+    pagos = set(zip(*(df_1210.loc[df_1210['Tipo'] == 'Pagamento_Check', c] for c in ('CPF', 'Competencia_Paga'))))
+    sem_rubrica, meses_faltantes, pendencias = [], [], []
+    for cpf in sorted(cpfs_1200 | cpfs_1210):
+        nome = mapa_nomes.get(cpf, f"CPF {cpf}")
+        if cpf not in cpfs_1200:
+            sem_rubrica.append({"CPF": cpf, "Nome": nome, "Obs": "Nenhum S-1200 encontrado. Impossível calcular Bruto/INSS."})
+            continue
+        encontradas = set(df_1200[df_1200['CPF'] == cpf]['Competencia'].unique())
+        mes_inicio, mes_fim = 1, 12
+        dt_adm_str, dt_dem_str, regra = "Não encontrada (S-2200/2300 ausente)", "Ativo", "Ano Completo"
+        if cpf in mapa_admissao:
+            dt_adm = datetime.datetime.strptime(mapa_admissao[cpf], "%Y-%m-%d")
+            dt_adm_str = dt_adm.strftime('%d/%m/%Y')
+            if dt_adm.year == ano: mes_inicio, regra = dt_adm.month, f"Início em {dt_adm_str}"
+            elif dt_adm.year > ano: mes_inicio = 13
+        if cpf in mapa_demissao:
+            dt_dem = datetime.datetime.strptime(mapa_demissao[cpf], "%Y-%m-%d")
+            dt_dem_str = dt_dem.strftime('%d/%m/%Y')
+            if dt_dem.year == ano: mes_fim, regra = dt_dem.month, f"Término em {dt_dem_str}"
+            elif dt_dem.year < ano: mes_fim = 0
+        faltantes = [m for m in (f"{ano}-{mes:02d}" for mes in range(mes_inicio, mes_fim + 1)) if m not in encontradas]
+        if faltantes:
+            meses_faltantes.append({"CPF": cpf, "Nome": nome, "Meses Faltantes": ", ".join(faltantes), "Data Admissão/Início": dt_adm_str,
+                                    "Data Demissão/Fim": dt_dem_str, "Regra Aplicada": regra})
+        for comp in encontradas:
+            if (cpf, comp) not in pagos:
+                pendencias.append({"CPF": cpf, "Nome": nome, "Competencia Faltante": comp, "Data Pagamento (DD/MM/AAAA)": "",
+                                   "IRRF Manual (R$)": 0.0})
+    return sem_rubrica, meses_faltantes, pendencias
+
+@pytest.fixture(scope='module')
+def dados(lido):
+    df_1200, df_1210, nomes, admissao, demissao, _ = lido(funcionarios=80, meses=12, taxa_pagamento_faltante=0.1, ano=ANO)
+    cpfs = sorted(df_1200['CPF'].unique())
+    # um CPF só com S-1210, outro sem alguns meses e outro sem cadastro
+    df_1200 = df_1200[(df_1200['CPF'] != cpfs[0]) & ~((df_1200['CPF'] == cpfs[1]) & df_1200['Competencia'].isin(['2025-03', '2025-07']))]
+    admissao = {cpf: data for cpf, data in admissao.items() if cpf != cpfs[2]}
+    return df_1200, df_1210, nomes, admissao, demissao
+
+def test_auditoria_igual_a_original(dados):
+    sem_rubrica, meses_faltantes, pendencias = auditar(*dados, ANO)
+    esperado = _auditoria_original(*dados, ANO)
+    assert len(esperado[0]) == 1 and esperado[1] and esperado[2]
+    pd.testing.assert_frame_equal(sem_rubrica, pd.DataFrame(esperado[0], columns=COLUNAS_SEM_RUBRICA))
+    pd.testing.assert_frame_equal(meses_faltantes, pd.DataFrame(esperado[1], columns=COLUNAS_MESES_FALTANTES))
+    # a original percorre as competências de um conjunto, sem ordem definida
+    pendencias_originais = pd.DataFrame(esperado[2], columns=COLUNAS_PENDENCIAS).sort_values(['CPF', 'Competencia Faltante'])
+    pd.testing.assert_frame_equal(pendencias, pendencias_originais.reset_index(drop=True))
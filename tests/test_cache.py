@@ -0,0 +1,47 @@
+import os
+
+import pandas as pd
+
+from esocial import cache as modulo_cache
+from esocial.cache import CacheLeitura
+from esocial.diagnostico import Diagnostico
+from esocial.eventos import VERSAO_LEITOR
+from esocial.leitura import processar_arquivos
+
+def _lidos_do_cache(zips, cache):
+    diagnostico = Diagnostico()
+    resultado = processar_arquivos(zips, workers=1, cache=cache, diagnostico=diagnostico)
+    return resultado, [z['cache'] for z in diagnostico.por_zip.values()]
+
+def test_chave_muda_com_a_versao_do_leitor(tmp_path, dataset, monkeypatch):
+    zips = dataset(funcionarios=5, meses=1)
+    cache = CacheLeitura(tmp_path / 'cache')
+    chave = cache.chave(zips[0])
+    assert chave.endswith(f"-v{VERSAO_LEITOR}")
+
+    primeira, do_cache = _lidos_do_cache(zips, cache)
+    assert not any(do_cache)
+    segunda, do_cache = _lidos_do_cache(zips, cache)
+    assert all(do_cache)
+    pd.testing.assert_frame_equal(segunda[0], primeira[0])
+    assert segunda[2:] == primeira[2:]
+
+    # um leitor novo não aproveita o que o anterior gravou
+    monkeypatch.setattr(modulo_cache, 'VERSAO_LEITOR', VERSAO_LEITOR + 1)
+    assert cache.chave(zips[0]) == chave.rsplit('-v', 1)[0] + f"-v{VERSAO_LEITOR + 1}"
+    assert not any(_lidos_do_cache(zips, cache)[1])
+
+def test_acima_do_limite_descarta_a_entrada_usada_ha_mais_tempo(tmp_path):
+    tabelas, mapas = {'t': pd.DataFrame({'a': range(100)})}, {'m': {}}
+    cache = CacheLeitura(tmp_path / 'cache')
+    cache.guardar('a', tabelas, mapas)
+    tamanho = sum(e.stat().st_size for e in os.scandir(tmp_path / 'cache' / 'a'))
+    cache.limite_bytes = int(2.5 * tamanho)
+    os.utime(tmp_path / 'cache' / 'a', (1000, 1000))
+    cache.guardar('b', tabelas, mapas)
+    os.utime(tmp_path / 'cache' / 'b', (2000, 2000))
+    assert cache.carregar('a') is not None  # o acesso torna 'a' a mais recente
+
+    cache.guardar('c', tabelas, mapas)
+    assert cache.carregar('b') is None
+    assert cache.carregar('a') is not None and cache.carregar('c') is not None
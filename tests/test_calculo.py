@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from esocial.calculo import (CATEGORIAS, calcular_funcionario, calcular_todos_funcionarios, detalhe_por_competencia,
+                             indice_por_cpf, totais_por_cpf)
+from esocial.rubricas import classificar_rubricas, rubricas_unicas
+
+def _calculo_original(df_1200, df_1210, df_manuais, rubricas):
+    """O cálculo antes da vetorização: um laço por CPF somando os itens pagos, em ordem de leitura."""
+    resultados = {}
+    for cpf in sorted(set(df_1200['CPF'].unique())):
+        itens = df_1200[df_1200['CPF'] == cpf].to_dict('records')
+        pagas = set(df_1210[(df_1210['CPF'] == cpf) & (df_1210['Tipo'] == 'Pagamento_Check')]['Competencia_Paga'].unique())
+        manual_cpf = df_manuais[df_manuais['CPF'] == cpf]
+        pagas |= set(manual_cpf['Competencia Faltante'].unique())
+        validos = [i for i in itens if i['Competencia'] in pagas or len(i['Competencia']) == 4]
+        def somar(categoria): return sum(i['Valor'] for i in validos if i['Rubrica'] in rubricas[categoria])
+        calculados = {categoria: somar(categoria) for categoria in CATEGORIAS}
+        calculados['v_irrf'] += manual_cpf['IRRF Manual (R$)'].sum()
+        calculados['v_13_liq'] = calculados['v_13_bruto'] - calculados['v_13_inss']
+        resultados[cpf] = calculados
+    return resultados
+
+@pytest.fixture(scope='module')
+def dados(lido):
+    df_1200, df_1210, nomes, _, _, s1010 = lido(funcionarios=60, meses=12, taxa_pagamento_faltante=0.2)
+    rubricas = classificar_rubricas(rubricas_unicas(df_1200), s1010, 2025)
+    pagas = set(zip(df_1210['CPF'].astype(str), df_1210['Competencia_Paga'].astype(str)))
+    faltantes = sorted({(cpf, comp) for cpf, comp in zip(df_1200['CPF'].astype(str), df_1200['Competencia'].astype(str))
+                        if len(comp) == 7 and (cpf, comp) not in pagas})
+    assert faltantes
+    df_manuais = pd.DataFrame([{'CPF': cpf, 'Competencia Faltante': comp, 'IRRF Manual (R$)': 12.34}
+                               for cpf, comp in faltantes[::2]])
+    return df_1200, df_1210, df_manuais, rubricas, nomes
+
+def test_totais_iguais_ao_calculo_original_em_centavos(dados):
+    df_1200, df_1210, df_manuais, rubricas, nomes = dados
+    original = _calculo_original(df_1200, df_1210, df_manuais, rubricas)
+    resultados = calcular_todos_funcionarios(df_1200, df_1210, df_manuais, rubricas, nomes, 'EMPRESA', '12345678')
+    assert [r['cpf'] for r in resultados] == list(original)
+    for r in resultados:
+        esperado = {chave: round(valor, 2) for chave, valor in original[r['cpf']].items()}
+        assert {chave: r['calculados'][chave] for chave in esperado} == esperado
+
+def test_detalhe_soma_os_totais(dados):
+    df_1200, df_1210, df_manuais, rubricas, nomes = dados
+    resultados = calcular_todos_funcionarios(df_1200, df_1210, df_manuais, rubricas, nomes, 'EMPRESA', '12345678')
+    somas = detalhe_por_competencia(df_1200, df_1210, df_manuais, rubricas).groupby('CPF')[list(CATEGORIAS)].sum()
+    for r in resultados:
+        for categoria in CATEGORIAS:
+            assert somas.loc[r['cpf'], categoria] == pytest.approx(r['calculados'][categoria], abs=0.005)
+
+def test_funcionario_igual_ao_lote(dados):
+    df_1200, df_1210, df_manuais, rubricas, nomes = dados
+    resultados = calcular_todos_funcionarios(df_1200, df_1210, df_manuais, rubricas, nomes, 'EMPRESA', '12345678')
+    indice = indice_por_cpf(df_1200, df_1210)
+    for r in resultados:
+        assert calcular_funcionario(r['cpf'], df_1200, df_1210, df_manuais, rubricas, nomes, 'EMPRESA', '12345678', indice) == r
+    assert calcular_funcionario('99999999999', df_1200, df_1210, df_manuais, rubricas, nomes, 'EMPRESA', '12345678', indice) is None
+
+def test_13_liquido_calculado_antes_do_arredondamento():
+    # 0,135 arredonda para 0,14 e 0,005 para 0,00: subtrair os valores já arredondados daria 0,14
+    df_1200 = pd.DataFrame({'CPF': '00000000001', 'Competencia': '2025', 'Rubrica': ['1300', '9202'],
+                            'Valor': [0.135, 0.005], 'CNPJ_Emp': '12345678'})
+    df_1210 = pd.DataFrame(columns=['CPF', 'Competencia_Paga', 'Tipo', 'CNPJ', 'ANS', 'Valor', 'CNPJ_Emp'])
+    rubricas = dict(dict.fromkeys(CATEGORIAS, []), v_13_bruto=['1300'], v_13_inss=['9202'])
+    totais = totais_por_cpf(df_1200, df_1210, pd.DataFrame(), rubricas).loc['00000000001']
+    assert (totais['v_13_bruto'], totais['v_13_inss'], totais['v_13_liq']) == (0.14, 0.0, 0.13)
@@ -0,0 +1,47 @@
+import io
+import json
+import zipfile
+
+from esocial import diagnostico as modulo_diagnostico
+from esocial.diagnostico import Diagnostico
+from esocial.leitura import processar_arquivos
+
+def _s1200(trabalhador):
+    return ('<eSocial><evtRemun Id="ID1"><ideEvento><indRetif>1</indRetif><perApur>2025-01</perApur></ideEvento>'
+            '<ideEmpregador><tpInsc>1</tpInsc><nrInsc>12345678</nrInsc></ideEmpregador>'
+            f'{trabalhador}<dmDev><infoPerApur><ideEstabLot><remunPerApur><itensRemun><codRubr>1000</codRubr>'
+            '<vrRubr>10.00</vrRubr></itensRemun></remunPerApur></ideEstabLot></infoPerApur></dmDev></evtRemun></eSocial>')
+
+def _envio():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        z.writestr('S-1200/ok.xml', _s1200('<ideTrabalhador><cpfTrab>00000000001</cpfTrab></ideTrabalhador>'))
+        z.writestr('S-1200/sem_cpf.xml', _s1200(''))
+        z.writestr('S-1200/quebrado.xml', '<eSocial><evtRemun>')
+        z.writestr('S-1000/empregador.xml', '<eSocial><evtInfoEmpregador Id="ID2"/></eSocial>')
+        z.writestr('vazio.xml', '<eSocial/>')
+    buffer.seek(0)
+    buffer.name = 'envio.zip'
+    return buffer
+
+def test_conta_eventos_e_registra_as_falhas_por_zip(tmp_path):
+    diagnostico = Diagnostico()
+    df_1200 = processar_arquivos([_envio()], workers=1, diagnostico=diagnostico)[0]
+    assert len(df_1200) == 1
+    assert dict(diagnostico.eventos) == {'S-1200': 1, 'falha': 2, 'ignorado:evtInfoEmpregador': 1, 'sem_evento': 1}
+    assert diagnostico.por_zip['envio.zip']['membros'] == 5 and diagnostico.por_zip['envio.zip']['falhas'] == 2
+    motivos = {f['arquivo']: f['motivo'] for f in diagnostico.falhas}
+    assert motivos['S-1200/sem_cpf.xml'] == "evtRemun: campos obrigatórios ausentes"
+    assert motivos['S-1200/quebrado.xml'].startswith("XML inválido")
+    assert {'leitura', 'deduplicacao', 'dataframe'} <= set(diagnostico.etapas)
+    assert all(diagnostico.etapas[e]['chamadas'] >= 1 for e in diagnostico.etapas)
+
+    destino = tmp_path / 'diagnostico.json'
+    diagnostico.salvar_json(destino)
+    assert json.loads(destino.read_text(encoding='utf-8')) == json.loads(json.dumps(diagnostico.para_dict()))
+
+def test_guarda_as_falhas_ate_o_limite_mas_conta_todas(monkeypatch):
+    monkeypatch.setattr(modulo_diagnostico, 'LIMITE_FALHAS', 1)
+    diagnostico = Diagnostico()
+    processar_arquivos([_envio()], workers=1, diagnostico=diagnostico)
+    assert len(diagnostico.falhas) == 1 and diagnostico.total_falhas == 2
@@ -0,0 +1,56 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from esocial import excel as modulo_excel
+from esocial.calculo import CATEGORIAS
+from esocial.excel import gerar_excel
+
+CALCULADOS = {'v_bruto': 84512.37, 'v_inss': 9012.5, 'v_irrf': 7421.09, 'v_13_liq': 6291.66, 'v_13_bruto': 7042.7,
+              'v_13_inss': 751.04, 'v_13_irrf': 0.0, 'txt_saude': "Plano A: R$ 10,00\nPlano B: R$ 5,00"}
+DADOS = [{'cpf': '00000000001', 'nome': 'MARIA', 'calculados': CALCULADOS},
+         {'cpf': '00000000002', 'nome': 'JOSE', 'calculados': dict(CALCULADOS, v_bruto=1000.0)}]
+
+def _ler(buffer):
+    buffer.seek(0)
+    return pd.read_excel(buffer, sheet_name=None, dtype={'CPF': str, 'Rubrica': str})
+
+def test_so_conferencia_sem_as_planilhas_opcionais():
+    buffer = io.BytesIO()
+    gerar_excel(DADOS, buffer)
+    planilhas = _ler(buffer)
+    assert list(planilhas) == ['Conferência']
+    conferencia = planilhas['Conferência']
+    assert list(conferencia.columns) == ["CPF", "Nome", "Rend. Tributáveis", "INSS Oficial", "IRRF", "13º Líquido",
+                                         "13º Bruto", "INSS 13º", "IRRF 13º", "Info Saúde"]
+    assert conferencia['CPF'].tolist() == ['00000000001', '00000000002']
+    assert conferencia['Rend. Tributáveis'].tolist() == [84512.37, 1000.0]
+    assert conferencia.loc[0, 'Info Saúde'] == "Plano A: R$ 10,00 | Plano B: R$ 5,00"
+
+def test_planilhas_opcionais_divididas_no_limite_de_linhas(monkeypatch):
+    monkeypatch.setattr(modulo_excel, 'LINHAS_POR_PLANILHA', 2)
+    monkeypatch.setattr(modulo_excel, 'TAMANHO_BLOCO_EXCEL', 1)
+    detalhe = pd.DataFrame({'CPF': ['00000000001'] * 2 + ['00000000002'],
+                            'Competencia': ['2025-01', '2025-02', '2025-01'],
+                            **{c: [1.5, 2.0, np.nan] for c in CATEGORIAS}})
+    auditoria = (pd.DataFrame({'CPF': ['00000000003'], 'Nome': ['ANA']}),
+                 pd.DataFrame({'CPF': [], 'Meses': []}),
+                 pd.DataFrame({'CPF': ['00000000001'], 'IRRF Manual (R$)': [None]}))
+    resumo = pd.DataFrame({'Rubrica': ['1000', '9203'], 'Total': [1234.5, 10.0], 'Qtd': [3, 1]})
+    buffer = io.BytesIO()
+    gerar_excel(DADOS, buffer, detalhe=detalhe, auditoria=auditoria, resumo=resumo)
+    planilhas = _ler(buffer)
+    assert list(planilhas) == ['Conferência', 'Detalhe por Competência', 'Detalhe por Competência (2)',
+                               'Sem S-1200', 'Meses Faltantes', 'Pendências S-1210', 'Rubricas']
+
+    partes = pd.concat([planilhas['Detalhe por Competência'], planilhas['Detalhe por Competência (2)']], ignore_index=True)
+    assert partes['Nome'].tolist() == ['MARIA', 'MARIA', 'JOSE']
+    assert partes['Competência'].tolist() == ['2025-01', '2025-02', '2025-01']
+    assert partes['Rend. Tributáveis'].tolist()[:2] == [1.5, 2.0] and pd.isna(partes.loc[2, 'Rend. Tributáveis'])
+
+    assert planilhas['Sem S-1200'].to_dict('records') == [{'CPF': '00000000003', 'Nome': 'ANA'}]
+    assert planilhas['Meses Faltantes'].empty and list(planilhas['Meses Faltantes'].columns) == ['CPF', 'Meses']
+    assert pd.isna(planilhas['Pendências S-1210'].loc[0, 'IRRF Manual (R$)'])
+    assert planilhas['Rubricas'].to_dict('records') == [{'Rubrica': '1000', 'Total': 1234.5, 'Qtd': 3},
+                                                         {'Rubrica': '9203', 'Total': 10.0, 'Qtd': 1}]
@@ -0,0 +1,80 @@
+import io
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from esocial import leitura
+from esocial.diagnostico import Diagnostico
+from esocial.leitura import processar_arquivos
+
+def _zip(membros):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as z:
+        for nome, conteudo in membros.items():
+            z.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+def _aninhado(quantidade, tamanho):
+    # ZIP externo com `quantidade` ZIPs internos de cerca de `tamanho` bytes cada
+    internos = {f'lote{i}.zip': _zip({f'evento{i}.xml': '<eSocial/>', 'preenchimento.bin': b'x' * tamanho})
+                for i in range(quantidade)}
+    return io.BytesIO(_zip(internos))
+
+@pytest.mark.parametrize('limite, em_disco', [(250_000, 6), (64 * 1024 * 1024, 0)])
+def test_zips_aninhados_dividem_um_unico_limite_de_memoria(monkeypatch, limite, em_disco):
+    temporarios = []
+    temporary_file = tempfile.TemporaryFile
+    monkeypatch.setattr(tempfile, 'TemporaryFile', lambda *a, **k: temporarios.append(1) or temporary_file(*a, **k))
+    # dois envios com 4 ZIPs internos de ~100 kB: os 8 ficam abertos até o fim da leitura e,
+    # com 250 kB para todos, só 2 cabem em memória
+    diagnostico = Diagnostico()
+    processar_arquivos([_aninhado(4, 100_000), _aninhado(4, 100_000)], workers=1, diagnostico=diagnostico, limite_memoria=limite)
+    assert len(temporarios) == em_disco
+    assert sum(z['membros'] for z in diagnostico.por_zip.values()) == 8
+
+def test_zips_aninhados_fora_da_memoria_sao_lidos_igual(dataset):
+    caminhos = dataset(funcionarios=20, meses=3)
+    externo = io.BytesIO(_zip({os.path.basename(c): Path(c).read_bytes() for c in caminhos}))
+    em_disco = processar_arquivos([externo], workers=1, limite_memoria=0)
+    externo.seek(0)
+    em_memoria = processar_arquivos([externo], workers=1)
+    assert len(em_disco[0]) > 0
+    pd.testing.assert_frame_equal(em_disco[0], em_memoria[0])
+    pd.testing.assert_frame_equal(em_disco[1], em_memoria[1])
+    assert em_disco[2:] == em_memoria[2:]
+
+def _itens_s1200(caminhos):
+    """(CPF, perApur, codRubr, vrRubr) de todos os S-1200, lidos com o ElementTree completo."""
+    linhas = []
+    for caminho in caminhos:
+        with zipfile.ZipFile(caminho) as z:
+            for nome in z.namelist():
+                if not nome.startswith('S-1200/'): continue
+                evento = ET.fromstring(z.read(nome))
+                campos = {el.tag.rpartition('}')[2]: el for el in evento.iter()}
+                for item in evento.findall('.//{*}itensRemun'):
+                    linhas.append((campos['cpfTrab'].text, campos['perApur'].text, item.find('{*}codRubr').text,
+                                   float(item.find('{*}vrRubr').text)))
+    return pd.DataFrame(linhas, columns=['CPF', 'Competencia', 'Rubrica', 'Valor'])
+
+def test_colunas_categoricas_iguais_a_leitura_direta(dataset, monkeypatch):
+    # lotes pequenos: os códigos de cada lote são traduzidos para o domínio do total na junção
+    monkeypatch.setattr(leitura, 'TAMANHO_LOTE', 7)
+    caminhos = dataset(funcionarios=20, meses=3)
+    df_1200, df_1210, *_ = processar_arquivos(caminhos, workers=1)
+    for df, colunas in ((df_1200, ['CPF', 'Competencia', 'Rubrica', 'CNPJ_Emp']),
+                        (df_1210, ['CPF', 'Competencia_Paga', 'Tipo', 'CNPJ', 'ANS', 'CNPJ_Emp'])):
+        assert all(isinstance(df[c].dtype, pd.CategoricalDtype) for c in colunas)
+        assert df['Valor'].dtype == 'float64'
+    esperado = _itens_s1200(caminhos)
+    obtido = df_1200[esperado.columns].astype({'CPF': str, 'Competencia': str, 'Rubrica': str})
+    chaves = ['CPF', 'Competencia', 'Rubrica', 'Valor']
+    pd.testing.assert_frame_equal(obtido.sort_values(chaves, ignore_index=True), esperado.sort_values(chaves, ignore_index=True))
+    # textos ausentes (competência das linhas de plano de saúde) viram NaN, não uma categoria
+    saude = df_1210[df_1210['Tipo'] == 'Saude']
+    assert len(saude) and saude['Competencia_Paga'].isna().all() and saude['CNPJ'].notna().all()
@@ -0,0 +1,39 @@
+import pandas as pd
+
+from esocial.memo import Memo, impressao, tamanho_aproximado
+
+def test_obter_calcula_uma_vez_e_descarta_a_entrada_usada_ha_mais_tempo():
+    valor = list(range(10))
+    memo = Memo(int(2.5 * tamanho_aproximado(valor)))
+    chamadas = []
+    def calcular(chave):
+        chamadas.append(chave)
+        return list(valor)
+
+    assert memo.obter('a', lambda: calcular('a')) == valor
+    assert memo.obter('a', lambda: calcular('a')) == valor
+    assert (memo.acertos, memo.calculos) == (1, 1)
+
+    memo.obter('b', lambda: calcular('b'))
+    memo.obter('a', lambda: calcular('a'))  # 'a' passa a ser a mais recente
+    memo.obter('c', lambda: calcular('c'))
+    assert memo.bytes <= memo.limite_bytes
+    memo.obter('a', lambda: calcular('a'))
+    memo.obter('b', lambda: calcular('b'))
+    assert chamadas == ['a', 'b', 'c', 'b']
+
+def test_valor_maior_que_o_limite_nao_e_guardado():
+    memo = Memo(10)
+    chamadas = []
+    for _ in range(2): memo.obter('grande', lambda: chamadas.append(1) or list(range(100)))
+    assert len(chamadas) == 2 and memo.bytes == 0
+
+def test_impressao_estavel_e_sensivel_a_mudancas():
+    df = pd.DataFrame({'CPF': ['00000000001', '00000000002'], 'Valor': [10.0, 20.0]})
+    assert impressao(df, {'b': 1, 'a': [2]}) == impressao(df.copy(), {'a': [2], 'b': 1})
+    assert impressao(df) != impressao(df.assign(Valor=[10.0, 20.01]))
+    assert impressao(df) != impressao(df.rename(columns={'Valor': 'Total'}))
+    assert impressao(df) != impressao(df.iloc[:1])
+    assert impressao(df['CPF']) != impressao(df['CPF'].rename('Nome'))
+    # os valores não se misturam entre argumentos
+    assert impressao('ab', 'c') != impressao('a', 'bc')
@@ -0,0 +1,63 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from esocial.mapeamentos import Mapeamentos
+from esocial.motor import EmpregadorIncompleto, exportar_por_empregador, processar_arquivos
+
+EMPRESA_A, EMPRESA_B = '11111111', '22222222'
+EMPRESAS = {EMPRESA_A: {'nome': 'EMPRESA A LTDA', 'cnpj': '11111111000191'},
+            EMPRESA_B: {'nome': 'EMPRESA B LTDA', 'cnpj': '22.222.222/0001-91'}}
+
+@pytest.fixture(scope='module')
+def por_empregador(dataset):
+    # os dois empregadores têm os mesmos CPFs; só o A tem as competências de abril a junho
+    caminhos = (dataset(funcionarios=10, meses=6, cnpj=EMPRESA_A)
+                + dataset(funcionarios=10, meses=3, cnpj=EMPRESA_B, semente=7))
+    return processar_arquivos(caminhos, workers=1, por_empregador=True)
+
+def _irrf(caminho_zip, cpf):
+    with zipfile.ZipFile(caminho_zip) as z, z.open('Relatorio_Conferencia.xlsx') as f:
+        conferencia = pd.read_excel(f, sheet_name='Conferência', dtype={'CPF': str})
+    return conferencia.set_index('CPF').loc[cpf, 'IRRF']
+
+def test_correcao_manual_so_vale_para_o_empregador_da_competencia(tmp_path, por_empregador):
+    df_1210 = por_empregador[EMPRESA_A][1]
+    cpf = str(df_1210.loc[(df_1210['Tipo'] == 'Pagamento_Check') & (df_1210['Competencia_Paga'] == '2025-05'), 'CPF'].iloc[0])
+    manuais = pd.DataFrame([{'CPF': cpf, 'Competencia Faltante': '2025-05', 'Data Pagamento (DD/MM/AAAA)': '05/05/2025',
+                             'IRRF Manual (R$)': 100.0}])
+    sem = exportar_por_empregador(por_empregador, 2025, tmp_path / 'sem', EMPRESAS, workers=1, pdf=False)
+    com = exportar_por_empregador(por_empregador, 2025, tmp_path / 'com', EMPRESAS, df_manuais=manuais, workers=1, pdf=False)
+    irrf = {e: _irrf(com[e]['arquivos'][0], cpf) - _irrf(sem[e]['arquivos'][0], cpf) for e in (EMPRESA_A, EMPRESA_B)}
+    assert irrf == {EMPRESA_A: pytest.approx(100.0), EMPRESA_B: pytest.approx(0.0)}
+
+def test_cada_empregador_usa_o_mapeamento_salvo(tmp_path, por_empregador):
+    mapeamentos = Mapeamentos(tmp_path / 'mapeamentos')
+    rubricas = sorted(por_empregador[EMPRESA_A][0]['Rubrica'].unique())
+    mapeamentos.confirmar(EMPRESA_A, rubricas, {'v_bruto': ['1000'], 'v_irrf': ['9203']})
+    resumos = exportar_por_empregador(por_empregador, 2025, tmp_path / 'saida', EMPRESAS, workers=1, pdf=False, excel=False,
+                                      mapeamentos=mapeamentos)
+    assert resumos[EMPRESA_A]['rubricas']['v_bruto'] == ['1000']
+    assert resumos[EMPRESA_A]['rubricas']['v_inss'] == []
+    # sem mapeamento salvo, vale a classificação do S-1010
+    assert resumos[EMPRESA_B]['rubricas']['v_bruto'] == ['1000', '1010', '1020']
+
+def test_informes_saem_com_nome_e_cnpj_completo_da_fonte_pagadora(tmp_path, por_empregador):
+    pdfium = pytest.importorskip('pypdfium2')
+    resumos = exportar_por_empregador(por_empregador, 2025, tmp_path, EMPRESAS, workers=1, excel=False)
+    with zipfile.ZipFile(resumos[EMPRESA_B]['arquivos'][0]) as z:
+        pagina = pdfium.PdfDocument(z.read(z.namelist()[0]))[0]
+        texto = pagina.get_textpage().get_text_range()
+    assert 'EMPRESA B LTDA' in texto and '22.222.222/0001-91' in texto
+
+@pytest.mark.parametrize('empresa_b', [
+    None,
+    {'nome': 'EMPREGADOR 22222222', 'cnpj': '22222222000191'},
+    {'nome': 'EMPRESA B LTDA', 'cnpj': '22222222'},
+    {'nome': 'EMPRESA B LTDA', 'cnpj': '33333333000191'},
+])
+def test_recusa_empregador_sem_nome_ou_cnpj_completo(tmp_path, por_empregador, empresa_b):
+    with pytest.raises(EmpregadorIncompleto, match=EMPRESA_B):
+        exportar_por_empregador(por_empregador, 2025, tmp_path / 'saida', {**EMPRESAS, EMPRESA_B: empresa_b}, workers=1)
+    assert not (tmp_path / 'saida').exists()
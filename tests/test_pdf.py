@@ -0,0 +1,28 @@
+import pytest
+
+from esocial.pdf import renderizar_pdf
+
+pdfium = pytest.importorskip('pypdfium2')
+
+CADASTRAIS = {'CPF': '12345678901', 'Nome': 'MARIA DA SILVA', 'Empregador_Nome': 'EMPRESA EXEMPLO LTDA',
+              'Empregador_CNPJ': '12.345.678/0001-90'}
+CALCULADOS = {'v_bruto': 84512.37, 'v_inss': 9012.5, 'v_irrf': 7421.09, 'v_13_bruto': 7042.7, 'v_13_inss': 751.04,
+              'v_13_irrf': 612.33, 'v_13_liq': 6291.66, 'txt_saude': "Sem informações complementares."}
+SAUDE = "DESPESAS MÉDICAS/ODONTOLÓGICAS:\n" + "".join(
+    f"OPERADORA CNPJ: 1111111100019{i} (Reg. ANS: 12345{i}) - VALOR ANUAL: R$ 1.234,5{i}\n" for i in range(12))
+
+def _paginas(pdf):
+    documento = pdfium.PdfDocument(pdf)
+    return [pagina.render(scale=2).to_pil().tobytes() for pagina in documento]
+
+@pytest.mark.parametrize('calculados, cadastrais', [
+    (CALCULADOS, CADASTRAIS),
+    (dict(CALCULADOS, txt_saude=SAUDE), CADASTRAIS),
+    (dict(CALCULADOS, txt_saude=SAUDE * 5), CADASTRAIS),  # quebra de página
+    (dict(CALCULADOS, v_bruto=0.0, v_irrf=1234567.89), dict(CADASTRAIS, Nome='NOME MUITO LONGO ' * 6)),
+])
+def test_modelo_renderiza_igual_ao_layout_original(calculados, cadastrais):
+    original = _paginas(renderizar_pdf(calculados, cadastrais, '2025', usar_modelo=False))
+    # a segunda chamada já usa o rodapé guardado no modelo
+    for _ in range(2):
+        assert _paginas(renderizar_pdf(calculados, cadastrais, '2025')) == original
@@ -0,0 +1,75 @@
+import io
+import zipfile
+
+from esocial.leitura import processar_arquivos
+from esocial.retificacao import IndiceEventos, geracao
+
+CNPJ = '12345678'
+CPF = '11111111111'
+
+def _id(gerado, seq=1):
+    # Id oficial: ID + tpInsc + nrInsc (14) + AAAAMMDDHHMMSS + sequencial (5)
+    return f"ID1{CNPJ.ljust(14, '0')}{gerado}{seq:05d}"
+
+def _s1200(id_evento, valor, ind_retif='1', recibo=None):
+    recibo = f'<nrRecibo>{recibo}</nrRecibo>' if recibo else ''
+    return (f'<eSocial xmlns="http://www.esocial.gov.br/schema/evt/evtRemun/v_S_01_02_00"><evtRemun Id="{id_evento}">'
+            f'<ideEvento><indRetif>{ind_retif}</indRetif>{recibo}<indApuracao>1</indApuracao><perApur>2025-03</perApur></ideEvento>'
+            f'<ideEmpregador><tpInsc>1</tpInsc><nrInsc>{CNPJ}</nrInsc></ideEmpregador>'
+            f'<ideTrabalhador><cpfTrab>{CPF}</cpfTrab></ideTrabalhador><dmDev><ideDmDev>1</ideDmDev><infoPerApur>'
+            f'<ideEstabLot><remunPerApur><itensRemun><codRubr>1000</codRubr><vrRubr>{valor:.2f}</vrRubr></itensRemun>'
+            f'</remunPerApur></ideEstabLot></infoPerApur></dmDev></evtRemun></eSocial>')
+
+def _s3000(id_evento, recibo='1.1.0000000000000000001'):
+    return (f'<eSocial xmlns="http://www.esocial.gov.br/schema/evt/evtExclusao/v_S_01_02_00"><evtExclusao Id="{id_evento}">'
+            f'<ideEvento><tpAmb>1</tpAmb></ideEvento><ideEmpregador><tpInsc>1</tpInsc><nrInsc>{CNPJ}</nrInsc></ideEmpregador>'
+            f'<infoExclusao><tpEvento>S-1200</tpEvento><nrRecEvt>{recibo}</nrRecEvt>'
+            f'<ideTrabalhador><cpfTrab>{CPF}</cpfTrab></ideTrabalhador><ideFolhaPagto><perApur>2025-03</perApur></ideFolhaPagto>'
+            f'</infoExclusao></evtExclusao></eSocial>')
+
+def _valores(*xmls):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        for i, xml in enumerate(xmls):
+            z.writestr(f'{i:03d}.xml', xml)
+    buffer.seek(0)
+    df_1200 = processar_arquivos([buffer], workers=1)[0]
+    return sorted(df_1200['Valor'].tolist())
+
+def test_geracao_do_id_oficial():
+    assert geracao(_id('20250410083000', 7)) == '2025041008300000007'
+    assert geracao('ID-qualquer') is None
+    assert geracao(None) is None
+
+def test_reenvio_depois_da_exclusao_volta_a_valer():
+    assert _valores(_s1200(_id('20250405100000'), 100),
+                    _s3000(_id('20250406100000')),
+                    _s1200(_id('20250407100000'), 200)) == [200]
+
+def test_exclusao_so_atinge_versoes_anteriores_em_qualquer_ordem_de_leitura():
+    assert _valores(_s1200(_id('20250407100000'), 200),
+                    _s3000(_id('20250406100000')),
+                    _s1200(_id('20250405100000'), 100)) == [200]
+    assert _valores(_s3000(_id('20250408100000')),
+                    _s1200(_id('20250407100000'), 200),
+                    _s1200(_id('20250405100000'), 100)) == []
+
+def test_retificacao_mais_recente_prevalece_mesmo_lida_antes():
+    assert _valores(_s1200(_id('20250409100000'), 300, '2'),
+                    _s1200(_id('20250405100000'), 100),
+                    _s1200(_id('20250407100000'), 200, '2')) == [300]
+
+def test_sem_id_oficial_vale_a_ordem_de_leitura():
+    assert _valores(_s1200('ID-A', 100), _s1200('ID-B', 200)) == [200]
+    assert _valores(_s1200('ID-A', 100, '2'), _s1200('ID-B', 200)) == [100]
+
+def test_relatorio_distingue_exclusao_de_retificacao():
+    indice = IndiceEventos()
+    indice.adicionar('S-1200', _id('20250405100000'), None, '1', None, CNPJ, CPF, '2025-03')
+    indice.adicionar('S-1200', _id('20250407100000'), None, '1', None, CNPJ, CPF, '2025-03')
+    indice.adicionar('S-1200', _id('20250405100000'), None, '1', None, CNPJ, CPF, '2025-03')
+    indice.excluir('S-1200', _id('20250406100000'), None, CNPJ, CPF, '2025-03')
+    indice.excluir('S-1200', _id('20250406100000'), None, CNPJ, CPF, '2025-04')
+    assert indice.finalizar() == [False, True, False]
+    assert indice.relatorio() == {'duplicado': {'S-1200': 1}, 'retificado': {}, 'excluido': {'S-1200': 1},
+                                  'exclusao_sem_evento': {'S-1200': 1}}
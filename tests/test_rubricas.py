@@ -0,0 +1,71 @@
+import zipfile
+
+from esocial.calculo import CATEGORIAS
+from esocial.diagnostico import Diagnostico
+from esocial.leitura import processar_arquivos
+from esocial.mapeamentos import Mapeamentos
+from esocial.rubricas import tabela_s1010
+
+CNPJ = '12345678'
+
+def _s1010(seq, operacao, cod, ini_valid, tp=None, inc_irrf=None):
+    dados = (f'<dadosRubrica><dscRubr>RUBRICA {cod}</dscRubr><natRubr>1000</natRubr><tpRubr>{tp}</tpRubr>'
+             f'<codIncCP>11</codIncCP><codIncIRRF>{inc_irrf}</codIncIRRF></dadosRubrica>') if tp else ''
+    return (f'<eSocial xmlns="http://www.esocial.gov.br/schema/evt/evtTabRubrica/v_S_01_02_00">'
+            f'<evtTabRubrica Id="ID1{CNPJ.ljust(14, "0")}{seq:019d}"><ideEmpregador><tpInsc>1</tpInsc><nrInsc>{CNPJ}</nrInsc>'
+            f'</ideEmpregador><infoRubrica><{operacao}><ideRubrica><codRubr>{cod}</codRubr><ideTabRubr>TAB</ideTabRubr>'
+            f'<iniValid>{ini_valid}</iniValid></ideRubrica>{dados}</{operacao}></infoRubrica></evtTabRubrica></eSocial>')
+
+def _zip(caminho, *xmls):
+    with zipfile.ZipFile(caminho, 'w') as z:
+        for i, xml in enumerate(xmls): z.writestr(f'S-1010/{i}.xml', xml)
+    return str(caminho)
+
+def _periodo(cod, ini_valid, fim_valid, tp, inc_irrf):
+    return {f"{cod}|{ini_valid}": {'cod': cod, 'tp': tp, 'incCP': '11', 'incIRRF': inc_irrf, 'iniValid': ini_valid,
+                                   'fimValid': fim_valid, 'excluido': False}}
+
+def _categorias(s1010, ano):
+    return dict(tabela_s1010(s1010, ano).itertuples(index=False))
+
+def test_exclusao_do_s1010_remove_o_periodo(tmp_path):
+    tabela = _zip(tmp_path / 'tabela.zip', _s1010(1, 'inclusao', '1000', '2020-01', '1', '11'),
+                  _s1010(2, 'inclusao', '1000', '2025-01', '1', '12'))
+    exclusao = _zip(tmp_path / 'exclusao.zip', _s1010(3, 'exclusao', '1000', '2025-01'))
+    assert _categorias(processar_arquivos([tabela], workers=1)[5], 2025) == {'1000': 'v_13_bruto'}
+
+    diagnostico = Diagnostico()
+    s1010 = processar_arquivos([tabela, exclusao], workers=1, diagnostico=diagnostico)[5]
+    assert diagnostico.total_falhas == 0
+    assert s1010['1000|2025-01']['excluido'] and not s1010['1000|2020-01']['excluido']
+    # sem o período excluído, volta a valer o anterior
+    assert _categorias(s1010, 2025) == {'1000': 'v_bruto'}
+
+def test_rubrica_com_unico_periodo_excluido_fica_sem_categoria(tmp_path):
+    zips = [_zip(tmp_path / 'tabela.zip', _s1010(1, 'inclusao', '1000', '2020-01', '1', '11')),
+            _zip(tmp_path / 'exclusao.zip', _s1010(2, 'exclusao', '1000', '2020-01'))]
+    assert _categorias(processar_arquivos(zips, workers=1)[5], 2025) == {}
+
+def test_vale_o_periodo_do_ano_calendario():
+    s1010 = {**_periodo('1000', '2020-01', '2024-12', '1', '11'), **_periodo('1000', '2025-01', None, '1', '12'),
+             **_periodo('2000', '2026-01', None, '2', '32'), **_periodo('2000', '2027-01', None, '1', '11')}
+    assert _categorias(s1010, 2024) == {'1000': 'v_bruto', '2000': 'v_bruto'}
+    assert _categorias(s1010, 2025) == {'1000': 'v_13_bruto', '2000': 'v_bruto'}
+    assert _categorias(s1010, 2026) == {'1000': 'v_13_bruto', '2000': 'v_irrf'}
+    # sem ano, o período mais recente de cada rubrica
+    assert _categorias(s1010, None) == {'1000': 'v_13_bruto', '2000': 'v_bruto'}
+
+def test_mapeamento_confirmado_vale_para_as_rubricas_ja_vistas(tmp_path):
+    mapeamentos = Mapeamentos(tmp_path)
+    mapeamentos.guardar_s1010(CNPJ, {**_periodo('1000', '2020-01', None, '1', '11'), **_periodo('9203', '2020-01', None, '2', '32')})
+    # o S-1010 guardado classifica mesmo quando o envio não traz a tabela
+    rubricas = ['1000', '5000', '9203']
+    assert mapeamentos.pre_selecao(CNPJ, rubricas, {}, 2025) == dict(dict.fromkeys(CATEGORIAS, []), v_bruto=['1000'], v_irrf=['9203'])
+
+    # o usuário desmarca a 9203 e acrescenta a 5000; a raiz do CNPJ identifica o empregador
+    mapeamentos.confirmar(f"{CNPJ}000190", rubricas, {'v_bruto': ['1000', '5000']})
+    novas = _periodo('9204', '2025-01', None, '2', '32')
+    assert mapeamentos.pre_selecao(CNPJ, ['1000', '5000', '9203', '9204'], novas, 2025) == dict(
+        dict.fromkeys(CATEGORIAS, []), v_bruto=['1000', '5000'], v_irrf=['9204'])
+    registro = mapeamentos.ler(CNPJ)
+    assert registro['conhecidas'] == rubricas and sorted(registro['s1010']) == ['1000|2020-01', '9203|2020-01']
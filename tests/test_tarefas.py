@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+
+from esocial import tarefas as modulo_tarefas
+from esocial.cache import CacheLeitura
+from esocial.calculo import CATEGORIAS
+from esocial.mapeamentos import Mapeamentos
+from esocial.rubricas import rubricas_unicas
+from esocial.tarefas import MAX_TENTATIVAS, Tarefas
+
+@pytest.fixture
+def fila(tmp_path, dataset):
+    zips = dataset(funcionarios=5, meses=2)
+    fila = Tarefas(tmp_path / 'tarefas')
+    return fila, fila.criar(zips, 2025, 'EMPRESA', '12345678', excel=False)
+
+def _gravar_estado(fila, tarefa, **mudancas):
+    caminho = os.path.join(fila.diretorio, tarefa, 'estado.json')
+    with open(caminho, encoding='utf-8') as f: estado = json.load(f)
+    with open(caminho, 'w', encoding='utf-8') as f: json.dump(dict(estado, **mudancas), f)
+
+def test_tarefa_interrompida_demais_falha_sem_rodar(fila, monkeypatch):
+    fila, tarefa = fila
+    _gravar_estado(fila, tarefa, estado='executando', tentativas=MAX_TENTATIVAS)
+    monkeypatch.setattr(modulo_tarefas._Execucao, 'rodar', lambda self: pytest.fail("não deveria rodar"))
+    fila.executar_fila()
+    estado = fila.estado(tarefa)
+    assert estado['estado'] == 'falhou' and str(MAX_TENTATIVAS) in estado['erro']
+    assert fila.pendentes() == []
+
+def test_retomada_conta_so_os_pdfs_completos(fila, monkeypatch):
+    fila, tarefa = fila
+    _gravar_estado(fila, tarefa, estado='executando', tentativas=1)
+    # cálculo já gravado pela execução interrompida
+    with open(os.path.join(fila.diretorio, tarefa, 'dados.json'), 'w', encoding='utf-8') as f: json.dump([], f)
+    pdfs = os.path.join(fila.diretorio, tarefa, 'pdfs')
+    os.makedirs(pdfs)
+    for nome in ('0000000.pdf', '0000001.pdf', '0000002.pdf.tmp'):
+        open(os.path.join(pdfs, nome), 'wb').close()
+    registrados = []
+    def gerar_pdfs(dados, ano, diretorio, workers=None, progresso=None):
+        progresso(len(dados), len(dados))
+    monkeypatch.setattr(modulo_tarefas, 'gerar_pdfs_em_disco', gerar_pdfs)
+    monkeypatch.setattr(modulo_tarefas, 'compactar_pdfs', lambda dados, diretorio, destino, tamanho_parte: [destino])
+    progresso_original = modulo_tarefas._Execucao._progresso
+    def progresso(self, etapa, concluidos, total, inicio=None, feitos_antes=0):
+        if etapa == 'pdf': registrados.append(feitos_antes)
+        progresso_original(self, etapa, concluidos, total, inicio, feitos_antes)
+    monkeypatch.setattr(modulo_tarefas._Execucao, '_progresso', progresso)
+    fila.executar(tarefa)
+    assert fila.estado(tarefa)['estado'] == 'concluida'
+    assert registrados == [2]
+
+def test_calculo_da_tarefa_usa_o_mapeamento_salvo(tmp_path, monkeypatch, dataset, lido):
+    monkeypatch.setattr(modulo_tarefas, 'CacheLeitura', lambda: CacheLeitura(tmp_path / 'cache'))
+    zips = dataset(funcionarios=5, meses=2)
+    # o usuário desmarcou todas as rubricas do empregador
+    mapeamentos = Mapeamentos(tmp_path / 'mapeamentos')
+    mapeamentos.confirmar('12345678', rubricas_unicas(lido(funcionarios=5, meses=2)[0]), {})
+    fila = Tarefas(tmp_path / 'tarefas')
+    com_salvo = fila.criar(zips, 2025, 'EMPRESA', '12345678', pdf=False, excel=False, workers=1, mapeamentos=mapeamentos)
+    so_s1010 = fila.criar(zips, 2025, 'EMPRESA', '12345678', pdf=False, excel=False, workers=1)
+    fila.executar_fila()
+
+    def totais(tarefa):
+        assert fila.estado(tarefa)['estado'] == 'concluida'
+        with open(os.path.join(fila.diretorio, tarefa, 'dados.json'), encoding='utf-8') as f:
+            dados = json.load(f)
+        return [sum(item['calculados'][c] for item in dados) for c in CATEGORIAS]
+    assert totais(com_salvo) == [0] * len(CATEGORIAS)
+    assert totais(so_s1010)[0] > 0
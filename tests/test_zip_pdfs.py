@@ -0,0 +1,85 @@
+import io
+import os
+import re
+import zipfile
+
+import pytest
+
+from esocial import pdf as modulo_pdf
+from esocial.pdf import compactar_pdfs, gerar_pdfs_em_disco, gerar_zip_pdfs, nomes_arquivos_pdf, renderizar_pdf
+from esocial.saidas import PastaSessao, limpar_saidas_antigas
+
+CALCULADOS = {'v_bruto': 84512.37, 'v_inss': 9012.5, 'v_irrf': 7421.09, 'v_13_bruto': 7042.7, 'v_13_inss': 751.04,
+              'v_13_irrf': 612.33, 'v_13_liq': 6291.66, 'txt_saude': "Sem informações complementares."}
+
+def _dados(quantidade):
+    dados = []
+    for k in range(quantidade):
+        cpf, nome = f'{k:011d}', 'MARIA DA SILVA' if k in (2, 5) else f'FUNCIONARIO {k}'
+        dados.append({'cpf': cpf, 'nome': nome, 'calculados': dict(CALCULADOS, v_bruto=1000.0 + k),
+                      'cadastrais': {'CPF': cpf, 'Nome': nome, 'Empregador_Nome': 'EMPRESA', 'Empregador_CNPJ': '12.345.678/0001-90'}})
+    return dados
+
+def _sem_data(conteudo):
+    # a data de criação do PDF muda de um segundo para o outro
+    return re.sub(rb'/CreationDate \(D:\d+\)', b'', conteudo)
+
+def _membros(caminhos):
+    membros = []
+    for caminho in caminhos:
+        with zipfile.ZipFile(caminho) as z:
+            membros += [(nome, _sem_data(z.read(nome))) for nome in z.namelist()]
+    return membros
+
+def _esperado(dados):
+    return [(nome, _sem_data(renderizar_pdf(item['calculados'], item['cadastrais'], '2025')))
+            for nome, item in zip(nomes_arquivos_pdf(dados), dados)]
+
+def test_zip_paralelo_igual_ao_sequencial_e_na_ordem(tmp_path, monkeypatch):
+    monkeypatch.setattr(modulo_pdf, 'TAMANHO_BLOCO_PDF', 3)
+    dados = _dados(10)
+    fracoes = []
+    arquivos = gerar_zip_pdfs(dados, '2025', str(tmp_path / 'informes.zip'), workers=2, progresso=fracoes.append)
+    assert arquivos == [str(tmp_path / 'informes.zip')]
+    assert _membros(arquivos) == _esperado(dados)
+    # homônimos recebem o CPF no nome
+    assert 'Informe_MARIA DA SILVA_00000000002.pdf' in nomes_arquivos_pdf(dados)
+    assert fracoes == sorted(fracoes) and fracoes[-1] == 1.0
+
+def test_zip_dividido_em_partes_dentro_do_limite(tmp_path):
+    dados = _dados(8)
+    inteiro = gerar_zip_pdfs(dados, '2025', str(tmp_path / 'inteiro.zip'), workers=1)
+    limite = os.path.getsize(inteiro[0]) // 3
+    partes = gerar_zip_pdfs(dados, '2025', str(tmp_path / 'informes.zip'), workers=1, tamanho_parte=limite)
+    assert len(partes) >= 3
+    assert partes == [str(tmp_path / f'informes_parte{k:02d}.zip') for k in range(1, len(partes) + 1)]
+    assert all(os.path.getsize(parte) <= limite for parte in partes)
+    assert _membros(partes) == _membros(inteiro)
+
+    # os PDFs gravados em disco e compactados depois dão as mesmas partes
+    gerar_pdfs_em_disco(dados, '2025', tmp_path / 'pdfs', workers=1)
+    compactados = compactar_pdfs(dados, tmp_path / 'pdfs', str(tmp_path / 'retomado.zip'), tamanho_parte=limite)
+    assert len(compactados) == len(partes) and _membros(compactados) == _membros(inteiro)
+
+def test_parte_unica_fica_com_o_nome_do_destino(tmp_path):
+    destino = str(tmp_path / 'informes.zip')
+    assert gerar_zip_pdfs(_dados(2), '2025', destino, workers=1, tamanho_parte=10 ** 9) == [destino]
+    assert os.listdir(tmp_path) == ['informes.zip']
+    with pytest.raises(ValueError):
+        gerar_zip_pdfs(_dados(2), '2025', io.BytesIO(), workers=1, tamanho_parte=10 ** 9)
+
+def test_pasta_da_sessao_e_limpeza_das_antigas(tmp_path):
+    pasta = PastaSessao(tmp_path)
+    with open(os.path.join(pasta.nova('pdf'), 'b.zip'), 'w'): pass
+    with open(os.path.join(pasta.nova('excel'), 'a.xlsx'), 'w'): pass
+    assert [os.path.basename(a) for a in pasta.arquivos('pdf')] == ['b.zip']
+    # uma nova exportação do mesmo tipo descarta a anterior
+    pasta.nova('pdf')
+    assert pasta.arquivos('pdf') == [] and len(pasta.arquivos('excel')) == 1
+
+    abandonada = PastaSessao(tmp_path)
+    os.utime(abandonada.caminho, (1000, 1000))
+    limpar_saidas_antigas(tmp_path)
+    assert not os.path.exists(abandonada.caminho) and os.path.isdir(pasta.caminho)
+    pasta.apagar()
+    assert not os.path.exists(pasta.caminho)